@@ -53,25 +53,25 @@ class Aabb:
             self.x = Interval(a=box0.x, b=box1.x)
             self.y = Interval(a=box0.y, b=box1.y)
             self.z = Interval(a=box0.z, b=box1.z)
-            self.pad_to_minimums()
         elif a is not None and b is not None:
             # Construct from two points
             self.x = Interval(min(a[0], b[0]), max(a[0], b[0]))
             self.y = Interval(min(a[1], b[1]), max(a[1], b[1]))
             self.z = Interval(min(a[2], b[2]), max(a[2], b[2]))
-            self.pad_to_minimums()
         elif x is not None and y is not None and z is not None:
             # Construct from three intervals
             self.x = x
             self.y = y
             self.z = z
-            self.pad_to_minimums()
         else:
             # Default: empty box
             self.x = Interval()
             self.y = Interval()
             self.z = Interval()
-            self.pad_to_minimums()
+        self.pad_to_minimums()
+        # Corner coordinates as plain floats, indexed [is_max][axis] by the slab test.
+        self.bounds = ((float(self.x.min), float(self.y.min), float(self.z.min)),
+                       (float(self.x.max), float(self.y.max), float(self.z.max)))
 
     def pad_to_minimums(self):
         delta = 0.0001
@@ -91,24 +91,48 @@ class Aabb:
         return self.x
 
     def hit(self, r: Ray, ray_t: Interval) -> bool:
-        ray_orig = r.origin()
-        ray_dir = r.direction()
+        # Slab test with the ray's cached inverse direction. The sign of each
+        # direction component picks the near and far plane, so there is no
+        # division or swap per node.
+        ox, oy, oz = r.orig_xyz
+        ix, iy, iz = r.inv_dir
+        nx, ny, nz = r.dir_neg
+        bounds = self.bounds
         tmin = ray_t.min
         tmax = ray_t.max
-        for axis in range(3):
-            ax = self.axis_interval(axis)
-            adinv = 1.0 / ray_dir[axis] if ray_dir[axis] != 0 else float('inf')
-            t0 = (ax.min - ray_orig[axis]) * adinv
-            t1 = (ax.max - ray_orig[axis]) * adinv
-            if t0 < t1:
-                tmin = max(t0, tmin)
-                tmax = min(t1, tmax)
-            else:
-                tmin = max(t1, tmin)
-                tmax = min(t0, tmax)
-            if tmax <= tmin:
-                return False
-        return True
+        t0 = (bounds[nx][0] - ox) * ix
+        t1 = (bounds[1 - nx][0] - ox) * ix
+        if t0 > tmin:
+            tmin = t0
+        if t1 < tmax:
+            tmax = t1
+        if tmax <= tmin:
+            return False
+        t0 = (bounds[ny][1] - oy) * iy
+        t1 = (bounds[1 - ny][1] - oy) * iy
+        if t0 > tmin:
+            tmin = t0
+        if t1 < tmax:
+            tmax = t1
+        if tmax <= tmin:
+            return False
+        t0 = (bounds[nz][2] - oz) * iz
+        t1 = (bounds[1 - nz][2] - oz) * iz
+        if t0 > tmin:
+            tmin = t0
+        if t1 < tmax:
+            tmax = t1
+        return tmax > tmin
+
+    def surface_area(self):
+        dx = self.x.size()
+        dy = self.y.size()
+        dz = self.z.size()
+        return 2.0 * (dx * dy + dy * dz + dz * dx)
+
+    def centroid(self, axis):
+        ax = self.axis_interval(axis)
+        return 0.5 * (ax.min + ax.max)
 
     def longest_axis(self):
         x_size = self.x.size()
@@ -0,0 +1,85 @@
+import numpy as np
+from ParallelRender import TileRenderer
+from ImageWriter import write_image
+from color import luminance
+
+# Adaptive sampling: every pass gives each still-active pixel cam.pass_samples
+# samples and records the pass mean. The spread of a pixel's pass means gives
+# the standard error of its running mean; pixels whose error relative to their
+# brightness drops below cam.adaptive_threshold stop sampling, and the budget
+# of samples_per_pixel * pixel count goes to the pixels that are still noisy.
+
+min_passes = 2          # Passes every pixel gets before its variance is trusted
+max_sample_factor = 8   # No pixel takes more than this many times samples_per_pixel
+
+def relative_error(mean_lum, m2, passes):
+    # Standard error of the mean luminance, relative to the luminance itself.
+    n = np.maximum(passes, 1)
+    variance = m2 / np.maximum(n - 1, 1)
+    std_error = np.sqrt(variance / n)
+    return std_error / (mean_lum + 0.01)
+
+def render_adaptive(cam, world, lights):
+    """
+    Returns the mean framebuffer and leaves the per-pixel sample count map in
+    cam.sample_counts.
+    """
+    height, width = cam.image_height, cam.image_width
+    k = max(1, cam.pass_samples)
+    budget = cam.samples_per_pixel * width * height
+    cap = max_sample_factor * cam.samples_per_pixel
+    sums = np.zeros((height, width, 3))
+    counts = np.zeros((height, width), dtype=np.int64)
+    passes = np.zeros((height, width), dtype=np.int64)
+    mean_lum = np.zeros((height, width))
+    m2 = np.zeros((height, width))
+    spent = 0
+    pass_index = 0
+    with TileRenderer(cam, world, lights) as renderer:
+        while spent < budget:
+            error = relative_error(mean_lum, m2, passes)
+            active = ((passes < min_passes) | (error > cam.adaptive_threshold)) & (counts + k <= cap)
+            if not active.any():
+                break
+            affordable = (budget - spent) // k
+            if affordable == 0:
+                break
+            if active.sum() > affordable:
+                # Not enough budget for everyone: keep the noisiest pixels.
+                priority = np.where(active, np.where(passes < min_passes, np.inf, error), -1.0)
+                cutoff = np.partition(priority.ravel(), -affordable)[-affordable]
+                active &= priority >= cutoff
+                if active.sum() > affordable:
+                    flat = np.flatnonzero(active)
+                    active.ravel()[flat[affordable:]] = False
+            samples = np.where(active, k, 0)
+            pass_image = renderer.render(samples, pass_index=pass_index, verbose=False, first_sample=counts)
+            pass_index += 1
+
+            # Welford update of the per-pixel luminance statistics over pass means.
+            lum = luminance(pass_image)
+            passes += active
+            delta = np.where(active, lum - mean_lum, 0.0)
+            mean_lum += delta / np.maximum(passes, 1)
+            m2 += delta * np.where(active, lum - mean_lum, 0.0)
+            sums += pass_image * samples[..., None]
+            counts += samples
+            spent += int(samples.sum())
+            print(f"Adaptive pass {pass_index}: {int(active.sum())} active pixels, "
+                  f"{spent / (width * height):.1f} average samples per pixel.")
+    cam.sample_counts = counts
+    report_sample_counts(counts)
+    return sums / np.maximum(counts, 1)[..., None]
+
+def report_sample_counts(counts):
+    print(f"Samples per pixel: min {counts.min()}, mean {counts.mean():.1f}, max {counts.max()}.")
+    edges = np.unique(np.percentile(counts, [0, 25, 50, 75, 90, 100]).astype(np.int64))
+    histogram, _ = np.histogram(counts, bins=np.append(edges, edges[-1] + 1))
+    for lo, hi, n in zip(edges, np.append(edges[1:], edges[-1] + 1), histogram):
+        print(f"  {lo:>6}-{hi - 1:<6} spp: {n} pixels")
+
+def write_sample_map(counts, target, fmt=None):
+    # Writes the sample count map as a grayscale image, brightest where most samples went.
+    scaled = counts / max(counts.max(), 1)
+    # Squared so the gamma applied by the 8-bit writers maps counts linearly to gray.
+    write_image(target, np.repeat((scaled ** 2)[..., None], 3, axis=2), fmt)
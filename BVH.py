@@ -1,11 +1,24 @@
 
-from Hittable import Hittable, HitRecord
+import bisect
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from Hittable import DeferredHittable, HitRecord
+from HittableList import HittableList
 from Interval import Interval
 from Aabb import Aabb
 from Ray import Ray
 from Vec3 import Vec3
 
-class BVHNode(Hittable):
+class BVHLeaf(HittableList):
+    """A BVH leaf holding more than two primitives, built by the SAH builder."""
+    pass
+
+class BVHNode(DeferredHittable):
+    # Relative costs used by the surface area heuristic
+    traversal_cost = 1.0
+    intersect_cost = 1.0
+    sah_bins = 12
+
     @staticmethod
     def box_compare(a, b, axis_index):
         a_axis = a.bounding_box().axis_interval(axis_index)
@@ -23,7 +36,16 @@ class BVHNode(Hittable):
     @staticmethod
     def box_z_compare(a, b):
         return BVHNode.box_compare(a, b, 2)
-    def __init__(self, objects, start=None, end=None):
+    def __init__(self, objects, start=None, end=None, split="median", max_leaf_size=4, workers=1):
+        """
+        split="median" sorts the span on the longest axis and splits it in half.
+        split="sah" picks split planes with a binned surface area heuristic and
+        allows leaves of up to max_leaf_size primitives.
+        split="lbvh" sorts the primitives by the Morton code of their centroids
+        and splits on the code bits, which builds in about linear time; see
+        build_lbvh. With workers > 1 (0 for every core) the shape of its
+        subtrees is worked out in a process pool.
+        """
         # Accepts either a HittableList or a list of Hittable objects
         if hasattr(objects, 'objects'):
             # If a HittableList is passed
@@ -33,6 +55,20 @@ class BVHNode(Hittable):
         if end is None:
             end = len(objects)
         object_span = end - start
+        if split == "sah" and object_span > 1:
+            left_objs, right_objs = BVHNode.sah_partition(objects[start:end], max_leaf_size, allow_leaf=False)
+            self.set_children(BVHNode.build_sah(left_objs, max_leaf_size),
+                              BVHNode.build_sah(right_objs, max_leaf_size))
+            return
+        elif split == "lbvh":
+            root = BVHNode.build_lbvh(objects[start:end], workers)
+            if isinstance(root, BVHNode):
+                self.set_children(root.left, root.right)
+            else:
+                self.set_children(root, root)
+            return
+        elif split not in ("median", "sah"):
+            raise ValueError(f"Unknown BVH split '{split}', expected 'median', 'sah' or 'lbvh'.")
         # Build the bounding box of the span of source objects
         bbox = None
         for object_index in range(start, end):
@@ -62,6 +98,17 @@ class BVHNode(Hittable):
             mid = start + object_span // 2
             self.left = BVHNode(sorted_objs, 0, mid - start)
             self.right = BVHNode(sorted_objs, mid - start, object_span)
+        self.set_children(self.left, self.right)
+
+    @classmethod
+    def from_children(cls, left, right):
+        node = cls.__new__(cls)
+        node.set_children(left, right)
+        return node
+
+    def set_children(self, left, right):
+        self.left = left
+        self.right = right
         box_left = self.left.bounding_box()
         box_right = self.right.bounding_box()
         if box_left is None or box_right is None:
@@ -69,12 +116,229 @@ class BVHNode(Hittable):
         else:
             self.bbox = Aabb(box0=box_left, box1=box_right)
 
-    def hit(self, r: Ray, ray_t: Interval, rec: HitRecord) -> bool:
+    @staticmethod
+    def build_sah(objs, max_leaf_size):
+        # Returns a subtree for objs: the object itself, a leaf, or a BVHNode.
+        if len(objs) == 1:
+            return objs[0]
+        partition = BVHNode.sah_partition(objs, max_leaf_size, allow_leaf=True)
+        if partition is None:
+            return BVHNode.make_leaf(objs)
+        left_objs, right_objs = partition
+        return BVHNode.from_children(BVHNode.build_sah(left_objs, max_leaf_size),
+                                     BVHNode.build_sah(right_objs, max_leaf_size))
+
+    @staticmethod
+    def morton_codes(centroids):
+        """
+        30-bit Morton codes of (N, 3) points: each coordinate is quantized to
+        10 bits over the points' bounding box and the bits are interleaved.
+        """
+        lo = centroids.min(axis=0)
+        extent = centroids.max(axis=0) - lo
+        cells = ((centroids - lo) / np.where(extent > 0, extent, 1.0) * 1023).astype(np.uint64)
+        codes = np.zeros(len(centroids), dtype=np.uint64)
+        for axis in range(3):
+            x = cells[:, axis]
+            x = (x * np.uint64(0x00010001)) & np.uint64(0xFF0000FF)
+            x = (x * np.uint64(0x00000101)) & np.uint64(0x0F00F00F)
+            x = (x * np.uint64(0x00000011)) & np.uint64(0xC30C30C3)
+            x = (x * np.uint64(0x00000005)) & np.uint64(0x49249249)
+            codes |= x << np.uint64(2 - axis)
+        return codes
+
+    @staticmethod
+    def build_lbvh(objects, workers=1):
+        """
+        Linear BVH build: the primitives are sorted once by the Morton code of
+        their bounding box centroid (in NumPy), and every node splits its run
+        of codes where the highest differing bit changes, down to single
+        primitives. Returns the root BVHNode, or the object itself.
+        """
+        boxes = [obj.bounding_box() for obj in objects]
+        bounds = np.array([box.bounds if box is not None else ((0.0,) * 3,) * 2 for box in boxes])
+        codes = BVHNode.morton_codes(bounds.mean(axis=1))
+        order = np.argsort(codes, kind="stable")
+        objs = [objects[k] for k in order]
+        codes = codes[order].tolist()
+        from ParallelRender import worker_count
+        workers = worker_count(workers)
+        if workers == 1 or len(objs) < 4096:
+            return BVHNode.build_morton(objs, codes, 0, len(objs))
+
+        # Cut the top of the tree into a few runs per worker. The workers only
+        # see the runs' Morton codes and send back the shape of each subtree as
+        # nested tuples of indices into the run, which are turned into BVHNodes
+        # over the caller's own objects here, so primitives are never copied.
+        runs = []
+        def cut(begin, end):
+            if end - begin <= max(len(objs) // (4 * workers), 1):
+                runs.append((begin, end))
+                return begin, end
+            mid = BVHNode.morton_split(codes, begin, end)
+            return cut(begin, mid), cut(mid, end)
+        shape = cut(0, len(objs))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            subtrees = pool.map(BVHNode.build_run, [codes[begin:end] for begin, end in runs])
+            shapes = {begin: subtree for (begin, _), subtree in zip(runs, subtrees)}
+        def attach(node, offset):
+            if isinstance(node, int):
+                return objs[offset + node]
+            return BVHNode.from_children(attach(node[0], offset), attach(node[1], offset))
+        def join(node):
+            if isinstance(node[0], int):
+                return attach(shapes[node[0]], node[0])
+            return BVHNode.from_children(join(node[0]), join(node[1]))
+        return join(shape)
+
+    @staticmethod
+    def build_run(codes):
+        # Worker side of build_lbvh: the subtree over a run of sorted codes, as
+        # an index for a single primitive or a (left, right) pair.
+        def shape(begin, end):
+            if end - begin == 1:
+                return begin
+            mid = BVHNode.morton_split(codes, begin, end)
+            return shape(begin, mid), shape(mid, end)
+        return shape(0, len(codes))
+
+    @staticmethod
+    def morton_split(codes, begin, end):
+        # First index of the run whose code has the highest differing bit set;
+        # runs of equal codes are halved.
+        first, last = codes[begin], codes[end - 1]
+        if first == last:
+            return (begin + end) // 2
+        bit = (first ^ last).bit_length() - 1
+        return bisect.bisect_left(codes, last >> bit << bit, begin, end)
+
+    @staticmethod
+    def build_morton(objs, codes, begin, end):
+        if end - begin == 1:
+            return objs[begin]
+        mid = BVHNode.morton_split(codes, begin, end)
+        return BVHNode.from_children(BVHNode.build_morton(objs, codes, begin, mid),
+                                     BVHNode.build_morton(objs, codes, mid, end))
+
+    @staticmethod
+    def make_leaf(objs):
+        leaf = BVHLeaf()
+        for obj in objs:
+            leaf.add(obj)
+        return leaf
+
+    @staticmethod
+    def sah_partition(objs, max_leaf_size, allow_leaf):
+        """
+        Bins the object centroids along the axis of largest centroid extent and
+        returns (left_objs, right_objs) for the cheapest split plane, or None when
+        keeping objs as a single leaf is cheaper. Falls back to a median split
+        when the centroids cannot be separated.
+        """
+        n = len(objs)
+        boxes = [obj.bounding_box() for obj in objs]
+        if any(b is None for b in boxes):
+            return BVHNode.median_partition(objs, boxes, 0)
+        centroids = [(b.centroid(0), b.centroid(1), b.centroid(2)) for b in boxes]
+        lo = [min(c[a] for c in centroids) for a in range(3)]
+        hi = [max(c[a] for c in centroids) for a in range(3)]
+        axis = max(range(3), key=lambda a: hi[a] - lo[a])
+        extent = hi[axis] - lo[axis]
+        leaf_cost = BVHNode.intersect_cost * n
+        if extent <= 0:
+            if allow_leaf and n <= max_leaf_size:
+                return None
+            return BVHNode.median_partition(objs, boxes, axis)
+
+        # Assign every object to a bin and grow the per-bin bounds and counts.
+        nbins = BVHNode.sah_bins
+        scale = nbins / extent
+        bin_of = [min(nbins - 1, int((c[axis] - lo[axis]) * scale)) for c in centroids]
+        bin_boxes = [None] * nbins
+        bin_counts = [0] * nbins
+        for b, box in zip(bin_of, boxes):
+            bin_counts[b] += 1
+            bin_boxes[b] = box if bin_boxes[b] is None else Aabb(box0=bin_boxes[b], box1=box)
+
+        # Sweep from the right to get the area and count right of every plane.
+        right_area = [0.0] * nbins
+        right_count = [0] * nbins
+        acc_box, acc_count = None, 0
+        for b in range(nbins - 1, 0, -1):
+            if bin_boxes[b] is not None:
+                acc_box = bin_boxes[b] if acc_box is None else Aabb(box0=acc_box, box1=bin_boxes[b])
+            acc_count += bin_counts[b]
+            right_area[b] = acc_box.surface_area() if acc_box is not None else 0.0
+            right_count[b] = acc_count
+
+        parent_area = boxes[0]
+        for box in boxes[1:]:
+            parent_area = Aabb(box0=parent_area, box1=box)
+        parent_area = parent_area.surface_area()
+        best_cost, best_plane = float('inf'), None
+        acc_box, acc_count = None, 0
+        for b in range(1, nbins):
+            if bin_boxes[b - 1] is not None:
+                acc_box = bin_boxes[b - 1] if acc_box is None else Aabb(box0=acc_box, box1=bin_boxes[b - 1])
+            acc_count += bin_counts[b - 1]
+            if acc_count == 0 or right_count[b] == 0:
+                continue
+            cost = BVHNode.traversal_cost + BVHNode.intersect_cost * (
+                acc_box.surface_area() * acc_count + right_area[b] * right_count[b]) / parent_area
+            if cost < best_cost:
+                best_cost, best_plane = cost, b
+
+        if best_plane is None:
+            if allow_leaf and n <= max_leaf_size:
+                return None
+            return BVHNode.median_partition(objs, boxes, axis)
+        if allow_leaf and n <= max_leaf_size and leaf_cost <= best_cost:
+            return None
+        left_objs = [obj for obj, b in zip(objs, bin_of) if b < best_plane]
+        right_objs = [obj for obj, b in zip(objs, bin_of) if b >= best_plane]
+        return left_objs, right_objs
+
+    @staticmethod
+    def median_partition(objs, boxes, axis):
+        order = sorted(range(len(objs)), key=lambda k: boxes[k].axis_interval(axis).min if boxes[k] is not None else 0)
+        mid = len(objs) // 2
+        return [objs[k] for k in order[:mid]], [objs[k] for k in order[mid:]]
+
+    def sah_cost(self):
+        """
+        Expected cost of a ray query under the surface area heuristic: one
+        traversal step per node plus one intersection per primitive, weighted by
+        the probability of reaching each child.
+        """
+        area = self.bbox.surface_area()
+        children = [self.left] if self.right is self.left else [self.left, self.right]
+        cost = BVHNode.traversal_cost
+        for child in children:
+            child_box = child.bounding_box()
+            p = child_box.surface_area() / area if area > 0 else 1.0
+            if isinstance(child, BVHNode):
+                cost += p * child.sah_cost()
+            elif isinstance(child, BVHLeaf):
+                cost += p * BVHNode.intersect_cost * len(child.objects)
+            else:
+                cost += p * BVHNode.intersect_cost
+        return cost
+
+    def intersect(self, r: Ray, ray_t: Interval):
         if self.bbox is None or not self.bbox.hit(r, ray_t):
+            return None
+        found_left = self.left.intersect(r, ray_t)
+        if self.right is self.left:
+            return found_left
+        found_right = self.right.intersect(r, Interval(ray_t.min, ray_t.max if found_left is None else found_left[0]))
+        return found_left if found_right is None else found_right
+
+    def occluded(self, r: Ray, t_max: float, t_min: float = 0.001) -> bool:
+        if self.bbox is None or not self.bbox.hit(r, Interval(t_min, t_max)):
             return False
-        hit_left = self.left.hit(r, ray_t, rec)
-        hit_right = self.right.hit(r, Interval(ray_t.min, rec.t if hit_left else ray_t.max), rec)
-        return hit_left or hit_right
+        if self.left.occluded(r, t_max, t_min):
+            return True
+        return self.right is not self.left and self.right.occluded(r, t_max, t_min)
 
     def bounding_box(self):
         return self.bbox
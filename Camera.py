@@ -2,15 +2,33 @@ from Hittable import HitRecord
 from Vec3 import Color, Vec3, Point3
 from Interval import Interval
 from Ray import Ray
-from color import write_color
+from ImageWriter import write_image
 from Pdf import CosinePdf, MixturePdf
 import math
 import random
-import datetime
+import numpy as np
 from Pdf import HittablePdf, MixturePdf
-from Material import ScatterRecord
+from Material import ScatterRecord, Lambertian
+from Onb import Onb
+from HittableList import HittableList
+from ParallelRender import render_tiles
+from Progressive import render_progressive
+from Adaptive import render_adaptive
+from Wavefront import render_wavefront
+from Sampler import make_sampler, sample_unit_disk
+from LightSampler import LightSampler
+from Denoise import denoise
 
 class Camera:
+    # Sampler dimensions taken by the camera sample (pixel offset, lens, time),
+    # and reserved for every bounce, so each bounce of every sample reads the
+    # same dimensions whichever branches the bounces before it took. The worst
+    # bounce is MIS with a QuadSet behind a LightSampler: 1 for the light pick,
+    # 3 for the quad and its point, 2 for the BSDF direction; Russian roulette
+    # always reads the last dimension of the block.
+    camera_dimensions = 5
+    bounce_dimensions = 8
+
     def __init__(self):
         self.aspect_ratio = 16.0 / 9.0
         self.image_width = 1200
@@ -23,6 +41,26 @@ class Camera:
         self.defocus_angle = 0.0
         self.focus_dist = 10.0
         self.background = Color(0.12, 0.12, 0.12)
+        self.workers = 1               # Worker processes for rendering; 0 or None uses every core
+        self.tile_size = 32            # Tiles are tile_size x tile_size pixels
+        self.seed = None               # Fixed seed makes renders repeatable for any worker count
+        self.engine = "scalar"         # "scalar" traces one ray at a time, "wavefront" traces NumPy ray batches
+        self.output_format = None      # "p3", "p6", "png", "pfm" or "npy"; None infers it from the output
+        self.checkpoint = None         # .npy file for progressive, resumable rendering
+        self.pass_samples = 4          # Samples per pixel added by each progressive pass
+        self.checkpoint_interval = 60  # Seconds between checkpoint flushes
+        self.time_budget = None        # Seconds to render progressive passes for, instead of samples_per_pixel
+        self.adaptive_threshold = None # Relative error at which adaptive sampling stops a pixel
+        self.sample_counts = None      # Samples per pixel actually taken by the last adaptive or time-budgeted render
+        self.rr_min_depth = None       # Bounces before Russian roulette may end a path; None disables it
+        self.sampler = None            # "independent", "sobol", "halton" or "pmj"; None jitters in a sqrt(spp) grid
+        self.integrator = "mixture"    # "mixture" picks light or BSDF sampling 50/50; "mis" takes one of each
+        self.mis_heuristic = "power"   # "power" or "balance" weights for the "mis" integrator
+        self.light_selection = "uniform"  # "uniform" picks each light equally; "power" by emitted power x area
+        self.denoise = False           # Filter the image with Denoise.denoise, guided by render_guides
+        self.guide_samples = 4         # Fixed sub-pixel positions averaged into each guide pixel
+        self.path_stats = {"paths": 0, "rays": 0}  # Camera samples and rays traced by the last render
+        self.hit_interval = Interval(0.001, float('inf'))
         # These will be set in initialize()
         self.defocus_disk_u = Vec3(0, 0, 0)
         self.defocus_disk_v = Vec3(0, 0, 0)
@@ -31,9 +69,21 @@ class Camera:
         self.image_height = int(self.image_width / self.aspect_ratio)
         if self.image_height < 1:
             self.image_height = 1
+        # Without a sampler the largest square of samples is stratified and the
+        # rest are jittered over the whole pixel, so any sample count is exact.
         self.sqrt_spp = int(math.sqrt(self.samples_per_pixel))
-        self.pixel_samples_scale = 1.0 / (self.sqrt_spp * self.sqrt_spp)
+        self.pixel_samples_scale = 1.0 / self.samples_per_pixel
         self.recip_sqrt_spp = 1.0 / self.sqrt_spp
+        if self.integrator not in ("mixture", "mis"):
+            raise ValueError(f"Unknown integrator '{self.integrator}', expected 'mixture' or 'mis'.")
+        if self.mis_heuristic not in ("power", "balance"):
+            raise ValueError(f"Unknown MIS heuristic '{self.mis_heuristic}', expected 'power' or 'balance'.")
+        if self.light_selection not in ("uniform", "power"):
+            raise ValueError(f"Unknown light selection '{self.light_selection}', expected 'uniform' or 'power'.")
+        self.pixel_sampler = None
+        if self.sampler is not None:
+            seed = self.seed if self.seed is not None else random.randrange(2**32)
+            self.pixel_sampler = make_sampler(self.sampler, self.samples_per_pixel, seed)
         self.center = self.lookfrom
         self.theta = math.radians(self.vfov)
         self.h = math.tan(self.theta / 2)
@@ -52,69 +102,299 @@ class Camera:
         self.defocus_disk_u = self.u * self.defocus_radius
         self.defocus_disk_v = self.v * self.defocus_radius
 
-    def render(self, file, world, lights):
-        start = datetime.datetime.now()
+    def render(self, file, world, lights=None):
+        # file is an open file or a filename; see ImageWriter.write_image
+        framebuffer = self.render_framebuffer(world, lights)
+        if self.denoise:
+            framebuffer = denoise(framebuffer, *self.render_guides(world))
+        write_image(file, framebuffer, self.output_format)
+        self.report_path_stats()
+        print("Done.")
+
+    def report_path_stats(self):
+        paths = self.path_stats["paths"]
+        if paths:
+            print(f"Average path length: {self.path_stats['rays'] / paths:.2f} rays over {paths} camera samples.")
+
+    def render_framebuffer(self, world, lights=None):
+        # Returns the image as a (height, width, 3) array of linear colors.
+        if lights is None:
+            lights = HittableList()
         self.initialize()
-        file.write("P3\n")
-        file.write(f"{self.image_width} {self.image_height}\n")
-        file.write("255\n")
-        for j in range(self.image_height):
-            lines = self.image_height - j
-            now = datetime.datetime.now()
-            elapsed = now - start
-            ect = ((elapsed / max(j, 1)) * lines)
-            if j == 0:
-                txt = f"Scanlines remaining: {lines}."
-            else:
-                txt = f"Scanlines remaining: {lines}.  Estimated complete in appx {ect} hh:mm:ss."
-            print(txt)
-            for i in range(self.image_width):
+        self.path_stats = {"paths": 0, "rays": 0}
+        if self.light_selection == "power" and isinstance(lights, HittableList) and lights.objects:
+            if self.engine == "wavefront":
+                raise ValueError("The wavefront engine only supports uniform light selection.")
+            lights = LightSampler(lights.objects, world=world)
+        if self.checkpoint is not None or self.time_budget is not None:
+            if self.adaptive_threshold is not None:
+                raise ValueError("Adaptive sampling cannot be combined with a checkpoint or time_budget.")
+            if self.engine == "wavefront":
+                raise ValueError("The wavefront engine does not support a checkpoint or time_budget.")
+            return render_progressive(self, world, lights)
+        if self.adaptive_threshold is not None:
+            if self.engine == "wavefront":
+                raise ValueError("The wavefront engine does not support adaptive sampling.")
+            return render_adaptive(self, world, lights)
+        if self.engine == "wavefront":
+            if self.sampler is not None:
+                raise ValueError("The wavefront engine does not support samplers; set sampler to None.")
+            if self.integrator != "mixture":
+                raise ValueError("The wavefront engine only supports the mixture integrator.")
+            return render_wavefront(self, world, lights)
+        return render_tiles(self, world, lights)
+
+    def render_tile(self, world, lights, x0, y0, x1, y1, samples=None, first_sample=0):
+        # Returns the averaged linear colors for pixels [x0, x1) x [y0, y1), using the
+        # stratified sqrt_spp x sqrt_spp grid, or `samples` jittered samples if given.
+        # samples may also be a per-pixel array of counts for the tile; 0 skips a pixel.
+        # With a sampler, pixel samples are numbered from first_sample, an int or a
+        # per-pixel array, so passes continue the sequence instead of repeating it.
+        tile = np.zeros((y1 - y0, x1 - x0, 3))
+        sampler = self.pixel_sampler
+        for j in range(y0, y1):
+            for i in range(x0, x1):
                 pixel_color = Vec3(0.0, 0.0, 0.0)
-                for s_j in range(self.sqrt_spp):
-                    for s_i in range(self.sqrt_spp):
-                        r = self.get_ray(i, j, s_i, s_j)
+                if samples is None:
+                    count = self.samples_per_pixel
+                else:
+                    count = samples if isinstance(samples, int) else int(samples[j - y0, i - x0])
+                if sampler is not None:
+                    first = first_sample if isinstance(first_sample, int) else int(first_sample[j - y0, i - x0])
+                    for index in range(first, first + count):
+                        sampler.start_pixel_sample(i, j, index)
+                        r = self.get_ray(i, j, sampler=sampler)
+                        pixel_color += self.ray_color(r, self.max_depth, world, lights, sampler)
+                elif samples is None:
+                    for s_j in range(self.sqrt_spp):
+                        for s_i in range(self.sqrt_spp):
+                            r = self.get_ray(i, j, s_i, s_j)
+                            pixel_color += self.ray_color(r, self.max_depth, world, lights)
+                    for _ in range(count - self.sqrt_spp * self.sqrt_spp):
+                        r = self.get_ray(i, j)
                         pixel_color += self.ray_color(r, self.max_depth, world, lights)
-                write_color(file, self.pixel_samples_scale * pixel_color)
-        print("Done.")
+                else:
+                    for _ in range(count):
+                        r = self.get_ray(i, j)
+                        pixel_color += self.ray_color(r, self.max_depth, world, lights)
+                self.path_stats["paths"] += count
+                tile[j - y0, i - x0] = (pixel_color / count).e if count > 0 else 0.0
+        return tile
+
+    def render_guides(self, world):
+        """
+        Returns (albedo, normal, depth) of the first surface hit in every
+        pixel, as (height, width, 3), (height, width, 3) and (height, width)
+        arrays, for the denoiser. Each pixel averages a fixed grid of
+        guide_samples rays through the lens center, so guides are noise free
+        and repeatable. Normals are unit length (zero where the samples cancel
+        out). Misses get the background as albedo, a normal facing the camera
+        and a huge depth.
+        """
+        self.initialize()
+        n = max(1, int(math.sqrt(self.guide_samples)))
+        offsets = [((a + 0.5) / n - 0.5, (b + 0.5) / n - 0.5) for b in range(n) for a in range(n)]
+        albedo = np.zeros((self.image_height, self.image_width, 3))
+        normal = np.zeros((self.image_height, self.image_width, 3))
+        depth = np.zeros((self.image_height, self.image_width))
+        rec = HitRecord()
+        for j in range(self.image_height):
+            for i in range(self.image_width):
+                for du, dv in offsets:
+                    pixel_sample = self.pixel00_loc + ((i + du) * self.pixel_delta_u) + ((j + dv) * self.pixel_delta_v)
+                    r = Ray(self.center, pixel_sample - self.center, 0.0)
+                    if world.hit(r, self.hit_interval, rec):
+                        albedo[j, i] += surface_albedo(rec)
+                        normal[j, i] += rec.normal.xyz()
+                        depth[j, i] += rec.t * r.direction().length()
+                    else:
+                        albedo[j, i] += self.background.xyz()
+                        normal[j, i] -= Vec3.unit_vector(r.direction()).xyz()
+                        depth[j, i] += 1e30
+        scale = 1.0 / len(offsets)
+        # Averaged normals are shorter than one at silhouettes; rescale them so
+        # the denoiser compares directions only.
+        length = np.linalg.norm(normal, axis=-1, keepdims=True)
+        return np.clip(albedo * scale, 0.0, 1.0), normal / np.maximum(length, 1e-12), depth * scale
 
-    def ray_color(self, r, depth, world, lights):
-        # If we've exceeded the ray bounce limit, no more light is gathered.
-        if depth <= 0:
-            return Color(0.0, 0.0, 0.0)
+    def ray_color(self, r, depth, world, lights, sampler=None):
+        """
+        Iterative path integrator: follows one path for up to `depth` bounces,
+        carrying its throughput instead of recursing. The hit and scatter records
+        are reused for every bounce, and Lambertian surfaces sample the light /
+        cosine mixture directly rather than through Pdf objects. Random numbers
+        come from sampler when one is given, and from random otherwise.
+        """
+        if self.integrator == "mis":
+            return self.ray_color_mis(r, depth, world, lights, sampler)
+        color = Color(0.0, 0.0, 0.0)
+        throughput = Color(1.0, 1.0, 1.0)
         rec = HitRecord()
-        # If the ray hits nothing, return the background color.
-        if not world.hit(r, Interval(0.001, float('inf')), rec):
-            return self.background
+        srec = ScatterRecord()
+        stats = self.path_stats
+        rand = random.random if sampler is None else sampler.get_1d
+        for bounce in range(depth):
+            stats["rays"] += 1
+            if sampler is not None:
+                sampler.dimension = self.camera_dimensions + bounce * self.bounce_dimensions
+            # If the ray hits nothing, gather the background color.
+            if not world.hit(r, self.hit_interval, rec):
+                color += throughput * self.background
+                break
+            mat = rec.mat
+            if mat is None:
+                break
 
-        if rec.mat is None:
-            return Color(0.0, 0.0, 0.0)
+            if type(mat) is Lambertian:
+                # Lambertian surfaces neither emit nor need a Pdf object: mix light
+                # sampling and cosine sampling 50/50 as MixturePdf would.
+                if rand() < 0.5:
+                    direction = lights.random(rec.p, sampler)
+                else:
+                    if sampler is None:
+                        r1 = random.random()
+                        r2 = random.random()
+                    else:
+                        r1, r2 = sampler.get_2d()
+                    phi = 2 * math.pi * r1
+                    direction = Onb.local_to_world(rec.normal, math.cos(phi) * math.sqrt(r2),
+                                                   math.sin(phi) * math.sqrt(r2), math.sqrt(1 - r2))
+                cosine = Vec3.dot(rec.normal, Vec3.unit_vector(direction))
+                scattering_pdf = 0.0 if cosine < 0 else cosine / math.pi
+                pdf_value = 0.5 * lights.pdf_value(rec.p, direction) + 0.5 * max(0.0, cosine / math.pi)
+                weight = (mat.tex.value(rec.u, rec.v, rec.p) * scattering_pdf) / pdf_value
+                scattered = Ray(rec.p, direction, r.time())
+            else:
+                color += throughput * mat.emitted(r, rec, rec.u, rec.v, rec.p)
+                if not mat.scatter(r, rec, srec, sampler):
+                    break
+                if srec.skip_pdf:
+                    weight = srec.attenuation
+                    scattered = srec.skip_pdf_ray
+                else:
+                    light_ptr = HittablePdf(lights, rec.p)
+                    pdf_ptr = srec.pdf_ptr if srec.pdf_ptr is not None else CosinePdf(rec.normal)
+                    p = MixturePdf(light_ptr, pdf_ptr)
+                    scattered = Ray(rec.p, p.generate(sampler), r.time())
+                    pdf_value = p.value(scattered.direction())
+                    scattering_pdf = mat.scattering_pdf(r, rec, scattered)
+                    weight = (srec.attenuation * scattering_pdf) / pdf_value
 
+            throughput = throughput * weight
+            if self.rr_min_depth is not None and bounce >= self.rr_min_depth:
+                # Russian roulette: continue with probability equal to the path's
+                # brightest throughput channel and divide survivors by it, which keeps
+                # the estimate unbiased while ending paths that carry little light.
+                survive = min(max(throughput.x(), throughput.y(), throughput.z()), 0.95)
+                if sampler is not None:
+                    sampler.dimension = self.camera_dimensions + (bounce + 1) * self.bounce_dimensions - 1
+                if rand() >= survive:
+                    break
+                throughput = throughput / survive
+            r = scattered
+        return color
+
+    def mis_weight(self, pdf, other_pdf):
+        # Weight of a sample drawn with density pdf when other_pdf could also have drawn it.
+        if self.mis_heuristic == "power":
+            pdf, other_pdf = pdf * pdf, other_pdf * other_pdf
+        return pdf / (pdf + other_pdf)
+
+    def ray_color_mis(self, r, depth, world, lights, sampler=None):
+        """
+        Path integrator with multiple importance sampling: every diffuse bounce
+        takes one light sample (next event estimation, traced to whatever the
+        shadow ray hits) and one BSDF sample that continues the path. Emission
+        found by either one is weighted by the power or balance heuristic of
+        the two densities, so each strategy counts where it does best: light
+        sampling for small lights, BSDF sampling for large or glossy ones.
+        Specular bounces (skip_pdf) follow the material's ray with weight 1.
+        """
+        color = Color(0.0, 0.0, 0.0)
+        throughput = Color(1.0, 1.0, 1.0)
+        rec = HitRecord()
+        light_rec = HitRecord()
         srec = ScatterRecord()
-        color_from_emission = rec.mat.emitted(r, rec, rec.u, rec.v, rec.p)
+        stats = self.path_stats
+        rand = random.random if sampler is None else sampler.get_1d
+        sample_lights = not isinstance(lights, HittableList) or len(lights.objects) > 0
+        previous_p = None              # Last diffuse vertex, for weighting emission the BSDF sample finds
+        previous_pdf = 0.0
+        for bounce in range(depth):
+            stats["rays"] += 1
+            if sampler is not None:
+                sampler.dimension = self.camera_dimensions + bounce * self.bounce_dimensions
+            if not world.hit(r, self.hit_interval, rec):
+                color += throughput * self.background
+                break
+            mat = rec.mat
+            if mat is None:
+                break
 
-        if not rec.mat.scatter(r, rec, srec):
-            return color_from_emission
+            emitted = mat.emitted(r, rec, rec.u, rec.v, rec.p)
+            if emitted.length_squared() > 0:
+                if previous_p is not None and sample_lights:
+                    light_pdf = lights.pdf_value(previous_p, r.direction())
+                    if light_pdf > 0:
+                        emitted = emitted * self.mis_weight(previous_pdf, light_pdf)
+                color += throughput * emitted
 
-        if srec.skip_pdf:
-            return srec.attenuation * self.ray_color(srec.skip_pdf_ray, depth - 1, world, lights)
+            if not mat.scatter(r, rec, srec, sampler):
+                break
+            if srec.skip_pdf:
+                throughput = throughput * srec.attenuation
+                r = srec.skip_pdf_ray
+                previous_p = None
+            else:
+                bsdf_pdf = srec.pdf_ptr if srec.pdf_ptr is not None else CosinePdf(rec.normal)
+                if sample_lights:
+                    # Light sample: counted only if the shadow ray reaches an emitter.
+                    direction = lights.random(rec.p, sampler)
+                    light_pdf = lights.pdf_value(rec.p, direction)
+                    if light_pdf > 0:
+                        shadow = Ray(rec.p, direction, r.time())
+                        scattering_pdf = mat.scattering_pdf(r, rec, shadow)
+                        if scattering_pdf > 0:
+                            stats["rays"] += 1
+                            if world.hit(shadow, self.hit_interval, light_rec) and light_rec.mat is not None:
+                                light = light_rec.mat.emitted(shadow, light_rec, light_rec.u, light_rec.v, light_rec.p)
+                                weight = self.mis_weight(light_pdf, bsdf_pdf.value(direction))
+                                color += throughput * srec.attenuation * light * (scattering_pdf * weight / light_pdf)
 
-        light_ptr = HittablePdf(lights, rec.p)
-        pdf_ptr = srec.pdf_ptr if srec.pdf_ptr is not None else CosinePdf(rec.normal)
-        p = MixturePdf(light_ptr, pdf_ptr)
-        scattered = Ray(rec.p, p.generate(), r.time())
-        pdf_value = p.value(scattered.direction())
-        scattering_pdf = rec.mat.scattering_pdf(r, rec, scattered)
-        sample_color = self.ray_color(scattered, depth - 1, world, lights)
-        color_from_scatter = (srec.attenuation * scattering_pdf * sample_color) / pdf_value
+                # BSDF sample: continues the path.
+                scattered = Ray(rec.p, bsdf_pdf.generate(sampler), r.time())
+                pdf_value = bsdf_pdf.value(scattered.direction())
+                if pdf_value <= 0:
+                    break
+                scattering_pdf = mat.scattering_pdf(r, rec, scattered)
+                throughput = throughput * srec.attenuation * (scattering_pdf / pdf_value)
+                previous_p = rec.p
+                previous_pdf = pdf_value
+                r = scattered
 
-        return color_from_emission + color_from_scatter
+            if self.rr_min_depth is not None and bounce >= self.rr_min_depth:
+                survive = min(max(throughput.x(), throughput.y(), throughput.z()), 0.95)
+                if sampler is not None:
+                    sampler.dimension = self.camera_dimensions + (bounce + 1) * self.bounce_dimensions - 1
+                if rand() >= survive:
+                    break
+                throughput = throughput / survive
+        return color
 
-    def get_ray(self, i, j, s_i=0, s_j=0):
-        offset = self.sample_square_stratified(s_i, s_j)
+    def get_ray(self, i, j, s_i=None, s_j=None, sampler=None):
+        # Jitters over the whole pixel unless a stratum (s_i, s_j) is given; a
+        # sampler supplies the pixel offset, lens position and time instead.
+        if sampler is not None:
+            u, v = sampler.get_pixel_2d()
+            offset = Vec3(u - 0.5, v - 0.5, 0)
+        elif s_i is None:
+            offset = self.sample_square()
+        else:
+            offset = self.sample_square_stratified(s_i, s_j)
         pixel_sample = self.pixel00_loc + ((i + offset.x()) * self.pixel_delta_u) + ((j + offset.y()) * self.pixel_delta_v)
-        ray_origin = self.center if (self.defocus_angle <= 0) else self.defocus_disk_sample()
+        ray_origin = self.center if (self.defocus_angle <= 0) else self.defocus_disk_sample(sampler)
         ray_direction = pixel_sample - ray_origin
-        ray_time = random.random()
+        ray_time = random.random() if sampler is None else sampler.get_1d()
         return Ray(ray_origin, ray_direction, ray_time)
 
     def sample_square(self):
@@ -125,6 +405,20 @@ class Camera:
         py = ((s_j + random.random()) * self.recip_sqrt_spp) - 0.5
         return Vec3(px, py, 0)
 
-    def defocus_disk_sample(self):
-        p = Vec3.random_in_unit_disk()
-        return self.center + (p[0] * self.defocus_disk_u) + (p[1] * self.defocus_disk_v)
\ No newline at end of file
+    def defocus_disk_sample(self, sampler=None):
+        if sampler is None:
+            p = Vec3.random_in_unit_disk()
+            x, y = p[0], p[1]
+        else:
+            x, y = sample_unit_disk(*sampler.get_2d())
+        return self.center + (x * self.defocus_disk_u) + (y * self.defocus_disk_v)
+
+def surface_albedo(rec):
+    # Reflectance of the surface in a hit record: a texture's value, a fixed
+    # albedo, or white for materials with neither, like Dielectric.
+    mat = rec.mat
+    if hasattr(mat, "tex"):
+        return mat.tex.value(rec.u, rec.v, rec.p).xyz()
+    if hasattr(mat, "albedo"):
+        return mat.albedo.xyz()
+    return (1.0, 1.0, 1.0)
@@ -1,6 +1,6 @@
 import math
 import random
-from Hittable import Hittable, HitRecord
+from Hittable import DeferredHittable, HitRecord
 from Interval import Interval
 from Vec3 import Vec3, Point3
 from Ray import Ray
@@ -8,39 +8,42 @@ from Material import Material, Isotropic
 from Aabb import Aabb
 from Texture import Texture, SolidColor
 
-class ConstantMedium(Hittable):
+class ConstantMedium(DeferredHittable):
     def __init__(self, boundary, density, tex_or_color):
         self.boundary = boundary
         self.neg_inv_density = -1.0 / density
         self.phase_function = Isotropic(tex_or_color)
 
-    def hit(self, r: Ray, ray_t: Interval, rec: HitRecord) -> bool:
-        rec1 = HitRecord()
-        rec2 = HitRecord()
-        # Use an infinite interval for the boundary hits
-        if not self.boundary.hit(r, Interval.universe, rec1):
-            return False
-        if not self.boundary.hit(r, Interval(rec1.t + 0.0001, float('inf')), rec2):
-            return False
-        if rec1.t < ray_t.min:
-            rec1.t = ray_t.min
-        if rec2.t > ray_t.max:
-            rec2.t = ray_t.max
-        if rec1.t >= rec2.t:
-            return False
-        if rec1.t < 0:
-            rec1.t = 0
+    def intersect(self, r: Ray, ray_t: Interval):
+        # Only the boundary distances are needed, so the boundary is intersected without finalizing.
+        found1 = self.boundary.intersect(r, Interval.universe)
+        if found1 is None:
+            return None
+        found2 = self.boundary.intersect(r, Interval(found1[0] + 0.0001, float('inf')))
+        if found2 is None:
+            return None
+        t1, t2 = found1[0], found2[0]
+        if t1 < ray_t.min:
+            t1 = ray_t.min
+        if t2 > ray_t.max:
+            t2 = ray_t.max
+        if t1 >= t2:
+            return None
+        if t1 < 0:
+            t1 = 0
         ray_length = r.direction().length()
-        distance_inside_boundary = (rec2.t - rec1.t) * ray_length
+        distance_inside_boundary = (t2 - t1) * ray_length
         hit_distance = self.neg_inv_density * math.log(random.random())
         if hit_distance > distance_inside_boundary:
-            return False
-        rec.t = rec1.t + hit_distance / ray_length
-        rec.p = r.at(rec.t)
+            return None
+        return t1 + hit_distance / ray_length, self, None
+
+    def finalize(self, r: Ray, t: float, data, rec: HitRecord):
+        rec.t = t
+        rec.p = r.at(t)
         rec.normal = Vec3(1, 0, 0)  # arbitrary
         rec.front_face = True       # also arbitrary
         rec.mat = self.phase_function
-        return True
 
     def bounding_box(self):
         return self.boundary.bounding_box()
@@ -0,0 +1,75 @@
+import numpy as np
+from color import luminance
+
+# Edge-avoiding a-trous wavelet denoiser (Dammertz et al. 2010) for the float
+# framebuffer. The image is divided by the first-hit albedo so only lighting is
+# blurred, then filtered by a 5x5 B3-spline kernel whose taps spread out by a
+# factor of two each iteration. Every tap is weighted by how alike the two
+# pixels' normals, depths, albedos and current colors are, so the blur stops at
+# geometric and shading edges. NumPy only, and deterministic: the same inputs
+# always give the same output.
+
+kernel = np.array([1 / 16, 1 / 4, 3 / 8, 1 / 4, 1 / 16])
+
+def remove_fireflies(image, factor=4.0):
+    # Clamps each pixel's luminance to factor times the brightest of its
+    # 3x3 neighbors, so a single lucky path does not get smeared into a blob.
+    lum = luminance(image)
+    padded = np.pad(lum, 1, mode="edge")
+    height, width = lum.shape
+    neighbors = np.stack([padded[1 + dy:1 + dy + height, 1 + dx:1 + dx + width]
+                          for dy in (-1, 0, 1) for dx in (-1, 0, 1) if dy or dx])
+    limit = factor * neighbors.max(axis=0)
+    scale = np.where(lum > limit, limit / np.maximum(lum, 1e-300), 1.0)
+    return image * scale[..., None]
+
+def denoise(image, albedo, normal, depth, iterations=5, sigma_color=0.3, sigma_normal=64.0,
+            sigma_depth=0.05, sigma_albedo=0.1, firefly_factor=4.0):
+    """
+    Returns the denoised (height, width, 3) image. albedo and normal are
+    (height, width, 3) and depth is (height, width), as Camera.render_guides
+    gives them. sigma_color is the tolerance for color differences on a
+    tone-mapped scale, halved every iteration as the noise drops; sigma_normal
+    is the exponent on the normals' cosine; sigma_depth the relative depth
+    change allowed per pixel of distance; sigma_albedo the albedo tolerance.
+    firefly_factor=None leaves outliers alone.
+    """
+    image = np.asarray(image, dtype=np.float64)
+    albedo = np.clip(np.asarray(albedo, dtype=np.float64), 0.0, 1.0)
+    normal = np.asarray(normal, dtype=np.float64)
+    normal = normal / np.maximum(np.linalg.norm(normal, axis=-1, keepdims=True), 1e-12)
+    depth = np.asarray(depth, dtype=np.float64)
+    if firefly_factor is not None:
+        image = remove_fireflies(image, firefly_factor)
+    # Demodulate: filter irradiance, so texture and albedo edges stay sharp.
+    safe_albedo = np.maximum(albedo, 1e-3)
+    color = image / safe_albedo
+    height, width = depth.shape
+    for level in range(iterations):
+        step = 2 ** level
+        pad = 2 * step
+        tone = luminance(color)
+        tone = tone / (1.0 + tone)
+        padded = [np.pad(a, [(pad, pad), (pad, pad)] + [(0, 0)] * (a.ndim - 2), mode="edge")
+                  for a in (color, tone, normal, depth, albedo)]
+        inside = np.pad(np.ones((height, width)), pad)
+        sigma = sigma_color * 0.5 ** level
+        total = np.zeros_like(color)
+        weights = np.zeros((height, width))
+        for ky in range(5):
+            for kx in range(5):
+                dy, dx = (ky - 2) * step, (kx - 2) * step
+                window = (slice(pad + dy, pad + dy + height), slice(pad + dx, pad + dx + width))
+                q_color, q_tone, q_normal, q_depth, q_albedo = (a[window] for a in padded)
+                w = kernel[ky] * kernel[kx] * inside[window]
+                w = w * np.exp(-np.abs(q_tone - tone) / sigma)
+                cosine = np.maximum(np.einsum('ijk,ijk->ij', normal, q_normal), 0.0)
+                w = w * cosine ** sigma_normal
+                distance = max(np.hypot(dy, dx), 1.0)
+                w = w * np.exp(-np.abs(q_depth - depth) / (sigma_depth * distance * np.maximum(depth, 1e-8)))
+                w = w * np.exp(-np.sum((q_albedo - albedo) ** 2, axis=-1) / (sigma_albedo * sigma_albedo))
+                total += w[..., None] * q_color
+                weights += w
+        # A pixel whose taps all underflow (a zero normal, say) keeps its color.
+        color = (total + 1e-12 * color) / (weights + 1e-12)[..., None]
+    return color * safe_albedo
@@ -0,0 +1,303 @@
+import numpy as np
+from Hittable import DeferredHittable
+from Interval import Interval
+from Ray import Ray
+from Aabb import Aabb
+from Vec3 import Point3
+from BVH import BVHNode, BVHLeaf
+
+class FlatNodes:
+    """
+    BVH nodes in contiguous NumPy arrays, stored depth-first so the first child
+    of an interior node is always the next node; node_child holds the index of
+    the second child. Leaves (node_prim_count > 0) reference a run of primitives
+    owned by whoever built the nodes.
+    """
+    def __init__(self, node_min, node_max, node_child, node_prim_start, node_prim_count, node_axis):
+        self.node_min = np.asarray(node_min, dtype=np.float64)
+        self.node_max = np.asarray(node_max, dtype=np.float64)
+        self.node_child = np.asarray(node_child, dtype=np.int32)
+        self.node_prim_start = np.asarray(node_prim_start, dtype=np.int32)
+        self.node_prim_count = np.asarray(node_prim_count, dtype=np.int32)
+        self.node_axis = np.asarray(node_axis, dtype=np.int8)
+        self._nodes = self.node_list()
+
+    def node_list(self):
+        # Traversal reads plain Python lists; indexing NumPy arrays one element
+        # at a time is much slower than indexing a list.
+        return list(zip(self.node_min.tolist(), self.node_max.tolist(), self.node_child.tolist(),
+                        self.node_prim_start.tolist(), self.node_prim_count.tolist(),
+                        self.node_axis.tolist()))
+
+    def __getstate__(self):
+        # Only the arrays are pickled; the traversal list is rebuilt on load.
+        state = dict(self.__dict__)
+        del state["_nodes"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._nodes = self.node_list()
+
+    @classmethod
+    def build(cls, lo, hi, leaf_size=4):
+        """
+        Median-split build over per-primitive bounds lo, hi of shape (N, 3).
+        Returns (nodes, order): leaves index primitives in the permuted order.
+        """
+        lo = np.asarray(lo, dtype=np.float64)
+        hi = np.asarray(hi, dtype=np.float64)
+        centroids = 0.5 * (lo + hi)
+        order = np.arange(len(lo))
+        bmin, bmax, child, start, count, axis = [], [], [], [], [], []
+
+        def build_range(begin, end):
+            idx = order[begin:end]
+            box_lo = lo[idx].min(axis=0)
+            box_hi = hi[idx].max(axis=0)
+            # Same minimum thickness as Aabb.pad_to_minimums, so flat boxes still get hit.
+            thin = box_hi - box_lo < 0.0001
+            box_lo = np.where(thin, box_lo - 0.0001, box_lo)
+            box_hi = np.where(thin, box_hi + 0.0001, box_hi)
+            index = len(bmin)
+            bmin.append(box_lo)
+            bmax.append(box_hi)
+            child.append(-1)
+            start.append(begin)
+            count.append(0)
+            axis.append(0)
+            if end - begin <= leaf_size:
+                count[index] = end - begin
+                return
+            c = centroids[idx]
+            split = int(np.argmax(c.max(axis=0) - c.min(axis=0)))
+            mid = (begin + end) // 2
+            order[begin:end] = idx[np.argpartition(c[:, split], mid - begin)]
+            axis[index] = split
+            build_range(begin, mid)
+            child[index] = len(bmin)
+            build_range(mid, end)
+
+        build_range(0, len(lo))
+        return cls(bmin, bmax, child, start, count, axis), order
+
+    def node_count(self):
+        return len(self._nodes)
+
+    @staticmethod
+    def slab(node, ox, oy, oz, ix, iy, iz, nx, ny, nz, tmin, tmax):
+        # Entry distance into the node's box, or None on a miss. Same slab
+        # test as Aabb.hit: the direction signs pick the near and far planes.
+        lo, hi = node[0], node[1]
+        t0 = ((hi if nx else lo)[0] - ox) * ix
+        t1 = ((lo if nx else hi)[0] - ox) * ix
+        if t0 > tmin:
+            tmin = t0
+        if t1 < tmax:
+            tmax = t1
+        if tmax <= tmin:
+            return None
+        t0 = ((hi if ny else lo)[1] - oy) * iy
+        t1 = ((lo if ny else hi)[1] - oy) * iy
+        if t0 > tmin:
+            tmin = t0
+        if t1 < tmax:
+            tmax = t1
+        if tmax <= tmin:
+            return None
+        t0 = ((hi if nz else lo)[2] - oz) * iz
+        t1 = ((lo if nz else hi)[2] - oz) * iz
+        if t0 > tmin:
+            tmin = t0
+        if t1 < tmax:
+            tmax = t1
+        if tmax <= tmin:
+            return None
+        return tmin
+
+    def traverse(self, r: Ray, t_min, t_max, leaf_hit, any_hit=False):
+        """
+        Walks the nodes with an explicit stack, near child first, skipping any
+        node whose box entry lies beyond the closest hit so far. For every leaf
+        reached, leaf_hit(start, count, t_min, closest) must return the distance
+        of its closest hit, or None. Returns the closest distance found, or None.
+        With any_hit the walk stops at the first leaf that reports a hit.
+        """
+        ox, oy, oz = r.orig_xyz
+        ix, iy, iz = r.inv_dir
+        neg = r.dir_neg
+        nx, ny, nz = neg
+        nodes = self._nodes
+        slab = self.slab
+        closest = t_max
+        hit_anything = False
+
+        entry = slab(nodes[0], ox, oy, oz, ix, iy, iz, nx, ny, nz, t_min, closest)
+        if entry is None:
+            return None
+        stack = [(entry, 0)]
+        while stack:
+            entry, index = stack.pop()
+            # A hit found since this node was pushed may already be nearer than its box.
+            if entry >= closest:
+                continue
+            node = nodes[index]
+            if node[4]:
+                t = leaf_hit(node[3], node[4], t_min, closest)
+                if t is not None:
+                    if any_hit:
+                        return t
+                    hit_anything = True
+                    closest = t
+                continue
+            first, second = index + 1, node[2]
+            if neg[node[5]]:
+                first, second = second, first
+            t_first = slab(nodes[first], ox, oy, oz, ix, iy, iz, nx, ny, nz, t_min, closest)
+            t_second = slab(nodes[second], ox, oy, oz, ix, iy, iz, nx, ny, nz, t_min, closest)
+            # Push the far child first so the near child is visited first.
+            if t_second is not None:
+                stack.append((t_second, second))
+            if t_first is not None:
+                stack.append((t_first, first))
+        return closest if hit_anything else None
+
+class FlatBVH(DeferredHittable):
+    """
+    A built BVHNode tree compiled into FlatNodes and traversed iteratively.
+    Leaves reference a run of self.primitives.
+
+    Drop-in replacement for the tree it was built from:
+        world = FlatBVH(BVHNode(world.objects))
+    """
+    def __init__(self, bvh):
+        if not isinstance(bvh, BVHNode):
+            bvh = BVHNode(bvh)
+        self.primitives = []
+        bmin, bmax, child, start, count, axis = [], [], [], [], [], []
+
+        def add_node(box):
+            bmin.append((box.x.min, box.y.min, box.z.min))
+            bmax.append((box.x.max, box.y.max, box.z.max))
+            child.append(-1)
+            start.append(0)
+            count.append(0)
+            axis.append(0)
+            return len(bmin) - 1
+
+        def add_leaf(objs, box):
+            index = add_node(box)
+            start[index] = len(self.primitives)
+            count[index] = len(objs)
+            self.primitives.extend(objs)
+
+        def flatten(node):
+            if isinstance(node, BVHLeaf):
+                add_leaf(node.objects, node.bounding_box())
+            elif not isinstance(node, BVHNode):
+                add_leaf([node], node.bounding_box())
+            elif node.right is node.left:
+                flatten(node.left)
+            else:
+                index = add_node(node.bounding_box())
+                first, second = node.left, node.right
+                # Split axis: the axis along which the children's centers differ most.
+                lb, rb = first.bounding_box(), second.bounding_box()
+                gaps = [abs(rb.centroid(a) - lb.centroid(a)) for a in range(3)]
+                split = gaps.index(max(gaps))
+                if rb.centroid(split) < lb.centroid(split):
+                    first, second = second, first
+                axis[index] = split
+                flatten(first)
+                child[index] = len(bmin)
+                flatten(second)
+
+        flatten(bvh)
+        self.bbox = bvh.bounding_box()
+        self.nodes = FlatNodes(bmin, bmax, child, start, count, axis)
+
+    def bounding_box(self):
+        return self.bbox
+
+    def node_count(self):
+        return self.nodes.node_count()
+
+    def intersect(self, r: Ray, ray_t: Interval):
+        prims = self.primitives
+        best = [None]
+
+        def leaf_hit(start, count, t_min, closest):
+            t = None
+            for k in range(start, start + count):
+                found = prims[k].intersect(r, Interval(t_min, closest))
+                if found is not None:
+                    best[0] = found
+                    t = closest = found[0]
+            return t
+
+        if self.nodes.traverse(r, ray_t.min, ray_t.max, leaf_hit) is None:
+            return None
+        return best[0]
+
+    def occluded(self, r: Ray, t_max: float, t_min: float = 0.001) -> bool:
+        prims = self.primitives
+
+        def leaf_hit(start, count, t_min, closest):
+            for k in range(start, start + count):
+                if prims[k].occluded(r, closest, t_min):
+                    return closest
+            return None
+
+        return self.nodes.traverse(r, t_min, t_max, leaf_hit, any_hit=True) is not None
+
+class PrimitiveSet(DeferredHittable):
+    """
+    Base for hittables that store many primitives as NumPy arrays under their
+    own FlatNodes BVH, so each leaf is intersected in one vectorized test.
+    __init__ calls build_nodes with the per-primitive bounds and stores the
+    per-primitive arrays in the order it returns, which makes every leaf a
+    contiguous slice. Subclasses implement leaf_hit and finalize.
+    """
+    def build_nodes(self, lo, hi, leaf_size):
+        # Builds the BVH and bounding box over bounds lo, hi of shape (N, 3); returns the leaf order.
+        self.nodes, order = FlatNodes.build(lo, hi, leaf_size)
+        self.bbox = Aabb(a=Point3(*np.min(lo, axis=0)), b=Point3(*np.max(hi, axis=0)))
+        return order
+
+    def bounding_box(self):
+        return self.bbox
+
+    def leaf_hit(self, o, d, start, end, t_min, t_max):
+        """
+        Tests primitives start:end against the ray with origin o and direction
+        d (NumPy arrays). Returns (t, data) for the closest hit between t_min
+        and t_max, where data is what finalize needs, or None.
+        """
+        raise NotImplementedError("PrimitiveSet.leaf_hit() must be implemented by subclasses.")
+
+    def trace(self, r: Ray, t_min, t_max, any_hit=False):
+        # Returns (t, data) for the closest hit, or for any hit with any_hit; None on a miss.
+        o = np.array(r.orig_xyz)
+        d = np.array(r.dir.xyz())
+        best = [None]
+
+        def leaf_hit(start, count, t_min, closest):
+            found = self.leaf_hit(o, d, start, start + count, t_min, closest)
+            if found is None:
+                return None
+            best[0] = found[1]
+            return found[0]
+
+        t = self.nodes.traverse(r, t_min, t_max, leaf_hit, any_hit)
+        if t is None:
+            return None
+        return t, best[0]
+
+    def intersect(self, r: Ray, ray_t: Interval):
+        found = self.trace(r, ray_t.min, ray_t.max)
+        if found is None:
+            return None
+        return found[0], self, found[1]
+
+    def occluded(self, r: Ray, t_max: float, t_min: float = 0.001) -> bool:
+        return self.trace(r, t_min, t_max, any_hit=True) is not None
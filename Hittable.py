@@ -1,4 +1,5 @@
 import math
+import numpy as np
 from abc import ABC, abstractmethod
 from Vec3 import Point3, Vec3
 from Ray import Ray
@@ -34,16 +35,67 @@ class Hittable(ABC):
     def bounding_box(self) -> Optional[Aabb]:
         return None
 
+    def intersect(self, r: Ray, ray_t: Interval):
+        """
+        First phase of a hit test: returns (t, primitive, data) for the closest
+        hit inside ray_t, or None. Only t is final; primitive.finalize(r, t,
+        data, rec) fills in the rest of the record once the closest hit of the
+        whole scene is known. This default adapts a one-phase hit(): the full
+        record it computes is passed along as data.
+        """
+        rec = HitRecord()
+        if not self.hit(r, ray_t, rec):
+            return None
+        return rec.t, self, rec
+
+    def occluded(self, r: Ray, t_max: float, t_min: float = 0.001) -> bool:
+        """
+        Any-hit query: whether anything lies along r between t_min and t_max.
+        Aggregates return on the first hit they find instead of searching for
+        the closest one, and no hit record is filled.
+        """
+        return self.intersect(r, Interval(t_min, t_max)) is not None
+
+    def finalize(self, r: Ray, t: float, data, rec: HitRecord):
+        # Second phase for the hit() adapter: copy the record hit() computed.
+        rec.t = data.t
+        rec.p = data.p
+        rec.normal = data.normal
+        rec.front_face = data.front_face
+        rec.mat = data.mat
+        rec.u = data.u
+        rec.v = data.v
+
     def pdf_value(self, origin: Point3, direction: Vec3) -> float:
         # Default implementation returns 0.0
         return 0.0
 
-    def random(self, origin: Point3) -> Vec3:
-        # Default implementation returns Vec3(1,0,0)
+    def random(self, origin: Point3, sampler=None) -> Vec3:
+        # Default implementation returns Vec3(1,0,0). Implementations draw from
+        # sampler when one is given, and from the global generators otherwise.
         return Vec3(1, 0, 0)
 
+class DeferredHittable(Hittable):
+    """
+    Base for hittables that implement the two-phase intersect()/finalize()
+    API natively. hit() is then one intersect() followed by a single
+    finalize(), so point, normal, texture coordinates and material are only
+    computed for the closest hit, not for every candidate along the ray.
+    """
+    def hit(self, r: Ray, ray_t: Interval, rec: HitRecord) -> bool:
+        found = self.intersect(r, ray_t)
+        if found is None:
+            return False
+        t, prim, data = found
+        prim.finalize(r, t, data, rec)
+        return True
+
+    @abstractmethod
+    def intersect(self, r: Ray, ray_t: Interval):
+        pass
+
 # Translate wrapper for hittable objects
-class Translate(Hittable):
+class Translate(DeferredHittable):
     def __init__(self, obj, offset):
         self.object = obj  # Hittable
         self.offset = offset  # Vec3
@@ -53,20 +105,28 @@ class Translate(Hittable):
         else:
             self.bbox = None
 
-    def hit(self, r: Ray, ray_t: Interval, rec: HitRecord) -> bool:
+    def intersect(self, r: Ray, ray_t: Interval):
         # Move the ray backwards by the offset
         offset_r = Ray(r.origin() - self.offset, r.direction(), r.time())
         # Determine whether an intersection exists along the offset ray (and if so, where)
-        if not self.object.hit(offset_r, ray_t, rec):
-            return False
+        found = self.object.intersect(offset_r, ray_t)
+        if found is None:
+            return None
+        return found[0], self, (offset_r, found)
+
+    def occluded(self, r: Ray, t_max: float, t_min: float = 0.001) -> bool:
+        return self.object.occluded(Ray(r.origin() - self.offset, r.direction(), r.time()), t_max, t_min)
+
+    def finalize(self, r: Ray, t: float, data, rec: HitRecord):
+        offset_r, (t, prim, prim_data) = data
+        prim.finalize(offset_r, t, prim_data, rec)
         # Move the intersection point forwards by the offset
-        rec.p += self.offset
-        return True
+        rec.p = rec.p + self.offset
 
     def bounding_box(self):
         return self.bbox
     
-class RotateY(Hittable):
+class RotateY(DeferredHittable):
     def __init__(self, obj, angle_degrees):
         self.object = obj  # Hittable
         radians = math.radians(angle_degrees)
@@ -94,7 +154,7 @@ class RotateY(Hittable):
         else:
             self.bbox = None
 
-    def hit(self, r: Ray, ray_t: Interval, rec: HitRecord) -> bool:
+    def to_object(self, r: Ray) -> Ray:
         # Transform the ray from world space to object space
         origin = Point3(
             self.cos_theta * r.origin().x() - self.sin_theta * r.origin().z(),
@@ -106,10 +166,22 @@ class RotateY(Hittable):
             r.direction().y(),
             self.sin_theta * r.direction().x() + self.cos_theta * r.direction().z()
         )
-        rotated_r = Ray(origin, direction, r.time())
+        return Ray(origin, direction, r.time())
+
+    def occluded(self, r: Ray, t_max: float, t_min: float = 0.001) -> bool:
+        return self.object.occluded(self.to_object(r), t_max, t_min)
+
+    def intersect(self, r: Ray, ray_t: Interval):
+        rotated_r = self.to_object(r)
         # Determine whether an intersection exists in object space (and if so, where)
-        if not self.object.hit(rotated_r, ray_t, rec):
-            return False
+        found = self.object.intersect(rotated_r, ray_t)
+        if found is None:
+            return None
+        return found[0], self, (rotated_r, found)
+
+    def finalize(self, r: Ray, t: float, data, rec: HitRecord):
+        rotated_r, (t, prim, prim_data) = data
+        prim.finalize(rotated_r, t, prim_data, rec)
         # Transform the intersection from object space back to world space
         p = rec.p
         rec.p = Point3(
@@ -123,7 +195,131 @@ class RotateY(Hittable):
             n.y(),
             -self.sin_theta * n.x() + self.cos_theta * n.z()
         )
-        return True
 
     def bounding_box(self):
-        return self.bbox
\ No newline at end of file
+        return self.bbox
+
+class Instance(DeferredHittable):
+    """
+    An object placed in the world by one affine transform (rotation, scale,
+    translation, in any combination). The matrix maps object space to world
+    space; rays are moved into object space with its inverse, and normals back
+    out with the inverse transpose. The object itself is only referenced, so
+    many instances can share one BVH:
+
+        world.add(Instance(cluster).rotate_y(15).translate(Vec3(-100, 270, 395)))
+
+    Wrapping another Instance, Translate or RotateY folds it into this one, so
+    a chain of wrappers costs a single transform per ray.
+    """
+    def __init__(self, obj, matrix=None):
+        matrix = np.eye(4) if matrix is None else np.asarray(matrix, dtype=np.float64)
+        while isinstance(obj, (Instance, Translate, RotateY)):
+            matrix = matrix @ Instance.matrix_of(obj)
+            obj = obj.object
+        self.object = obj  # Hittable
+        self.matrix = matrix
+        self.inverse = np.linalg.inv(matrix)
+        # Plain float rows for the per-ray transforms.
+        self._m = matrix[:3].tolist()
+        self._inv = self.inverse[:3].tolist()
+        self._normal = self.inverse[:3, :3].T.tolist()
+        linear = matrix[:3, :3]
+        self._rigid = np.allclose(linear.T @ linear, np.eye(3))
+        bbox = obj.bounding_box()
+        if bbox is not None:
+            corners = np.array([[x, y, z, 1.0] for x in (bbox.x.min, bbox.x.max)
+                                for y in (bbox.y.min, bbox.y.max) for z in (bbox.z.min, bbox.z.max)])
+            world = corners @ matrix[:3].T
+            self.bbox = Aabb(a=Point3(*world.min(axis=0)), b=Point3(*world.max(axis=0)))
+        else:
+            self.bbox = None
+
+    @staticmethod
+    def matrix_of(obj):
+        # Object-to-world matrix of a transform wrapper.
+        if isinstance(obj, Instance):
+            return obj.matrix
+        m = np.eye(4)
+        if isinstance(obj, Translate):
+            m[:3, 3] = [obj.offset.x(), obj.offset.y(), obj.offset.z()]
+        else:
+            m[0, 0], m[0, 2] = obj.cos_theta, obj.sin_theta
+            m[2, 0], m[2, 2] = -obj.sin_theta, obj.cos_theta
+        return m
+
+    def transformed(self, m):
+        # A new Instance with m applied after this one's transform.
+        return Instance(self.object, np.asarray(m) @ self.matrix)
+
+    def translate(self, offset):
+        m = np.eye(4)
+        m[:3, 3] = [offset.x(), offset.y(), offset.z()]
+        return self.transformed(m)
+
+    def rotate(self, axis, angle_degrees):
+        # Rotation about an axis through the origin (right-handed, like RotateY).
+        x, y, z = Vec3.unit_vector(axis).e.tolist()
+        radians = math.radians(angle_degrees)
+        c, s = math.cos(radians), math.sin(radians)
+        k = np.array([[0.0, -z, y], [z, 0.0, -x], [-y, x, 0.0]])
+        m = np.eye(4)
+        m[:3, :3] = np.eye(3) + s * k + (1 - c) * (k @ k)
+        return self.transformed(m)
+
+    def rotate_x(self, angle_degrees):
+        return self.rotate(Vec3(1, 0, 0), angle_degrees)
+
+    def rotate_y(self, angle_degrees):
+        return self.rotate(Vec3(0, 1, 0), angle_degrees)
+
+    def rotate_z(self, angle_degrees):
+        return self.rotate(Vec3(0, 0, 1), angle_degrees)
+
+    def scale(self, sx, sy=None, sz=None):
+        sy = sx if sy is None else sy
+        sz = sx if sz is None else sz
+        return self.transformed(np.diag([sx, sy, sz, 1.0]))
+
+    def to_object(self, r: Ray) -> Ray:
+        # Transform the ray from world space to object space
+        ox, oy, oz = r.orig_xyz
+        dx, dy, dz = r.dir.xyz()
+        a, b, c = self._inv
+        origin = Point3(a[0] * ox + a[1] * oy + a[2] * oz + a[3],
+                        b[0] * ox + b[1] * oy + b[2] * oz + b[3],
+                        c[0] * ox + c[1] * oy + c[2] * oz + c[3])
+        direction = Vec3(a[0] * dx + a[1] * dy + a[2] * dz,
+                         b[0] * dx + b[1] * dy + b[2] * dz,
+                         c[0] * dx + c[1] * dy + c[2] * dz)
+        # The direction is not renormalized, so t means the same in both spaces.
+        return Ray(origin, direction, r.time())
+
+    def occluded(self, r: Ray, t_max: float, t_min: float = 0.001) -> bool:
+        return self.object.occluded(self.to_object(r), t_max, t_min)
+
+    def intersect(self, r: Ray, ray_t: Interval):
+        object_r = self.to_object(r)
+        found = self.object.intersect(object_r, ray_t)
+        if found is None:
+            return None
+        return found[0], self, (object_r, found)
+
+    def finalize(self, r: Ray, t: float, data, rec: HitRecord):
+        object_r, (t, prim, prim_data) = data
+        prim.finalize(object_r, t, prim_data, rec)
+        # Transform the intersection from object space back to world space
+        px, py, pz = float(rec.p[0]), float(rec.p[1]), float(rec.p[2])
+        a, b, c = self._m
+        rec.p = Point3(a[0] * px + a[1] * py + a[2] * pz + a[3],
+                       b[0] * px + b[1] * py + b[2] * pz + b[3],
+                       c[0] * px + c[1] * py + c[2] * pz + c[3])
+        nx, ny, nz = float(rec.normal[0]), float(rec.normal[1]), float(rec.normal[2])
+        a, b, c = self._normal
+        normal = Vec3(a[0] * nx + a[1] * ny + a[2] * nz,
+                      b[0] * nx + b[1] * ny + b[2] * nz,
+                      c[0] * nx + c[1] * ny + c[2] * nz)
+        rec.normal = normal if self._rigid else Vec3.unit_vector(normal)
+
+    def bounding_box(self):
+        return self.bbox
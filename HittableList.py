@@ -1,10 +1,10 @@
 from Vec3 import Vec3
-from Hittable import Hittable, HitRecord
+from Hittable import DeferredHittable, HitRecord
 from Ray import Ray
 from Interval import Interval
 from Aabb import Aabb
 
-class HittableList(Hittable):
+class HittableList(DeferredHittable):
     def __init__(self, object=None):
         self.objects = []
         self.bbox = None
@@ -26,23 +26,22 @@ class HittableList(Hittable):
     def bounding_box(self):
         return self.bbox
 
-    def hit(self, r: Ray, ray_t: Interval, rec: HitRecord) -> bool:
-        temp_rec = HitRecord()
-        hit_anything = False
+    def intersect(self, r: Ray, ray_t: Interval):
+        closest = None
         closest_so_far = ray_t.max
         for obj in self.objects:
-            if obj.hit(r, Interval(ray_t.min, closest_so_far), temp_rec):
-                hit_anything = True
-                closest_so_far = temp_rec.t
-                rec.t = temp_rec.t
-                rec.p = temp_rec.p
-                rec.normal = temp_rec.normal
-                rec.front_face = temp_rec.front_face
-                rec.mat = temp_rec.mat
-                rec.u = temp_rec.u
-                rec.v = temp_rec.v
-        return hit_anything
+            found = obj.intersect(r, Interval(ray_t.min, closest_so_far))
+            if found is not None:
+                closest = found
+                closest_so_far = found[0]
+        return closest
     
+    def occluded(self, r: Ray, t_max: float, t_min: float = 0.001) -> bool:
+        for obj in self.objects:
+            if obj.occluded(r, t_max, t_min):
+                return True
+        return False
+
     def pdf_value(self, origin, direction):
         if not self.objects:
             return 0.0
@@ -52,9 +51,12 @@ class HittableList(Hittable):
             total += weight * obj.pdf_value(origin, direction)
         return total
 
-    def random(self, origin):
+    def random(self, origin, sampler=None):
         if not self.objects:
             return Vec3(1, 0, 0)
-        import random
-        idx = random.randint(0, len(self.objects) - 1)
-        return self.objects[idx].random(origin)
\ No newline at end of file
+        if sampler is None:
+            import random
+            idx = random.randint(0, len(self.objects) - 1)
+        else:
+            idx = min(int(sampler.get_1d() * len(self.objects)), len(self.objects) - 1)
+        return self.objects[idx].random(origin, sampler)
\ No newline at end of file
@@ -0,0 +1,75 @@
+import os
+import numpy as np
+from color import framebuffer_to_bytes
+
+# Writers take a (height, width, 3) array of linear float colors. The 8-bit
+# formats apply gamma and clamping through color.framebuffer_to_bytes; the HDR
+# formats store the linear values as float32.
+
+def write_p3(file, framebuffer):
+    pixels = framebuffer_to_bytes(framebuffer)
+    height, width, _ = pixels.shape
+    body = "\n".join(f"{r} {g} {b}" for r, g, b in pixels.reshape(-1, 3).tolist())
+    file.write(f"P3\n{width} {height}\n255\n{body}\n")
+
+def write_p6(file, framebuffer):
+    pixels = framebuffer_to_bytes(framebuffer)
+    height, width, _ = pixels.shape
+    file.write(f"P6\n{width} {height}\n255\n".encode("ascii"))
+    file.write(pixels.tobytes())
+
+def write_png(file, framebuffer):
+    from PIL import Image
+    Image.fromarray(framebuffer_to_bytes(framebuffer), "RGB").save(file, format="PNG")
+
+def write_pfm(file, framebuffer):
+    data = np.asarray(framebuffer, dtype="<f4")
+    height, width, _ = data.shape
+    # Negative scale marks little-endian data; PFM rows run bottom to top.
+    file.write(f"PF\n{width} {height}\n-1.0\n".encode("ascii"))
+    file.write(np.ascontiguousarray(data[::-1]).tobytes())
+
+def write_npy(file, framebuffer):
+    np.save(file, np.asarray(framebuffer, dtype=np.float32))
+
+writers = {
+    "p3": (write_p3, False),
+    "p6": (write_p6, True),
+    "png": (write_png, True),
+    "pfm": (write_pfm, True),
+    "npy": (write_npy, True),
+}
+
+extensions = {".ppm": "p6", ".png": "png", ".pfm": "pfm", ".npy": "npy"}
+
+def format_for(target, fmt=None):
+    if fmt is not None:
+        if fmt not in writers:
+            raise ValueError(f"Unknown image format '{fmt}', expected one of {', '.join(writers)}.")
+        return fmt
+    if isinstance(target, (str, os.PathLike)):
+        ext = os.path.splitext(os.fspath(target))[1].lower()
+        if ext not in extensions:
+            raise ValueError(f"Cannot infer image format from '{target}'.")
+        return extensions[ext]
+    # Open text files keep the original P3 output, binary files get P6.
+    return "p6" if "b" in getattr(target, "mode", "") else "p3"
+
+def write_image(target, framebuffer, fmt=None):
+    """
+    Writes a linear float framebuffer to target, which is either a filename or
+    an open file. The format is fmt, or inferred from the file extension or
+    file mode.
+    """
+    fmt = format_for(target, fmt)
+    writer, binary = writers[fmt]
+    if isinstance(target, (str, os.PathLike)):
+        with open(target, "wb" if binary else "w") as file:
+            writer(file, framebuffer)
+    elif binary and "b" not in getattr(target, "mode", "b"):
+        # Binary format requested through a text file: write to its byte stream.
+        target.flush()
+        writer(target.buffer, framebuffer)
+        target.buffer.flush()
+    else:
+        writer(target, framebuffer)
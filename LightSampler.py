@@ -0,0 +1,192 @@
+import math
+import random
+import numpy as np
+from Vec3 import Vec3, Point3
+from Ray import Ray
+from Material import DiffuseLight
+from Sphere import Sphere
+from Quad import Quad
+from QuadSet import QuadSet
+from HittableList import HittableList
+from BVH import BVHNode
+from FlatBVH import FlatNodes, FlatBVH
+from color import luminance
+
+def light_area(obj):
+    # Surface area of a light's geometry, or None for shapes it is not known for.
+    if isinstance(obj, Quad):
+        return obj.area
+    if isinstance(obj, Sphere):
+        return 4 * math.pi * obj.radius * obj.radius
+    return None
+
+def quad_key(Q, u, v):
+    # A quad's corners, rounded and sorted, so a light matches its emitter in
+    # the world however either one is parameterized.
+    corners = [Q + a * u + b * v for a in (0, 1) for b in (0, 1)]
+    return "quad", tuple(sorted(tuple(round(float(x), 6) for x in c) for c in corners))
+
+def shape_key(obj):
+    if isinstance(obj, Quad):
+        return quad_key(np.array(obj.Q.xyz()), np.array(obj.u.xyz()), np.array(obj.v.xyz()))
+    if isinstance(obj, Sphere):
+        values = obj.center1.xyz() + obj.center_vec.xyz() + (obj.radius,)
+        return "sphere", tuple(round(float(x), 6) for x in values)
+    return None
+
+def world_emitters(world):
+    """
+    The DiffuseLight materials of the Quads, Spheres and QuadSet quads in
+    world, keyed by shape_key, looking through BVHNode, FlatBVH and
+    HittableList. Lights lists usually repeat emitters with EmptyMaterial, and
+    this is where their emission is found.
+    """
+    emitters = {}
+    stack = [world]
+    while stack:
+        obj = stack.pop()
+        if isinstance(obj, BVHNode):
+            stack.extend([obj.left] if obj.right is obj.left else [obj.left, obj.right])
+        elif isinstance(obj, HittableList):
+            stack.extend(obj.objects)
+        elif isinstance(obj, FlatBVH):
+            stack.extend(obj.primitives)
+        elif isinstance(obj, QuadSet):
+            for k, index in enumerate(obj.material_index.tolist()):
+                if isinstance(obj.materials[index], DiffuseLight):
+                    emitters[quad_key(obj.Q[k], obj.u[k], obj.v[k])] = obj.materials[index]
+        elif isinstance(getattr(obj, "mat", None), DiffuseLight) and shape_key(obj) is not None:
+            emitters[shape_key(obj)] = obj.mat
+    return emitters
+
+def emission(mat, center):
+    # Luminance of a DiffuseLight, taken at the middle of its texture.
+    return float(luminance(np.array(mat.tex.value(0.5, 0.5, center).xyz())))
+
+def light_power(obj, emitters=None):
+    """
+    Emitted power of a light up to a constant: area times the luminance of its
+    DiffuseLight emission. Lights without one (EmptyMaterial, as lights lists
+    usually hold) take the emission of the matching shape in emitters, from
+    world_emitters. None when no emission is found or the area is not known.
+    """
+    emitters = emitters or {}
+    if isinstance(obj, QuadSet):
+        total = None
+        for k, index in enumerate(obj.material_index.tolist()):
+            mat = obj.materials[index]
+            if not isinstance(mat, DiffuseLight):
+                mat = emitters.get(quad_key(obj.Q[k], obj.u[k], obj.v[k]))
+            if isinstance(mat, DiffuseLight):
+                center = Point3(*(obj.Q[k] + (obj.u[k] + obj.v[k]) / 2).tolist())
+                total = (total or 0.0) + float(obj.area[k]) * emission(mat, center)
+        return total
+    mat = getattr(obj, "mat", None)
+    if not isinstance(mat, DiffuseLight):
+        mat = emitters.get(shape_key(obj))
+    area = light_area(obj)
+    if not isinstance(mat, DiffuseLight) or area is None:
+        return None
+    box = obj.bounding_box()
+    center = Point3(box.x.min + box.x.size() / 2, box.y.min + box.y.size() / 2, box.z.min + box.z.size() / 2)
+    return area * emission(mat, center)
+
+def alias_table(weights):
+    """
+    Vose's alias method: returns (prob, alias) so that picking a column k
+    uniformly and keeping it with probability prob[k], else taking alias[k],
+    selects each index with probability proportional to its weight.
+    """
+    count = len(weights)
+    total = sum(weights)
+    scaled = [w * count / total for w in weights]
+    prob = [1.0] * count
+    alias = list(range(count))
+    small = [k for k, p in enumerate(scaled) if p < 1.0]
+    large = [k for k, p in enumerate(scaled) if p >= 1.0]
+    while small and large:
+        s, l = small.pop(), large.pop()
+        prob[s] = scaled[s]
+        alias[s] = l
+        scaled[l] -= 1.0 - scaled[s]
+        (small if scaled[l] < 1.0 else large).append(l)
+    # Whatever is left is 1 up to rounding.
+    return prob, alias
+
+class LightSampler:
+    """
+    Light selection for the integrators, built once per render: picks a light
+    with probability proportional to its emitted power times area from an
+    alias table (O(1) per sample), and evaluates the selection pdf through a
+    BVH over the lights, so only lights whose bounds the direction crosses are
+    tested. Stands in for the lights HittableList:
+
+        lights = LightSampler(lights.objects, world=world)
+        lights = LightSampler(lights.objects, powers=[1.0, 4.0])
+
+    Powers come from the lights' own DiffuseLight materials or, given world,
+    from the emitters there with the same shape. Lights with no emission (a
+    glass sphere sampled for its caustics, say) get the mean power of the
+    others. A ValueError is raised when no light's power is known, since the
+    selection would silently be uniform.
+    """
+    def __init__(self, objects, powers=None, leaf_size=2, world=None):
+        self.objects = list(objects)
+        if not self.objects:
+            raise ValueError("LightSampler needs at least one light.")
+        if powers is None:
+            emitters = world_emitters(world) if world is not None else None
+            powers = [light_power(obj, emitters) for obj in self.objects]
+            if all(p is None for p in powers):
+                raise ValueError("No light has a known power; give the lights a DiffuseLight material, "
+                                 "pass the world they emit in, or pass powers.")
+        known = [p for p in powers if p is not None]
+        fill = float(sum(known)) / len(known) if known and sum(known) > 0 else 1.0
+        powers = [fill if p is None else max(float(p), 0.0) for p in powers]
+        if sum(powers) <= 0:
+            powers = [1.0] * len(powers)
+        total = sum(powers)
+        self.probability = [p / total for p in powers]
+        self.prob, self.alias = alias_table(powers)
+
+        boxes = [obj.bounding_box() for obj in self.objects]
+        bounded = [k for k, box in enumerate(boxes) if box is not None]
+        # Lights without bounds are tested on every pdf evaluation.
+        self.unbounded = [k for k, box in enumerate(boxes) if box is None]
+        self.nodes = None
+        if bounded:
+            boxes = [boxes[k] for k in bounded]
+            lo = [(b.x.min, b.y.min, b.z.min) for b in boxes]
+            hi = [(b.x.max, b.y.max, b.z.max) for b in boxes]
+            self.nodes, order = FlatNodes.build(lo, hi, leaf_size)
+            self.node_lights = [bounded[k] for k in order.tolist()]
+
+    def pick(self, u):
+        # One uniform number picks the column and, with its fraction, the coin flip.
+        scaled = u * len(self.prob)
+        k = min(int(scaled), len(self.prob) - 1)
+        return k if scaled - k < self.prob[k] else self.alias[k]
+
+    def pdf_value(self, origin: Point3, direction: Vec3) -> float:
+        objects = self.objects
+        probability = self.probability
+        total = 0.0
+        for k in self.unbounded:
+            total += probability[k] * objects[k].pdf_value(origin, direction)
+        if self.nodes is not None:
+            lights = self.node_lights
+            sums = [total]
+
+            def leaf_hit(start, count, t_min, closest):
+                for k in lights[start:start + count]:
+                    sums[0] += probability[k] * objects[k].pdf_value(origin, direction)
+                # No distance is reported, so every light box along the ray is visited.
+                return None
+
+            self.nodes.traverse(Ray(origin, direction), 0.001, float('inf'), leaf_hit)
+            total = sums[0]
+        return total
+
+    def random(self, origin: Point3, sampler=None) -> Vec3:
+        u = random.random() if sampler is None else sampler.get_1d()
+        return self.objects[self.pick(u)].random(origin, sampler)
@@ -6,6 +6,7 @@ import math
 import random
 from typing import Tuple, Optional
 from Pdf import Pdf
+from Sampler import sample_unit_sphere
 
 class ScatterRecord:
     def __init__(self):
@@ -15,8 +16,8 @@ class ScatterRecord:
         self.skip_pdf_ray: Optional[Ray] = None  # Should be an instance of Ray
 
 class Material:
-    def scatter(self, ray_in, hit_record, srec: ScatterRecord) -> bool:
-        # By default, materials do not scatter
+    def scatter(self, ray_in, hit_record, srec: ScatterRecord, sampler=None) -> bool:
+        # By default, materials do not scatter. Random choices draw from sampler when one is given.
         return False
 
     def emitted(self, ray_in, hit_record, u, v, p):
@@ -34,7 +35,7 @@ class Lambertian(Material):
         else:
             self.tex = SolidColor(albedo_or_texture)
 
-    def scatter(self, ray_in, hit_record, srec: ScatterRecord) -> bool:
+    def scatter(self, ray_in, hit_record, srec: ScatterRecord, sampler=None) -> bool:
         from Pdf import CosinePdf
         srec.attenuation = self.tex.value(hit_record.u, hit_record.v, hit_record.p)
         srec.pdf_ptr = CosinePdf(hit_record.normal)
@@ -51,9 +52,10 @@ class Metal(Material):
         self.albedo = albedo
         self.fuzz = fuzz if fuzz < 1 else 1
 
-    def scatter(self, ray_in, hit_record, srec: ScatterRecord) -> bool:
+    def scatter(self, ray_in, hit_record, srec: ScatterRecord, sampler=None) -> bool:
         reflected = Vec3.reflect(ray_in.direction(), hit_record.normal)
-        reflected = Vec3.unit_vector(reflected) + (self.fuzz * Vec3.random_unit_vector())
+        fuzz = Vec3.random_unit_vector() if sampler is None else sample_unit_sphere(*sampler.get_2d())
+        reflected = Vec3.unit_vector(reflected) + (self.fuzz * fuzz)
         srec.attenuation = self.albedo
         srec.pdf_ptr = None
         srec.skip_pdf = True
@@ -64,7 +66,7 @@ class Dielectric(Material):
     def __init__(self, refraction_index):
         self.refraction_index = refraction_index
 
-    def scatter(self, ray_in, hit_record, srec: ScatterRecord) -> bool:
+    def scatter(self, ray_in, hit_record, srec: ScatterRecord, sampler=None) -> bool:
         srec.attenuation = Color(1.0, 1.0, 1.0)
         srec.pdf_ptr = None
         srec.skip_pdf = True
@@ -73,7 +75,8 @@ class Dielectric(Material):
         cos_theta = min(Vec3.dot(-unit_direction, hit_record.normal), 1.0)
         sin_theta = math.sqrt(1.0 - cos_theta * cos_theta)
         cannot_refract = ri * sin_theta > 1.0
-        if cannot_refract or self.reflectance(cos_theta, ri) > random.random():
+        u = random.random() if sampler is None else sampler.get_1d()
+        if cannot_refract or self.reflectance(cos_theta, ri) > u:
             direction = Vec3.reflect(unit_direction, hit_record.normal)
         else:
             direction = Vec3.refract(unit_direction, hit_record.normal, ri)
@@ -104,7 +107,7 @@ class Isotropic(Material):
         else:
             self.tex = SolidColor(tex_or_color)
 
-    def scatter(self, ray_in, hit_record, srec: ScatterRecord) -> bool:
+    def scatter(self, ray_in, hit_record, srec: ScatterRecord, sampler=None) -> bool:
         from Pdf import SpherePdf
         srec.attenuation = self.tex.value(hit_record.u, hit_record.v, hit_record.p)
         srec.pdf_ptr = SpherePdf()
@@ -116,5 +119,5 @@ class Isotropic(Material):
         return 1.0 / (4.0 * math.pi)
     
 class EmptyMaterial(Material):
-    def scatter(self, ray_in, hit_record, srec):
+    def scatter(self, ray_in, hit_record, srec, sampler=None):
         return False
\ No newline at end of file
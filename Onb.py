@@ -24,4 +24,13 @@ class Onb:
 
     def transform(self, v: Vec3) -> Vec3:
         # Transform from basis coordinates to local space.
-        return (v.x() * self.u()) + (v.y() * self.v()) + (v.z() * self.w())
\ No newline at end of file
+        return (v.x() * self.u()) + (v.y() * self.v()) + (v.z() * self.w())
+
+    @staticmethod
+    def local_to_world(n: Vec3, x: float, y: float, z: float) -> Vec3:
+        # Same as Onb(n).transform(Vec3(x, y, z)) without building the basis object.
+        w = Vec3.unit_vector(n)
+        a = Vec3(0, 1, 0) if abs(w.x()) > 0.9 else Vec3(1, 0, 0)
+        v = Vec3.unit_vector(Vec3.cross(w, a))
+        u = Vec3.cross(w, v)
+        return (x * u) + (y * v) + (z * w)
@@ -0,0 +1,135 @@
+import os
+import random
+import datetime
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+# Scene handed to each worker process once by the pool initializer, so the
+# world and lights are pickled per worker instead of per tile.
+_worker_scene = None
+
+def _init_worker(cam, world, lights):
+    global _worker_scene
+    _worker_scene = (cam, world, lights)
+
+def _render_tile_in_worker(tile, seed, samples, pass_index, first_sample):
+    cam, world, lights = _worker_scene
+    # Path statistics are counted per tile and summed by the parent process.
+    cam.path_stats = {"paths": 0, "rays": 0}
+    pixels = render_tile_seeded(cam, world, lights, tile, seed, samples, pass_index, first_sample)
+    return tile, pixels, cam.path_stats
+
+def make_tiles(width, height, tile_size):
+    # Returns (index, x0, y0, x1, y1) for each tile, in scanline order.
+    tiles = []
+    for y0 in range(0, height, tile_size):
+        for x0 in range(0, width, tile_size):
+            x1 = min(x0 + tile_size, width)
+            y1 = min(y0 + tile_size, height)
+            tiles.append((len(tiles), x0, y0, x1, y1))
+    return tiles
+
+def seed_tile(seed, index, pass_index=0):
+    # Every tile gets its own random stream derived from (seed, pass, tile index),
+    # so a tile renders the same no matter which process picks it up.
+    state = np.random.SeedSequence([seed, pass_index, index]).generate_state(1)[0]
+    random.seed(int(state))
+    np.random.seed(int(state))
+
+def render_tile_seeded(cam, world, lights, tile, seed, samples=None, pass_index=0, first_sample=0):
+    index, x0, y0, x1, y1 = tile
+    seed_tile(seed, index, pass_index)
+    return cam.render_tile(world, lights, x0, y0, x1, y1, samples, first_sample)
+
+def tile_samples(samples, tile):
+    # Per-tile slice of a per-pixel sample count array; None if the tile has nothing to do.
+    if samples is None or isinstance(samples, int):
+        return samples
+    _, x0, y0, x1, y1 = tile
+    counts = samples[y0:y1, x0:x1]
+    return counts if counts.any() else None
+
+def tile_first_sample(first_sample, tile):
+    # Per-tile slice of a per-pixel first sample index array.
+    if isinstance(first_sample, int):
+        return first_sample
+    _, x0, y0, x1, y1 = tile
+    return first_sample[y0:y1, x0:x1]
+
+def worker_count(workers):
+    if workers is None or workers <= 0:
+        return os.cpu_count() or 1
+    return workers
+
+class TileRenderer:
+    """
+    Renders whole images tile by tile. With cam.workers > 1 the tiles are farmed
+    out to a process pool that lives as long as the renderer, so repeated passes
+    reuse the same workers. The camera must already be initialized.
+    """
+    def __init__(self, cam, world, lights):
+        self.cam = cam
+        self.world = world
+        self.lights = lights
+        self.seed = cam.seed if cam.seed is not None else random.randrange(2**32)
+        self.tiles = make_tiles(cam.image_width, cam.image_height, cam.tile_size)
+        self.workers = worker_count(cam.workers)
+        self.pool = None
+
+    def __enter__(self):
+        if self.workers > 1:
+            print(f"Rendering {len(self.tiles)} tiles on {self.workers} worker processes.")
+            self.pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                            initargs=(self.cam, self.world, self.lights))
+        return self
+
+    def __exit__(self, *exc):
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+
+    def render(self, samples=None, pass_index=0, verbose=True, first_sample=0):
+        """
+        Returns a (height, width, 3) array of averaged linear pixel colors. With
+        samples=None every pixel gets the camera's stratified samples_per_pixel;
+        otherwise it gets `samples` jittered samples, seeded by pass_index.
+        samples may also be a (height, width) array of per-pixel counts; tiles
+        with no samples to take are skipped and left black. first_sample (an int
+        or a per-pixel array) numbers the pass's samples for the camera's sampler.
+        """
+        cam = self.cam
+        framebuffer = np.zeros((cam.image_height, cam.image_width, 3))
+        start = datetime.datetime.now()
+
+        def store(tile, pixels, done):
+            _, x0, y0, x1, y1 = tile
+            framebuffer[y0:y1, x0:x1] = pixels
+            if verbose:
+                remaining = len(tiles) - done
+                elapsed = datetime.datetime.now() - start
+                ect = (elapsed / done) * remaining
+                print(f"Tiles remaining: {remaining}.  Estimated complete in appx {ect} hh:mm:ss.")
+
+        tiles = self.tiles
+        if samples is not None and not isinstance(samples, int):
+            tiles = [tile for tile in tiles if tile_samples(samples, tile) is not None]
+        if self.pool is None:
+            for done, tile in enumerate(tiles, 1):
+                pixels = render_tile_seeded(cam, self.world, self.lights, tile, self.seed,
+                                            tile_samples(samples, tile), pass_index,
+                                            tile_first_sample(first_sample, tile))
+                store(tile, pixels, done)
+        else:
+            futures = [self.pool.submit(_render_tile_in_worker, tile, self.seed, tile_samples(samples, tile), pass_index,
+                                        tile_first_sample(first_sample, tile))
+                       for tile in tiles]
+            for done, future in enumerate(as_completed(futures), 1):
+                tile, pixels, stats = future.result()
+                for key, value in stats.items():
+                    cam.path_stats[key] += value
+                store(tile, pixels, done)
+        return framebuffer
+
+def render_tiles(cam, world, lights):
+    with TileRenderer(cam, world, lights) as renderer:
+        return renderer.render()
@@ -1,13 +1,15 @@
 from Vec3 import Vec3, Point3
 import math
 from Onb import Onb
+from Sampler import sample_cosine_direction, sample_unit_sphere
 import random
 
 class Pdf:
     def value(self, direction: Vec3) -> float:
         raise NotImplementedError("Pdf.value() must be implemented by subclasses.")
 
-    def generate(self) -> Vec3:
+    def generate(self, sampler=None) -> Vec3:
+        # Draws from sampler when one is given, and from the global generators otherwise.
         raise NotImplementedError("Pdf.generate() must be implemented by subclasses.")
 
 class SpherePdf(Pdf):
@@ -17,7 +19,9 @@ class SpherePdf(Pdf):
     def value(self, direction: Vec3) -> float:
         return 1.0 / (4.0 * math.pi)
 
-    def generate(self) -> Vec3:
+    def generate(self, sampler=None) -> Vec3:
+        if sampler is not None:
+            return sample_unit_sphere(*sampler.get_2d())
         return Vec3.random_unit_vector()
 
 class CosinePdf(Pdf):
@@ -28,7 +32,9 @@ class CosinePdf(Pdf):
         cosine_theta = Vec3.dot(Vec3.unit_vector(direction), self.uvw.w())
         return max(0.0, cosine_theta / math.pi)
 
-    def generate(self) -> Vec3:
+    def generate(self, sampler=None) -> Vec3:
+        if sampler is not None:
+            return self.uvw.transform(sample_cosine_direction(*sampler.get_2d()))
         return self.uvw.transform(Vec3.random_cosine_direction())
 
 class HittablePdf(Pdf):
@@ -41,8 +47,8 @@ class HittablePdf(Pdf):
     def value(self, direction: Vec3) -> float:
         return self.objects.pdf_value(self.origin, direction)
 
-    def generate(self) -> Vec3:
-        return self.objects.random(self.origin)
+    def generate(self, sampler=None) -> Vec3:
+        return self.objects.random(self.origin, sampler)
 
 class MixturePdf(Pdf):
     def __init__(self, p0: Pdf, p1: Pdf):
@@ -51,8 +57,8 @@ class MixturePdf(Pdf):
     def value(self, direction: Vec3) -> float:
         return 0.5 * self.p[0].value(direction) + 0.5 * self.p[1].value(direction)
 
-    def generate(self) -> Vec3:
-        if random.random() < 0.5:
-            return self.p[0].generate()
+    def generate(self, sampler=None) -> Vec3:
+        if (random.random() if sampler is None else sampler.get_1d()) < 0.5:
+            return self.p[0].generate(sampler)
         else:
-            return self.p[1].generate()
\ No newline at end of file
+            return self.p[1].generate(sampler)
\ No newline at end of file
@@ -0,0 +1,96 @@
+import os
+import sys
+import time
+import numpy as np
+from numpy.lib.format import open_memmap
+from ParallelRender import TileRenderer
+from ImageWriter import write_image
+
+# Progressive rendering keeps a (height, width, 4) float64 checkpoint: running
+# RGB sums in channels 0-2 and the number of samples in channel 3. It is a
+# plain .npy file, so it can be memory-mapped by another process to preview a
+# render that is still running.
+
+def open_checkpoint(path, width, height):
+    if os.path.exists(path):
+        buffer = open_memmap(path, mode="r+")
+        if buffer.shape != (height, width, 4):
+            raise ValueError(f"Checkpoint '{path}' is {buffer.shape[1]}x{buffer.shape[0]}, "
+                             f"but the camera renders {width}x{height}.")
+        return buffer
+    return open_memmap(path, mode="w+", dtype=np.float64, shape=(height, width, 4))
+
+def checkpoint_image(buffer):
+    # Mean color per pixel from a checkpoint buffer; unsampled pixels stay black.
+    counts = np.maximum(buffer[..., 3:4], 1.0)
+    return buffer[..., :3] / counts
+
+def preview_checkpoint(path, output, fmt=None):
+    buffer = np.load(path, mmap_mode="r")
+    write_image(output, checkpoint_image(buffer), fmt)
+    return int(buffer[..., 3].min())
+
+def render_progressive(cam, world, lights):
+    """
+    Renders in passes of cam.pass_samples samples per pixel until every pixel
+    has cam.samples_per_pixel samples, accumulating into cam.checkpoint. An
+    existing checkpoint is resumed, so raising samples_per_pixel and rendering
+    again adds samples to it. Returns the mean framebuffer.
+
+    With cam.time_budget (seconds) set, samples_per_pixel is ignored: passes
+    continue while the last pass's time per sample says the next one finishes
+    within the budget, the final pass shrinking to fit, and at least one pass
+    always runs. Passes are never cut short. Without a checkpoint the sums stay
+    in memory. The samples per pixel reached are left in cam.sample_counts.
+    """
+    height, width = cam.image_height, cam.image_width
+    if cam.checkpoint is not None:
+        buffer = open_checkpoint(cam.checkpoint, width, height)
+    else:
+        buffer = np.zeros((height, width, 4))
+    done = int(buffer[..., 3].min())
+    if done > 0:
+        print(f"Resuming from {cam.checkpoint} at {done} samples per pixel.")
+    began = time.monotonic()
+    deadline = None if cam.time_budget is None else began + cam.time_budget
+    sample_time = None
+    last_flush = began
+    with TileRenderer(cam, world, lights) as renderer:
+        while True:
+            if deadline is None:
+                if done >= cam.samples_per_pixel:
+                    break
+                samples = min(cam.pass_samples, cam.samples_per_pixel - done)
+            elif sample_time is None:
+                samples = cam.pass_samples
+            else:
+                samples = min(cam.pass_samples, int((deadline - time.monotonic()) / sample_time))
+                if samples < 1:
+                    break
+            start = time.monotonic()
+            # The sample count so far identifies the pass, so resumed passes get fresh random streams.
+            pass_image = renderer.render(samples, pass_index=done, verbose=False, first_sample=done)
+            buffer[..., :3] += pass_image * samples
+            buffer[..., 3] += samples
+            done += samples
+            elapsed = time.monotonic() - start
+            sample_time = elapsed / samples
+            reached = f"{done}/{cam.samples_per_pixel}" if deadline is None else f"{done}"
+            print(f"Pass done: {reached} samples per pixel in {elapsed:.1f} s.")
+            if cam.checkpoint is not None and time.monotonic() - last_flush >= cam.checkpoint_interval:
+                buffer.flush()
+                last_flush = time.monotonic()
+    if cam.checkpoint is not None:
+        buffer.flush()
+    if deadline is not None:
+        cam.sample_counts = buffer[..., 3].astype(np.int64)
+        print(f"Time budget of {cam.time_budget:g} s: {done} samples per pixel in {time.monotonic() - began:.1f} s.")
+    return checkpoint_image(buffer)
+
+if __name__ == "__main__":
+    # python Progressive.py checkpoint.npy preview.png
+    if len(sys.argv) != 3:
+        print("usage: python Progressive.py <checkpoint.npy> <output image>")
+        sys.exit(1)
+    spp = preview_checkpoint(sys.argv[1], sys.argv[2])
+    print(f"Wrote {sys.argv[2]} at {spp} samples per pixel.")
@@ -1,13 +1,14 @@
 # Helper function to create a box from two points and a material
 from HittableList import HittableList
-from Hittable import Hittable
+from Hittable import DeferredHittable
 from Vec3 import Vec3
 from Material import Material
 from Aabb import Aabb
 from Interval import Interval
 
-def box(a, b, mat):
-    # Returns a HittableList of six quads forming a box from two opposite corners
+def box(a, b, mat, as_quadset=False):
+    # Returns a HittableList of six quads forming a box from two opposite corners,
+    # or a QuadSet of them with as_quadset
     min_pt = type(a)(min(a.x(), b.x()), min(a.y(), b.y()), min(a.z(), b.z()))
     max_pt = type(a)(max(a.x(), b.x()), max(a.y(), b.y()), max(a.z(), b.z()))
     dx = type(a)(max_pt.x() - min_pt.x(), 0, 0)
@@ -26,9 +27,12 @@ def box(a, b, mat):
     sides.add(Quad(type(a)(min_pt.x(), max_pt.y(), max_pt.z()), dx, -dz, mat))
     # bottom
     sides.add(Quad(type(a)(min_pt.x(), min_pt.y(), min_pt.z()), dx, dz, mat))
+    if as_quadset:
+        from QuadSet import QuadSet
+        return QuadSet.from_quads(sides.objects)
     return sides
 
-class Quad(Hittable):
+class Quad(DeferredHittable):
     def __init__(self, Q, u, v, mat):
         self.Q = Q
         self.u = u
@@ -43,57 +47,57 @@ class Quad(Hittable):
         self.set_bounding_box()
 
     def set_bounding_box(self):
-        bbox_diagonal1 = Aabb(self.Q, self.Q + self.u + self.v)
-        bbox_diagonal2 = Aabb(self.Q + self.u, self.Q + self.v)
-        self.bbox = Aabb(bbox_diagonal1, bbox_diagonal2)
+        bbox_diagonal1 = Aabb(a=self.Q, b=self.Q + self.u + self.v)
+        bbox_diagonal2 = Aabb(a=self.Q + self.u, b=self.Q + self.v)
+        self.bbox = Aabb(box0=bbox_diagonal1, box1=bbox_diagonal2)
 
     def bounding_box(self):
         return self.bbox
 
-    def hit(self, r, ray_t, rec):
+    def intersect(self, r, ray_t):
         denom = Vec3.dot(self.normal, r.direction())
         if abs(denom) < 1e-8:
-            return False
+            return None
         t = (self.D - Vec3.dot(self.normal, r.origin())) / denom
         if not ray_t.contains(t):
-            return False
+            return None
         intersection = r.at(t)
         planar_hitpt_vector = intersection - self.Q
         alpha = Vec3.dot(self.w, Vec3.cross(planar_hitpt_vector, self.v))
         beta = Vec3.dot(self.w, Vec3.cross(self.u, planar_hitpt_vector))
-        if not self.is_interior(alpha, beta, rec):
-            return False
+        if not self.is_interior(alpha, beta):
+            return None
+        return t, self, (intersection, alpha, beta)
+
+    def finalize(self, r, t, data, rec):
         rec.t = t
-        rec.p = intersection
+        rec.p, rec.u, rec.v = data
         rec.mat = self.mat
         rec.set_face_normal(r, self.normal)
-        return True
 
-    def is_interior(self, a, b, rec):
+    def is_interior(self, a, b):
         unit_interval = Interval(0, 1)
-        if not unit_interval.contains(a) or not unit_interval.contains(b):
-            return False
-        rec.u = a
-        rec.v = b
-        return True
+        return unit_interval.contains(a) and unit_interval.contains(b)
 
     def pdf_value(self, origin: Vec3, direction: Vec3) -> float:
         from Ray import Ray
-        from Interval import Interval
-        from Hittable import HitRecord
-        rec = HitRecord()
-        ray = Ray(origin, direction)
-        if not self.hit(ray, Interval(0.001, float('inf')), rec):
+        # Only the distance is needed, so the hit is never finalized.
+        found = self.intersect(Ray(origin, direction), Interval(0.001, float('inf')))
+        if found is None:
             return 0.0
-        distance_squared = rec.t * rec.t * direction.length_squared()
-        cosine = abs(Vec3.dot(direction, rec.normal) / direction.length())
+        t = found[0]
+        distance_squared = t * t * direction.length_squared()
+        cosine = abs(Vec3.dot(direction, self.normal) / direction.length())
         if cosine < 1e-8:
             return 0.0
         return distance_squared / (cosine * self.area)
 
-    def random(self, origin: Vec3) -> Vec3:
+    def random(self, origin: Vec3, sampler=None) -> Vec3:
         from Vec3 import Vec3
-        rand_u = Vec3.random_double(0.0, 1.0)
-        rand_v = Vec3.random_double(0.0, 1.0)
+        if sampler is None:
+            rand_u = Vec3.random_double(0.0, 1.0)
+            rand_v = Vec3.random_double(0.0, 1.0)
+        else:
+            rand_u, rand_v = sampler.get_2d()
         p = self.Q + (rand_u * self.u) + (rand_v * self.v)
         return p - origin
\ No newline at end of file
@@ -0,0 +1,116 @@
+import random
+import numpy as np
+from Hittable import HitRecord
+from Vec3 import Vec3
+from Ray import Ray
+from FlatBVH import PrimitiveSet
+
+class QuadSet(PrimitiveSet):
+    """
+    Many quads stored as NumPy arrays of Q, u, v and the derived normal, w and
+    D. Hit records match what the equivalent Quad objects give, so it can stand
+    in for a box, a room's walls, or every box of a scene at once:
+
+        walls = QuadSet.from_quads([Quad(...), Quad(...), ...])
+        sides = box(a, b, mat, as_quadset=True)
+    """
+    def __init__(self, Q, u, v, materials, material_index=None, leaf_size=8):
+        """
+        Q, u, v: (N, 3) corner and edge vectors. materials: a single Material,
+        or a list of them indexed per quad by material_index.
+        """
+        Q = np.asarray(Q, dtype=np.float64).reshape(-1, 3)
+        u = np.asarray(u, dtype=np.float64).reshape(-1, 3)
+        v = np.asarray(v, dtype=np.float64).reshape(-1, 3)
+        count = len(Q)
+        if count == 0:
+            raise ValueError("QuadSet needs at least one quad.")
+        if isinstance(materials, (list, tuple)):
+            if material_index is None:
+                raise ValueError("material_index is required when more than one material is given.")
+            materials = list(materials)
+            material_index = np.broadcast_to(np.asarray(material_index, dtype=np.int64), (count,))
+        else:
+            materials = [materials]
+            material_index = np.zeros(count, dtype=np.int64)
+        self.materials = materials
+        corners = np.stack([Q, Q + u, Q + v, Q + u + v])
+        order = self.build_nodes(corners.min(axis=0), corners.max(axis=0), leaf_size)
+        self.Q, self.u, self.v = Q[order], u[order], v[order]
+        n = np.cross(self.u, self.v)
+        n_dot_n = np.einsum('ij,ij->i', n, n)
+        self.area = np.sqrt(n_dot_n)
+        self.normal = n / np.where(self.area == 0, 1.0, self.area)[:, None]
+        self.D = np.einsum('ij,ij->i', self.normal, self.Q)
+        self.w = n / np.where(n_dot_n == 0, np.inf, n_dot_n)[:, None]
+        self.material_index = material_index[order]
+
+    @classmethod
+    def from_quads(cls, quads, leaf_size=8):
+        quads = list(quads)
+        materials, index, ids = [], [], {}
+        for quad in quads:
+            if id(quad.mat) not in ids:
+                ids[id(quad.mat)] = len(materials)
+                materials.append(quad.mat)
+            index.append(ids[id(quad.mat)])
+        return cls([q.Q.xyz() for q in quads], [q.u.xyz() for q in quads], [q.v.xyz() for q in quads],
+                   materials, index, leaf_size)
+
+    def quad_count(self):
+        return len(self.Q)
+
+    def quad_roots(self, o, d, start, end, t_min, t_max):
+        # Same test as Quad.intersect for quads start:end: returns hit distances
+        # (inf on a miss) and the planar coordinates alpha, beta of each hit.
+        normal = self.normal[start:end]
+        denom = normal @ d
+        parallel = np.abs(denom) < 1e-8
+        t = (self.D[start:end] - normal @ o) / np.where(parallel, 1.0, denom)
+        planar = o + t[:, None] * d - self.Q[start:end]
+        w = self.w[start:end]
+        alpha = np.einsum('ij,ij->i', w, np.cross(planar, self.v[start:end]))
+        beta = np.einsum('ij,ij->i', w, np.cross(self.u[start:end], planar))
+        valid = (~parallel & (t >= t_min) & (t <= t_max)
+                 & (alpha >= 0) & (alpha <= 1) & (beta >= 0) & (beta <= 1))
+        return np.where(valid, t, np.inf), alpha, beta
+
+    def leaf_hit(self, o, d, start, end, t_min, t_max):
+        t, alpha, beta = self.quad_roots(o, d, start, end, t_min, t_max)
+        k = int(np.argmin(t))
+        if t[k] == np.inf:
+            return None
+        return float(t[k]), (start + k, float(alpha[k]), float(beta[k]))
+
+    def finalize(self, r: Ray, t: float, data, rec: HitRecord):
+        k, alpha, beta = data
+        rec.t = t
+        rec.p = r.at(t)
+        rec.u = alpha
+        rec.v = beta
+        rec.mat = self.materials[self.material_index[k]]
+        rec.set_face_normal(r, Vec3(*self.normal[k]))
+
+    def pdf_value(self, origin: Vec3, direction: Vec3) -> float:
+        # Average of the quads' pdfs, matching a HittableList of the same quads.
+        o = np.array(origin.xyz())
+        d = np.array(direction.xyz())
+        t, _, _ = self.quad_roots(o, d, 0, len(self.Q), 0.001, np.inf)
+        hit = np.isfinite(t)
+        if not hit.any():
+            return 0.0
+        length_squared = float(d @ d)
+        cosine = np.abs(self.normal[hit] @ d) / np.sqrt(length_squared)
+        distance_squared = t[hit] ** 2 * length_squared
+        pdf = np.where(cosine < 1e-8, 0.0, distance_squared / np.maximum(cosine * self.area[hit], 1e-300))
+        return float(pdf.sum()) / len(self.Q)
+
+    def random(self, origin: Vec3, sampler=None) -> Vec3:
+        if sampler is None:
+            k = random.randrange(len(self.Q))
+            rand_u, rand_v = random.random(), random.random()
+        else:
+            k = min(int(sampler.get_1d() * len(self.Q)), len(self.Q) - 1)
+            rand_u, rand_v = sampler.get_2d()
+        p = self.Q[k] + rand_u * self.u[k] + rand_v * self.v[k]
+        return Vec3(*(p - np.array(origin.xyz())))
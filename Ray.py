@@ -1,9 +1,22 @@
+import math
+
 class Ray:
-    """Ray with origin, direction, and optional time."""
+    """
+    Ray with origin, direction, and optional time. The origin, inverse
+    direction and direction signs are also cached as plain floats for the
+    slab tests in Aabb.hit and the flat BVH traversal.
+    """
     def __init__(self, orig, dir, time=0.0):
         self.orig = orig
         self.dir = dir
         self.tm = time
+        self.orig_xyz = orig.xyz()
+        dx, dy, dz = dir.xyz()
+        # A zero component gets an infinite inverse with the zero's sign, so the slab test needs no branch.
+        self.inv_dir = (1.0 / dx if dx else math.copysign(math.inf, dx),
+                        1.0 / dy if dy else math.copysign(math.inf, dy),
+                        1.0 / dz if dz else math.copysign(math.inf, dz))
+        self.dir_neg = (self.inv_dir[0] < 0, self.inv_dir[1] < 0, self.inv_dir[2] < 0)
 
     def origin(self):
         return self.orig
@@ -0,0 +1,344 @@
+import math
+import random
+from Vec3 import Vec3
+
+# Samplers supply the random numbers of one camera sample (one path) as a
+# series of dimensions: the pixel offset, lens position and time first, then
+# the light/BSDF choices and directions of every bounce in the order the
+# integrator asks for them. start_pixel_sample() selects the pixel and the
+# sample index within it, so sample k of a pixel is the same point of the
+# sequence whichever tile, pass or worker process renders it.
+#
+# The low-discrepancy samplers are randomized per pixel and per dimension by
+# hashing, so neighbouring pixels get decorrelated points and every sample
+# count is allowed, not just squares or powers of two.
+
+MASK32 = 0xFFFFFFFF
+MASK64 = 0xFFFFFFFFFFFFFFFF
+ONE_MINUS_EPSILON = 1.0 - 2.0 ** -53
+
+def mix_bits(v):
+    # 64-bit finalizer of MurmurHash3.
+    v ^= v >> 31
+    v = (v * 0x7fb5d329728ea185) & MASK64
+    v ^= v >> 27
+    v = (v * 0x81dadef4bc2dd44d) & MASK64
+    v ^= v >> 33
+    return v
+
+def hash_ints(*values):
+    h = 0
+    for value in values:
+        h = mix_bits((h ^ (value & MASK64)) + 0x9e3779b97f4a7c15 & MASK64)
+    return h
+
+reversed_bytes = [int(f"{b:08b}"[::-1], 2) for b in range(256)]
+
+def reverse_bits32(v):
+    r = reversed_bytes
+    return (r[v & 0xFF] << 24) | (r[(v >> 8) & 0xFF] << 16) | (r[(v >> 16) & 0xFF] << 8) | r[v >> 24]
+
+def owen_scramble(v, seed):
+    """
+    Hash-based Owen scrambling of the 32-bit fixed-point value v (Burley 2020):
+    every bit is flipped depending only on the bits above it, so points that
+    share a dyadic interval before scrambling still share one after it.
+    """
+    v = reverse_bits32(v)
+    v ^= (v * 0x3d20adea) & MASK32
+    v = (v + seed) & MASK32
+    v = (v * ((seed >> 16) | 1)) & MASK32
+    v ^= (v * 0x05526c56) & MASK32
+    v ^= (v * 0x53a22864) & MASK32
+    return reverse_bits32(v)
+
+def permutation_element(i, n, seed):
+    """
+    Element i of a pseudo-random permutation of range(n) chosen by the 32-bit
+    seed, without building the permutation (Kensler 2013).
+    """
+    w = n - 1
+    w |= w >> 1
+    w |= w >> 2
+    w |= w >> 4
+    w |= w >> 8
+    w |= w >> 16
+    while True:
+        i ^= seed
+        i = (i * 0xe170893d) & MASK32
+        i ^= seed >> 16
+        i ^= (i & w) >> 4
+        i ^= seed >> 8
+        i = (i * 0x0929eb3f) & MASK32
+        i ^= seed >> 23
+        i ^= (i & w) >> 1
+        i = (i * (1 | seed >> 27)) & MASK32
+        i = (i * 0x6935fa69) & MASK32
+        i ^= (i & w) >> 11
+        i = (i * 0x74dcb303) & MASK32
+        i ^= (i & w) >> 2
+        i = (i * 0x9e501cc3) & MASK32
+        i ^= (i & w) >> 2
+        i = (i * 0xc860a3df) & MASK32
+        i &= w
+        i ^= i >> 5
+        if i < n:
+            return (i + seed) % n
+
+def sobol_matrix_1():
+    # Direction numbers of the second Sobol dimension, from the polynomial x + 1.
+    m, columns = 1, []
+    for k in range(1, 33):
+        columns.append(m << (32 - k))
+        m ^= m << 1
+    return columns
+
+def byte_tables(columns):
+    # tables[k][b] is the XOR of the columns selected by the bits of byte k of the index.
+    tables = []
+    for k in range(4):
+        table = [0] * 256
+        for b in range(1, 256):
+            low = b & -b
+            table[b] = table[b ^ low] ^ columns[8 * k + low.bit_length() - 1]
+        tables.append(table)
+    return tables
+
+sobol_tables_1 = byte_tables(sobol_matrix_1())
+
+def sobol_1(index):
+    t = sobol_tables_1
+    return t[0][index & 0xFF] ^ t[1][(index >> 8) & 0xFF] ^ t[2][(index >> 16) & 0xFF] ^ t[3][index >> 24]
+
+def first_primes(count):
+    primes, n = [], 2
+    while len(primes) < count:
+        if all(n % p for p in primes if p * p <= n):
+            primes.append(n)
+        n += 1
+    return primes
+
+def sample_cosine_direction(u1, u2):
+    # Same mapping as Vec3.random_cosine_direction.
+    phi = 2 * math.pi * u1
+    return Vec3(math.cos(phi) * math.sqrt(u2), math.sin(phi) * math.sqrt(u2), math.sqrt(1 - u2))
+
+def sample_unit_sphere(u1, u2):
+    # Uniformly distributed direction on the unit sphere.
+    z = 1 - 2 * u1
+    r = math.sqrt(max(0.0, 1 - z * z))
+    phi = 2 * math.pi * u2
+    return Vec3(r * math.cos(phi), r * math.sin(phi), z)
+
+def sample_unit_disk(u1, u2):
+    # Concentric mapping of the unit square to the unit disk, which keeps the
+    # square's stratification; returns (x, y).
+    a, b = 2 * u1 - 1, 2 * u2 - 1
+    if a == 0 and b == 0:
+        return 0.0, 0.0
+    if abs(a) > abs(b):
+        r, theta = a, (math.pi / 4) * (b / a)
+    else:
+        r, theta = b, math.pi / 2 - (math.pi / 4) * (a / b)
+    return r * math.cos(theta), r * math.sin(theta)
+
+class Sampler:
+    def __init__(self, samples_per_pixel, seed=0):
+        self.samples_per_pixel = samples_per_pixel
+        self.seed = seed
+        self.pixel = 0
+        self.index = 0
+        self.dimension = 0
+
+    def start_pixel_sample(self, i, j, index):
+        self.pixel = hash_ints(self.seed, i, j)
+        self.index = index
+        self.dimension = 0
+
+    def get_1d(self) -> float:
+        raise NotImplementedError("Sampler.get_1d() must be implemented by subclasses.")
+
+    def get_2d(self):
+        raise NotImplementedError("Sampler.get_2d() must be implemented by subclasses.")
+
+    def get_pixel_2d(self):
+        return self.get_2d()
+
+class IndependentSampler(Sampler):
+    """Uniform random numbers from the random module, seeded per tile like the default path."""
+    def get_1d(self):
+        return random.random()
+
+    def get_2d(self):
+        return random.random(), random.random()
+
+class SobolSampler(Sampler):
+    """
+    Owen-scrambled Sobol points, padded: every 1D or 2D request uses the first
+    two Sobol dimensions with its own Owen scramble and its own shuffle of the
+    sample index (Burley 2020), so there is no limit on the number of
+    dimensions. For power-of-two counts every pair of dimensions is a (0,m,2)-net.
+    """
+    def scrambled_index(self, h):
+        return owen_scramble(self.index & MASK32, h & MASK32)
+
+    def get_1d(self):
+        h = hash_ints(self.pixel, self.dimension)
+        self.dimension += 1
+        index = self.scrambled_index(h)
+        return owen_scramble(reverse_bits32(index), h >> 32) * 2.0 ** -32
+
+    def get_2d(self):
+        h = hash_ints(self.pixel, self.dimension)
+        self.dimension += 2
+        index = self.scrambled_index(h)
+        h2 = mix_bits(h)
+        return (owen_scramble(reverse_bits32(index), h >> 32) * 2.0 ** -32,
+                owen_scramble(sobol_1(index), h2 & MASK32) * 2.0 ** -32)
+
+class HaltonSampler(Sampler):
+    """
+    Owen-scrambled Halton points: dimension d is the radical inverse of the
+    sample index in the d-th prime base, with every digit permuted by a hash
+    of the digits before it. Dimensions past the last prime are padded with
+    independent random numbers.
+    """
+    primes = first_primes(128)
+    # Digits needed for 32 bits of precision in each base.
+    digit_counts = [math.ceil(32 * math.log(2) / math.log(p)) for p in primes]
+
+    def radical_inverse(self, dimension, h):
+        base = self.primes[dimension]
+        inv_base = 1.0 / base
+        a = self.index
+        inv_base_m = 1.0
+        reversed_digits = 0
+        for _ in range(self.digit_counts[dimension]):
+            next_a = a // base
+            digit = a - next_a * base
+            digit_hash = mix_bits(h ^ reversed_digits)
+            if base == 2:
+                digit ^= digit_hash & 1
+            else:
+                # d -> (s * d + c) mod base is a permutation of the digits for a prime base.
+                digit = ((1 + digit_hash % (base - 1)) * digit + (digit_hash >> 32) % base) % base
+            reversed_digits = reversed_digits * base + digit
+            inv_base_m *= inv_base
+            a = next_a
+        return min(reversed_digits * inv_base_m, ONE_MINUS_EPSILON)
+
+    def get_1d(self):
+        dimension = self.dimension
+        self.dimension += 1
+        if dimension >= len(self.primes):
+            return random.random()
+        return self.radical_inverse(dimension, hash_ints(self.pixel, dimension))
+
+    def get_2d(self):
+        return self.get_1d(), self.get_1d()
+
+def generate_pmj(count, rng):
+    """
+    Progressive multi-jittered points (Christensen et al. 2018): every prefix
+    of 4^k points has one point per cell of a 2^k x 2^k grid, and every prefix
+    of 2^k points has one point per 1/2^k stratum of each axis.
+    """
+    samples = [(rng.random(), rng.random())]
+    occupied = [set(), set()]
+
+    def mark(strata):
+        for axis in range(2):
+            occupied[axis] = {int(s[axis] * strata) for s in samples}
+
+    def coordinate(axis, cell, half, n, strata):
+        # A point inside sub-cell half of cell, in a free 1D stratum if there is one.
+        first = strata * (2 * cell + half) // (2 * n)
+        last = strata * (2 * cell + half + 1) // (2 * n)
+        free = [s for s in range(first, last) if s not in occupied[axis]]
+        stratum = rng.choice(free) if free else rng.randrange(first, last)
+        occupied[axis].add(stratum)
+        return (stratum + rng.random()) / strata
+
+    def point(i, j, xhalf, yhalf, n, strata):
+        return coordinate(0, i, xhalf, n, strata), coordinate(1, j, yhalf, n, strata)
+
+    n = 1
+    while len(samples) < count:
+        # Even step: one new point in the sub-cell diagonally opposite each old one.
+        size = len(samples)
+        mark(2 * size)
+        halves = []
+        for s in range(size):
+            x, y = samples[s]
+            i, j = int(n * x), int(n * y)
+            xhalf, yhalf = int(2 * (n * x - i)), int(2 * (n * y - j))
+            halves.append((i, j, xhalf, yhalf))
+            samples.append(point(i, j, 1 - xhalf, 1 - yhalf, n, 2 * size))
+        if len(samples) >= count:
+            break
+        # Odd step: the two sub-cells still empty in each cell, one from each half.
+        size = len(samples)
+        mark(2 * size)
+        chosen = []
+        for i, j, xhalf, yhalf in halves:
+            if rng.random() < 0.5:
+                xhalf = 1 - xhalf
+            else:
+                yhalf = 1 - yhalf
+            chosen.append((i, j, xhalf, yhalf))
+            samples.append(point(i, j, xhalf, yhalf, n, 2 * size))
+        for i, j, xhalf, yhalf in chosen:
+            samples.append(point(i, j, 1 - xhalf, 1 - yhalf, n, 2 * size))
+        n *= 2
+    return samples[:count]
+
+class PMJSampler(Sampler):
+    """
+    Progressive multi-jittered points. A few tables of points are generated
+    once; every pixel and dimension picks one of them by hash and XOR-scrambles
+    its bits, which keeps the tables' stratification. The sample index is
+    permuted within each run of samples_per_pixel samples, per dimension, so
+    that point k of one dimension is not paired with point k of another.
+    """
+    table_count = 16
+    tables = {}
+
+    def __init__(self, samples_per_pixel, seed=0):
+        super().__init__(samples_per_pixel, seed)
+        self.table_size = 4 ** max(2, math.ceil(math.log(max(samples_per_pixel, 1), 4)))
+
+    def table(self, k):
+        key = (k, self.table_size)
+        if key not in PMJSampler.tables:
+            PMJSampler.tables[key] = generate_pmj(self.table_size, random.Random(hash_ints(k, self.table_size)))
+        return PMJSampler.tables[key]
+
+    def get_2d(self):
+        h = hash_ints(self.pixel, self.dimension)
+        self.dimension += 2
+        run, offset = divmod(self.index, self.samples_per_pixel)
+        position = run * self.samples_per_pixel + permutation_element(offset, self.samples_per_pixel, h & MASK32)
+        block, position = divmod(position, self.table_size)
+        h2 = hash_ints(h, block)
+        x, y = self.table(h2 % self.table_count)[position]
+        h3 = mix_bits(h2)
+        return ((int(x * 2.0 ** 32) ^ (h3 & MASK32)) * 2.0 ** -32,
+                (int(y * 2.0 ** 32) ^ (h3 >> 32)) * 2.0 ** -32)
+
+    def get_1d(self):
+        # The 1D projection of the points is stratified as well.
+        value = self.get_2d()[0]
+        self.dimension -= 1
+        return value
+
+sampler_types = {
+    "independent": IndependentSampler,
+    "sobol": SobolSampler,
+    "halton": HaltonSampler,
+    "pmj": PMJSampler,
+}
+
+def make_sampler(name, samples_per_pixel, seed=0):
+    if name not in sampler_types:
+        raise ValueError(f"Unknown sampler '{name}'; expected one of {', '.join(sampler_types)}.")
+    return sampler_types[name](samples_per_pixel, seed)
@@ -0,0 +1,192 @@
+import io
+import os
+import sys
+import types
+import copyreg
+import pickle
+import random
+import hashlib
+import datetime
+import numpy as np
+from Vec3 import Vec3
+
+# Built scenes are pickled to RT_SCENE_CACHE (default .scene_cache), one entry
+# per builder, arguments, random seed and Vec3 backend. Each entry starts with
+# a manifest of the files the scene depends on and their hashes: the builder's
+# module, every project module with a class in the pickled scene or first
+# imported during the build (and the project modules those import from), and
+# every data file the builder read, such as OBJ meshes and texture images. The
+# entry is only used while all of them are unchanged, so editing a primitive,
+# material or texture module or an asset rebuilds the scene, and editing
+# unrelated code like Camera does not.
+
+cache_dir = os.environ.get("RT_SCENE_CACHE", ".scene_cache")
+
+recording = None  # Paths opened for reading while a scene is being built
+hooked = False
+
+def record_open(event, args):
+    if event == "open" and recording is not None and isinstance(args[0], (str, bytes, os.PathLike)):
+        mode = args[1]
+        if mode is None or "r" in mode:
+            recording.add(os.path.abspath(os.fsdecode(args[0])))
+
+def install_hook():
+    # Audit hooks cannot be removed, so this one is only added once a scene is
+    # actually built, rather than by every process that imports this module.
+    global hooked
+    if not hooked:
+        sys.addaudithook(record_open)
+        hooked = True
+
+def builder_file(builder):
+    return os.path.abspath(sys.modules[builder.__module__].__file__)
+
+def file_digest(path):
+    try:
+        with open(path, "rb") as file:
+            return hashlib.sha256(file.read()).hexdigest()
+    except OSError:
+        return None
+
+def canonical(value):
+    """
+    A string for a builder argument that is the same in every process:
+    containers are taken apart, arrays and Vec3s reduced to their values, and
+    classes and functions named. Objects whose repr is the default one, which
+    holds their memory address, raise ValueError since they could never hit.
+    """
+    if value is None or isinstance(value, (bool, int, float, complex, str, bytes)):
+        return repr(value)
+    if isinstance(value, (list, tuple)):
+        return f"{type(value).__name__}({', '.join(canonical(v) for v in value)})"
+    if isinstance(value, (set, frozenset)):
+        return f"{type(value).__name__}({', '.join(sorted(canonical(v) for v in value))})"
+    if isinstance(value, dict):
+        return f"dict({', '.join(sorted(f'{canonical(k)}: {canonical(v)}' for k, v in value.items()))})"
+    if isinstance(value, np.ndarray):
+        return f"ndarray({value.dtype}, {value.shape}, {hashlib.sha256(np.ascontiguousarray(value).tobytes()).hexdigest()})"
+    if isinstance(value, np.generic):
+        return repr(value.item())
+    if isinstance(value, Vec3):
+        return f"Vec3{value.xyz()}"
+    if isinstance(value, (type, types.FunctionType)):
+        return f"{value.__module__}.{value.__qualname__}"
+    if type(value).__repr__ is object.__repr__:
+        raise ValueError(f"Cannot key the scene cache on a {type(value).__name__} argument; it has no stable repr.")
+    return repr(value)
+
+def entry_name(builder, args, kwargs, seed):
+    # The builder's arguments, seed and runtime, hashed into the entry's name.
+    inputs = canonical((args, kwargs, seed, builder.__qualname__, Vec3.__module__,
+                        sys.version_info[:2], np.__version__))
+    digest = hashlib.sha256(inputs.encode()).hexdigest()
+    # Named after the scene file rather than the module, which is __main__ when run as a script.
+    return f"{os.path.splitext(os.path.basename(builder_file(builder)))[0]}.{builder.__name__}-{digest[:12]}"
+
+def project_modules(names, root):
+    # names plus every project module they import from, as source paths.
+    paths = set()
+    pending = list(names)
+    seen = set()
+    while pending:
+        name = pending.pop()
+        module = sys.modules.get(name)
+        if name in seen or module is None:
+            continue
+        seen.add(name)
+        path = getattr(module, "__file__", None)
+        if not path or not path.endswith(".py") or os.path.dirname(os.path.abspath(path)) != root:
+            continue
+        paths.add(os.path.abspath(path))
+        for value in vars(module).values():
+            if isinstance(value, types.ModuleType):
+                pending.append(value.__name__)
+            elif isinstance(getattr(value, "__module__", None), str):
+                pending.append(value.__module__)
+    return paths
+
+def scene_manifest(builder, modules, assets):
+    """
+    Returns {path: sha256} for the files a built scene depends on: the
+    builder's module, the project modules in modules and what they import
+    from, and the data files in assets (source and bytecode files excluded).
+    """
+    root = os.path.dirname(builder_file(builder))
+    paths = project_modules(modules, root) | {builder_file(builder)}
+    cache = os.path.abspath(cache_dir)
+    for path in assets:
+        if path.endswith((".py", ".pyc")) or path.startswith(cache + os.sep) or not os.path.isfile(path):
+            continue
+        paths.add(path)
+    return {path: file_digest(path) for path in sorted(paths)}
+
+class ScenePickler(pickle.Pickler):
+    # Vec3 components and the NumPy scalars derived from them are stored as
+    # plain floats, which makes the file smaller and much faster to load.
+    # Records the module of every class and function it pickles in modules.
+    dispatch_table = copyreg.dispatch_table.copy()
+    dispatch_table[np.float64] = lambda x: (float, (float(x),))
+    dispatch_table[Vec3] = lambda v: (Vec3, tuple(v.e.tolist()))
+
+    def __init__(self, file, protocol=None):
+        super().__init__(file, protocol)
+        self.modules = set()
+
+    def persistent_id(self, obj):
+        if isinstance(obj, (type, types.FunctionType)):
+            self.modules.add(obj.__module__)
+        else:
+            self.modules.add(type(obj).__module__)
+        return None
+
+def cached_scene(builder, *args, seed=0, **kwargs):
+    """
+    Returns builder(*args, **kwargs), seeding random and np.random with seed
+    first. The result is loaded from the scene cache when an identical build
+    was saved before, and saved there otherwise.
+    """
+    global recording
+    name = entry_name(builder, args, kwargs, seed)
+    path = os.path.join(cache_dir, f"{name}.pkl")
+    if os.path.exists(path):
+        start = datetime.datetime.now()
+        try:
+            with open(path, "rb") as file:
+                manifest = pickle.load(file)
+                stale = [p for p, digest in manifest.items() if file_digest(p) != digest]
+                if not stale:
+                    scene = pickle.load(file)
+                    print(f"Loaded scene from {path} in {datetime.datetime.now() - start}.")
+                    return scene
+            print(f"Cached scene {path} is out of date ({os.path.basename(stale[0])} changed); rebuilding.")
+        except Exception as error:
+            print(f"Could not load cached scene {path} ({error}); rebuilding.")
+
+    start = datetime.datetime.now()
+    random.seed(seed)
+    np.random.seed(seed)
+    loaded = set(sys.modules)
+    install_hook()
+    recording = set()
+    try:
+        scene = builder(*args, **kwargs)
+        assets = recording
+    finally:
+        recording = None
+    # Modules the build imported lazily, such as Perlin and Rtw_image from Texture.
+    imported = set(sys.modules) - loaded
+    print(f"Built scene in {datetime.datetime.now() - start}.")
+
+    body = io.BytesIO()
+    pickler = ScenePickler(body, protocol=pickle.HIGHEST_PROTOCOL)
+    pickler.dump(scene)
+    manifest = scene_manifest(builder, pickler.modules | imported, assets)
+    os.makedirs(cache_dir, exist_ok=True)
+    # Written under a temporary name first so a parallel run never reads half a file.
+    temp = f"{path}.{os.getpid()}.tmp"
+    with open(temp, "wb") as file:
+        pickle.dump(manifest, file, protocol=pickle.HIGHEST_PROTOCOL)
+        file.write(body.getbuffer())
+    os.replace(temp, path)
+    return scene
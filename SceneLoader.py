@@ -0,0 +1,209 @@
+import os
+import json
+import importlib
+
+# Scene description files (JSON, or TOML on Python 3.11+) describe a camera,
+# named textures and materials, a list of objects and an optional list of
+# lights to sample. Colors, points and vectors are [x, y, z] lists; a material
+# or texture field may name an entry of the "materials"/"textures" tables or
+# describe one inline. See scenes/cornell_box.json.
+#
+# Every type name maps to the module that implements it, and modules are
+# only imported when a scene uses them, so a scene without image or noise
+# textures never imports Pillow or builds Perlin tables.
+
+texture_types = {
+    "solid": ("Texture", "SolidColor"),
+    "checker": ("Texture", "CheckerTexture"),
+    "image": ("Texture", "ImageTexture"),
+    "noise": ("Texture", "NoiseTexture"),
+}
+
+material_types = {
+    "lambertian": ("Material", "Lambertian"),
+    "metal": ("Material", "Metal"),
+    "dielectric": ("Material", "Dielectric"),
+    "diffuse_light": ("Material", "DiffuseLight"),
+    "isotropic": ("Material", "Isotropic"),
+    "empty": ("Material", "EmptyMaterial"),
+}
+
+object_types = {
+    "sphere": ("Sphere", "Sphere"),
+    "quad": ("Quad", "Quad"),
+    "box": ("Quad", "box"),
+    "mesh": ("TriangleMesh", "TriangleMesh"),
+    "quad_set": ("QuadSet", "QuadSet"),
+    "sphere_cloud": ("SphereCloud", "SphereCloud"),
+    "constant_medium": ("ConstantMedium", "ConstantMedium"),
+    "list": ("HittableList", "HittableList"),
+}
+
+def load_type(table, kind, what):
+    if kind not in table:
+        raise ValueError(f"Unknown {what} type '{kind}'; expected one of {', '.join(sorted(table))}.")
+    module, name = table[kind]
+    return getattr(importlib.import_module(module), name)
+
+def read_scene_file(path):
+    with open(path, "rb") as file:
+        if path.endswith(".toml"):
+            import tomllib
+            return tomllib.load(file)
+        if path.endswith(".json"):
+            return json.load(file)
+    raise ValueError(f"Scene file '{path}' must be .json or .toml.")
+
+def vec3(value):
+    from Vec3 import Vec3
+    if len(value) != 3:
+        raise ValueError(f"Expected [x, y, z], got {value}.")
+    return Vec3(*(float(c) for c in value))
+
+class SceneLoader:
+    """
+    Builds the world, lights and camera described by a parsed scene file.
+    File paths in the scene (meshes, image textures) are relative to base_dir.
+    """
+    def __init__(self, description, base_dir="."):
+        self.description = description
+        self.base_dir = base_dir
+        self.textures = {}
+        self.materials = {}
+
+    @classmethod
+    def from_file(cls, path):
+        return cls(read_scene_file(path), os.path.dirname(os.path.abspath(path)))
+
+    def path(self, name):
+        return os.path.join(self.base_dir, name)
+
+    def texture(self, spec):
+        # A color, a texture name, or an inline texture description.
+        if isinstance(spec, str):
+            if spec not in self.textures:
+                if spec not in self.description.get("textures", {}):
+                    raise ValueError(f"Unknown texture '{spec}'.")
+                self.textures[spec] = self.texture(self.description["textures"][spec])
+            return self.textures[spec]
+        if isinstance(spec, list):
+            return vec3(spec)
+        spec = dict(spec)
+        kind = spec.pop("type")
+        cls = load_type(texture_types, kind, "texture")
+        if kind == "solid":
+            return cls(vec3(spec["color"]))
+        if kind == "checker":
+            return cls(spec["scale"], self.texture(spec["even"]), self.texture(spec["odd"]))
+        if kind == "image":
+            return cls(self.path(spec["file"]))
+        return cls(spec.get("scale", 1.0))
+
+    def material(self, spec):
+        # A material name or an inline material description.
+        if isinstance(spec, str):
+            if spec not in self.materials:
+                if spec not in self.description.get("materials", {}):
+                    raise ValueError(f"Unknown material '{spec}'.")
+                self.materials[spec] = self.material(self.description["materials"][spec])
+            return self.materials[spec]
+        spec = dict(spec)
+        kind = spec.pop("type")
+        cls = load_type(material_types, kind, "material")
+        if kind in ("lambertian", "isotropic"):
+            return cls(self.texture(spec["albedo"]))
+        if kind == "diffuse_light":
+            return cls(self.texture(spec["emit"]))
+        if kind == "metal":
+            return cls(vec3(spec["albedo"]), spec.get("fuzz", 0.0))
+        if kind == "dielectric":
+            return cls(spec["refraction_index"])
+        return cls()
+
+    def object(self, spec, default_material=None):
+        spec = dict(spec)
+        kind = spec.pop("type")
+        cls = load_type(object_types, kind, "object")
+        mat = self.material(spec["material"]) if "material" in spec else default_material
+        if kind == "sphere":
+            center2 = vec3(spec["center2"]) if "center2" in spec else None
+            obj = cls(vec3(spec["center"]), spec["radius"], mat, center2=center2)
+        elif kind == "quad":
+            obj = cls(vec3(spec["q"]), vec3(spec["u"]), vec3(spec["v"]), mat)
+        elif kind == "box":
+            obj = cls(vec3(spec["a"]), vec3(spec["b"]), mat, as_quadset=spec.get("quad_set", False))
+        elif kind == "quad_set":
+            # Each quad is {"q", "u", "v"} with an optional "material" of its own.
+            Quad = load_type(object_types, "quad", "object")
+            obj = cls.from_quads(Quad(vec3(q["q"]), vec3(q["u"]), vec3(q["v"]),
+                                      self.material(q["material"]) if "material" in q else mat)
+                                 for q in spec["quads"])
+        elif kind == "mesh":
+            obj = cls.from_obj(self.path(spec["file"]), mat)
+        elif kind == "sphere_cloud":
+            obj = cls(spec["centers"], spec["radius"], mat)
+        elif kind == "constant_medium":
+            obj = cls(self.object(spec["boundary"], default_material), spec["density"], self.texture(spec["albedo"]))
+        else:
+            obj = cls()
+            for child in spec["objects"]:
+                obj.add(self.object(child, default_material))
+        if "transform" in spec:
+            obj = self.transform(obj, spec["transform"])
+        return obj
+
+    def transform(self, obj, steps):
+        # Steps apply in order, e.g. [{"rotate_y": 15}, {"translate": [265, 0, 295]}].
+        from Hittable import Instance
+        obj = Instance(obj)
+        for step in steps:
+            (op, arg), = step.items()
+            if op == "translate":
+                obj = obj.translate(vec3(arg))
+            elif op in ("rotate_x", "rotate_y", "rotate_z"):
+                obj = getattr(obj, op)(arg)
+            elif op == "rotate":
+                obj = obj.rotate(vec3(arg[0]), arg[1])
+            elif op == "scale":
+                obj = obj.scale(*arg) if isinstance(arg, list) else obj.scale(arg)
+            else:
+                raise ValueError(f"Unknown transform '{op}'.")
+        return obj
+
+    def world(self):
+        from HittableList import HittableList
+        world = HittableList()
+        for spec in self.description.get("objects", []):
+            world.add(self.object(spec))
+        split = self.description.get("bvh", "median")
+        if split and world.objects:
+            from BVH import BVHNode
+            world = BVHNode(world.objects, split=split)
+        return world
+
+    def lights(self):
+        # Light geometry only needs a shape; it defaults to EmptyMaterial. With
+        # light_selection "power" the emission comes from the matching object in
+        # the world, or from a "material" given on the lights entry.
+        from HittableList import HittableList
+        from Material import EmptyMaterial
+        lights = HittableList()
+        for spec in self.description.get("lights", []):
+            lights.add(self.object(spec, EmptyMaterial()))
+        return lights
+
+    def camera(self):
+        from Camera import Camera
+        cam = Camera()
+        for key, value in self.description.get("camera", {}).items():
+            if not hasattr(cam, key):
+                raise ValueError(f"Unknown camera setting '{key}'.")
+            setattr(cam, key, vec3(value) if isinstance(value, list) else value)
+        return cam
+
+    def build(self):
+        """Returns (world, lights, cam)."""
+        return self.world(), self.lights(), self.camera()
+
+def load_scene(path):
+    return SceneLoader.from_file(path).build()
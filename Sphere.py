@@ -1,5 +1,5 @@
 import math
-from Hittable import Hittable, HitRecord
+from Hittable import DeferredHittable, HitRecord
 from Vec3 import Point3, Vec3
 from Ray import Ray
 from Interval import Interval
@@ -9,7 +9,7 @@ from Aabb import Aabb
 from Onb import Onb
 import random
 
-class Sphere(Hittable):
+class Sphere(DeferredHittable):
     @staticmethod
     def get_sphere_uv(p):
         # p: a point on the unit sphere, returns (u, v) in [0,1]x[0,1]
@@ -44,7 +44,7 @@ class Sphere(Hittable):
     def center(self, time: float) -> Point3:
         return self.center1 + time * self.center_vec
 
-    def hit(self, r: Ray, ray_t: Interval, rec: HitRecord) -> bool:
+    def intersect(self, r: Ray, ray_t: Interval):
         sphere_center = self.center(r.time())
         oc = sphere_center - r.origin()
         a = r.direction().length_squared()
@@ -53,7 +53,7 @@ class Sphere(Hittable):
 
         discriminant = h * h - a * c
         if discriminant < 0:
-            return False
+            return None
 
         sqrtd = math.sqrt(discriminant)
 
@@ -64,24 +64,20 @@ class Sphere(Hittable):
         if not (ray_t.surrounds(root)):
             root = (h + sqrtd) / a
             if not (ray_t.surrounds(root)):
-                return False
+                return None
+        return root, self, sphere_center
 
-        rec.t = root
-        rec.p = r.at(rec.t)
+    def finalize(self, r: Ray, t: float, sphere_center, rec: HitRecord):
+        rec.t = t
+        rec.p = r.at(t)
         outward_normal = (rec.p - sphere_center) / self.radius
         rec.set_face_normal(r, outward_normal)
         rec.u, rec.v = self.get_sphere_uv(outward_normal)
         rec.mat = self.mat
-
-        return True
     
     def pdf_value(self, origin: Point3, direction: Vec3) -> float:
         # Only works for stationary spheres (center at t=0)
-        from Ray import Ray
-        from Interval import Interval
-        rec = HitRecord()
-        ray = Ray(origin, direction)
-        if not self.hit(ray, Interval(0.001, float('inf')), rec):
+        if not self.occluded(Ray(origin, direction), float('inf')):
             return 0.0
         dist_squared = (self.center(0.0) - origin).length_squared()
         if dist_squared == 0 or self.radius * self.radius > dist_squared:
@@ -90,16 +86,19 @@ class Sphere(Hittable):
         solid_angle = 2 * math.pi * (1 - cos_theta_max)
         return 1.0 / solid_angle if solid_angle > 0 else 0.0
 
-    def random(self, origin: Point3) -> Vec3:
+    def random(self, origin: Point3, sampler=None) -> Vec3:
         direction = self.center(0.0) - origin
         distance_squared = direction.length_squared()
         uvw = Onb(direction)
-        return uvw.transform(self.random_to_sphere(self.radius, distance_squared))
+        return uvw.transform(self.random_to_sphere(self.radius, distance_squared, sampler))
 
     @staticmethod
-    def random_to_sphere(radius: float, distance_squared: float) -> Vec3:
-        r1 = random.random()
-        r2 = random.random()
+    def random_to_sphere(radius: float, distance_squared: float, sampler=None) -> Vec3:
+        if sampler is None:
+            r1 = random.random()
+            r2 = random.random()
+        else:
+            r1, r2 = sampler.get_2d()
         if distance_squared == 0 or radius * radius > distance_squared:
             z = 1.0
         else:
@@ -0,0 +1,72 @@
+import numpy as np
+from Hittable import HitRecord
+from Vec3 import Point3
+from Ray import Ray
+from Sphere import Sphere
+from FlatBVH import PrimitiveSet
+
+class SphereCloud(PrimitiveSet):
+    """
+    Many stationary spheres stored as NumPy arrays of centers, radii and
+    material indices. Hit records match what the equivalent Sphere objects give.
+
+        cloud = SphereCloud(centers, 10, white)
+        cloud = SphereCloud(centers, radii, [mat_a, mat_b], material_index)
+    """
+    def __init__(self, centers, radii, materials, material_index=None, leaf_size=8):
+        """
+        centers: (N, 3). radii: a single radius or N radii. materials: a single
+        Material, or a list of them indexed per sphere by material_index.
+        """
+        centers = np.asarray(centers, dtype=np.float64).reshape(-1, 3)
+        n = len(centers)
+        if n == 0:
+            raise ValueError("SphereCloud needs at least one sphere.")
+        radii = np.maximum(np.broadcast_to(np.asarray(radii, dtype=np.float64), (n,)), 0.0)
+        if isinstance(materials, (list, tuple)):
+            if material_index is None:
+                raise ValueError("material_index is required when more than one material is given.")
+            materials = list(materials)
+            material_index = np.broadcast_to(np.asarray(material_index, dtype=np.int64), (n,))
+        else:
+            materials = [materials]
+            material_index = np.zeros(n, dtype=np.int64)
+        self.materials = materials
+        order = self.build_nodes(centers - radii[:, None], centers + radii[:, None], leaf_size)
+        self.centers = centers[order]
+        self.radii = radii[order]
+        self.radii_squared = self.radii * self.radii
+        self.material_index = material_index[order]
+
+    def sphere_count(self):
+        return len(self.centers)
+
+    def leaf_hit(self, o, d, start, end, t_min, t_max):
+        # Same root selection as Sphere.hit, for every sphere in the leaf at once.
+        a = float(d @ d)
+        if a == 0:
+            a = 1e-8
+        oc = self.centers[start:end] - o
+        h = oc @ d
+        c = np.einsum('ij,ij->i', oc, oc) - self.radii_squared[start:end]
+        disc = h * h - a * c
+        sqrtd = np.sqrt(np.maximum(disc, 0.0))
+        root = (h - sqrtd) / a
+        near = (root > t_min) & (root < t_max)
+        far_root = (h + sqrtd) / a
+        far = (far_root > t_min) & (far_root < t_max)
+        root = np.where(near, root, np.where(far, far_root, np.inf))
+        root[disc < 0] = np.inf
+        k = int(np.argmin(root))
+        if root[k] == np.inf:
+            return None
+        return float(root[k]), start + k
+
+    def finalize(self, r: Ray, t: float, k, rec: HitRecord):
+        center = Point3(*self.centers[k])
+        rec.t = t
+        rec.p = r.at(t)
+        outward_normal = (rec.p - center) / float(self.radii[k])
+        rec.set_face_normal(r, outward_normal)
+        rec.u, rec.v = Sphere.get_sphere_uv(outward_normal)
+        rec.mat = self.materials[self.material_index[k]]
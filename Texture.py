@@ -1,9 +1,9 @@
 # NoiseTexture: procedural texture using Perlin noise
-from Perlin import Perlin
 import math
 from Vec3 import Color
-from Rtw_image import RtwImage
 from Interval import Interval
+# Perlin and Rtw_image (which needs Pillow) are imported by the textures that
+# use them, so scenes without image or noise textures never load them.
 
 class Texture:
     def value(self, u, v, p):
@@ -45,8 +45,17 @@ class CheckerTexture(Texture):
     
 class ImageTexture(Texture):
     def __init__(self, filename):
+        from Rtw_image import RtwImage
+        self.filename = filename
         self.image = RtwImage(filename)
 
+    def __getstate__(self):
+        # Pickled by reference: the image is loaded again from its file.
+        return {"filename": self.filename}
+
+    def __setstate__(self, state):
+        self.__init__(state["filename"])
+
     def value(self, u, v, p):
         # If we have no texture data, return solid cyan as a debugging aid
         if self.image.height() <= 0:
@@ -62,6 +71,7 @@ class ImageTexture(Texture):
 
 class NoiseTexture(Texture):
     def __init__(self, scale=1.0):
+        from Perlin import Perlin
         self.noise = Perlin()
         self.scale = scale
 
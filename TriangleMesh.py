@@ -0,0 +1,108 @@
+import numpy as np
+from Hittable import HitRecord
+from Vec3 import Vec3
+from Ray import Ray
+from FlatBVH import PrimitiveSet
+
+class TriangleMesh(PrimitiveSet):
+    """
+    Triangle mesh stored as NumPy vertex and index arrays, with its own BVH over
+    the triangles; leaves use a vectorized Möller–Trumbore test. Works anywhere a Sphere or Quad does (HittableList, BVHNode, RotateY,
+    Translate). The hit record's u, v are the barycentric coordinates of the hit.
+    """
+    def __init__(self, vertices, faces, mat, normals=None, leaf_size=8):
+        """
+        vertices: (N, 3) positions. faces: (M, 3) vertex indices.
+        normals: optional (M, 3, 3) per-corner normals for smooth shading.
+        """
+        vertices = np.asarray(vertices, dtype=np.float64)
+        faces = np.asarray(faces, dtype=np.int64)
+        self.vertices = vertices
+        self.faces = faces
+        self.normals = normals
+        self.mat = mat
+        p0, p1, p2 = vertices[faces[:, 0]], vertices[faces[:, 1]], vertices[faces[:, 2]]
+        order = self.build_nodes(np.minimum(np.minimum(p0, p1), p2), np.maximum(np.maximum(p0, p1), p2), leaf_size)
+        self.v0 = p0[order]
+        self.e1 = (p1 - p0)[order]
+        self.e2 = (p2 - p0)[order]
+        n = np.cross(self.e1, self.e2)
+        lengths = np.linalg.norm(n, axis=1)
+        self.face_normals = n / np.where(lengths == 0, 1.0, lengths)[:, None]
+        self.corner_normals = None if normals is None else np.asarray(normals, dtype=np.float64)[order]
+        self.order = order
+
+    @classmethod
+    def from_obj(cls, filename, mat, leaf_size=8):
+        """
+        Loads a Wavefront OBJ file. Polygons are fan-triangulated; vertex normals
+        (vn) referenced by every face corner are used for smooth shading.
+        """
+        vertices, normals, faces, face_normals = [], [], [], []
+        with open(filename) as file:
+            for line in file:
+                parts = line.split()
+                if not parts:
+                    continue
+                if parts[0] == "v":
+                    vertices.append([float(c) for c in parts[1:4]])
+                elif parts[0] == "vn":
+                    normals.append([float(c) for c in parts[1:4]])
+                elif parts[0] == "f":
+                    corners = []
+                    for corner in parts[1:]:
+                        refs = corner.split("/")
+                        v = int(refs[0])
+                        vn = int(refs[2]) if len(refs) > 2 and refs[2] else None
+                        # OBJ indices are 1-based; negative ones count back from the end.
+                        v = v - 1 if v > 0 else len(vertices) + v
+                        if vn is not None:
+                            vn = vn - 1 if vn > 0 else len(normals) + vn
+                        corners.append((v, vn))
+                    for k in range(1, len(corners) - 1):
+                        tri = (corners[0], corners[k], corners[k + 1])
+                        faces.append([c[0] for c in tri])
+                        face_normals.append([c[1] for c in tri])
+        if not faces:
+            raise ValueError(f"No faces found in OBJ file '{filename}'.")
+        corner_normals = None
+        if normals and all(n is not None for tri in face_normals for n in tri):
+            corner_normals = np.asarray(normals, dtype=np.float64)[np.asarray(face_normals)]
+        return cls(vertices, faces, mat, corner_normals, leaf_size)
+
+    def triangle_count(self):
+        return len(self.faces)
+
+    def leaf_hit(self, o, d, start, end, t_min, t_max):
+        # Möller–Trumbore over every triangle in the leaf at once; data is the
+        # triangle index and the barycentric u, v of the hit.
+        e1 = self.e1[start:end]
+        e2 = self.e2[start:end]
+        pvec = np.cross(d, e2)
+        det = np.einsum('ij,ij->i', e1, pvec)
+        valid = np.abs(det) > 1e-12
+        inv_det = 1.0 / np.where(valid, det, 1.0)
+        tvec = o - self.v0[start:end]
+        u = np.einsum('ij,ij->i', tvec, pvec) * inv_det
+        qvec = np.cross(tvec, e1)
+        v = (qvec @ d) * inv_det
+        t = np.einsum('ij,ij->i', e2, qvec) * inv_det
+        valid &= (u >= 0) & (v >= 0) & (u + v <= 1) & (t > t_min) & (t < t_max)
+        if not valid.any():
+            return None
+        k = int(np.argmin(np.where(valid, t, np.inf)))
+        return float(t[k]), (start + k, float(u[k]), float(v[k]))
+
+    def finalize(self, r: Ray, t: float, data, rec: HitRecord):
+        k, u, v = data
+        rec.t = t
+        rec.p = r.at(t)
+        if self.corner_normals is None:
+            outward_normal = Vec3(*self.face_normals[k])
+        else:
+            n = (1 - u - v) * self.corner_normals[k, 0] + u * self.corner_normals[k, 1] + v * self.corner_normals[k, 2]
+            outward_normal = Vec3(*(n / np.linalg.norm(n)))
+        rec.set_face_normal(r, outward_normal)
+        rec.u = u
+        rec.v = v
+        rec.mat = self.mat
@@ -1,7 +1,8 @@
+import os
 import numpy as np
 import math
 
-class Vec3:
+class NumpyVec3:
     def __init__(self, e0=0.0, e1=0.0, e2=0.0):
         self.e = np.array([e0, e1, e2], dtype=np.float64)
 
@@ -11,9 +12,12 @@ class Vec3:
         return self.e[1]
     def z(self):
         return self.e[2]
+    def xyz(self):
+        # Components as a tuple of Python floats
+        return tuple(self.e.tolist())
 
     def __neg__(self):
-        return Vec3(*(-self.e))
+        return NumpyVec3(*(-self.e))
 
     def __getitem__(self, i):
         return self.e[i]
@@ -34,24 +38,24 @@ class Vec3:
         return self
 
     def __add__(self, v):
-        return Vec3(*(self.e + v.e))
+        return NumpyVec3(*(self.e + v.e))
 
     def __sub__(self, v):
-        return Vec3(*(self.e - v.e))
+        return NumpyVec3(*(self.e - v.e))
 
     def __mul__(self, t):
-        if isinstance(t, Vec3):
-            return Vec3(*(self.e * t.e))
+        if isinstance(t, NumpyVec3):
+            return NumpyVec3(*(self.e * t.e))
         else:
-            return Vec3(*(self.e * t))
+            return NumpyVec3(*(self.e * t))
 
     def __rmul__(self, t):
         return self.__mul__(t)
 
     def __truediv__(self, t):
         if t == 0:
-            return Vec3(0, 0, 0)
-        return Vec3(*(self.e / t))
+            return NumpyVec3(0, 0, 0)
+        return NumpyVec3(*(self.e / t))
 
     def length(self):
         return np.linalg.norm(self.e)
@@ -66,7 +70,7 @@ class Vec3:
     def unit(self):
         len = self.length()
         if len == 0:
-            return Vec3(0, 0, 0)
+            return NumpyVec3(0, 0, 0)
         return self / len
 
     @staticmethod
@@ -75,7 +79,7 @@ class Vec3:
 
     @staticmethod
     def cross(u, v):
-        return Vec3(*np.cross(u.e, v.e))
+        return NumpyVec3(*np.cross(u.e, v.e))
 
     @staticmethod
     def unit_vector(v):
@@ -87,16 +91,16 @@ class Vec3:
 
     @staticmethod
     def random():
-        return Vec3(*np.random.rand(3))
+        return NumpyVec3(*np.random.rand(3))
 
     @staticmethod
     def random_range(min, max):
-        return Vec3(*np.random.uniform(min, max, 3))
+        return NumpyVec3(*np.random.uniform(min, max, 3))
 
     @staticmethod
     def random_unit_vector():
         while True:
-            p = Vec3.random_range(-1, 1)
+            p = NumpyVec3.random_range(-1, 1)
             lensq = p.length_squared()
             if 1e-160 < lensq <= 1.0:
                 return p / math.sqrt(lensq)
@@ -104,14 +108,14 @@ class Vec3:
     @staticmethod
     def random_in_unit_disk():
         while True:
-            p = Vec3(Vec3.random_double(-1, 1), Vec3.random_double(-1, 1), 0)
+            p = NumpyVec3(NumpyVec3.random_double(-1, 1), NumpyVec3.random_double(-1, 1), 0)
             if p.length_squared() < 1:
                 return p
 
     @staticmethod
     def random_on_hemisphere(normal):
-        on_unit_sphere = Vec3.random_unit_vector()
-        if Vec3.dot(on_unit_sphere, normal) > 0.0:
+        on_unit_sphere = NumpyVec3.random_unit_vector()
+        if NumpyVec3.dot(on_unit_sphere, normal) > 0.0:
             return on_unit_sphere
         else:
             return -on_unit_sphere
@@ -124,19 +128,29 @@ class Vec3:
         x = math.cos(phi) * math.sqrt(r2)
         y = math.sin(phi) * math.sqrt(r2)
         z = math.sqrt(1 - r2)
-        return Vec3(x, y, z)
+        return NumpyVec3(x, y, z)
 
     @staticmethod
     def reflect(v, n):
-        return v - 2 * Vec3.dot(v, n) * n
+        return v - 2 * NumpyVec3.dot(v, n) * n
 
     @staticmethod
     def refract(uv, n, etai_over_etat):
-        cos_theta = min(Vec3.dot(-uv, n), 1.0)
+        cos_theta = min(NumpyVec3.dot(-uv, n), 1.0)
         r_out_perp = etai_over_etat * (uv + cos_theta * n)
         r_out_parallel = -math.sqrt(abs(1.0 - r_out_perp.length_squared())) * n
         return r_out_perp + r_out_parallel
 
+# RT_VEC3_BACKEND=slots swaps in the pure-float implementation from Vec3Slots.
+# The choice is made once, at import, so every "from Vec3 import ..." agrees.
+backend = os.environ.get("RT_VEC3_BACKEND", "numpy").lower()
+if backend == "slots":
+    from Vec3Slots import Vec3
+elif backend == "numpy":
+    Vec3 = NumpyVec3
+else:
+    raise ValueError(f"Unknown RT_VEC3_BACKEND '{backend}', expected 'numpy' or 'slots'.")
+
 # Point3 and Color remain as aliases for Vec3
 Point3 = Vec3
 Color = Vec3
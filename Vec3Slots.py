@@ -0,0 +1,177 @@
+import math
+import random
+import numpy as np
+
+class Vec3:
+    """
+    Pure-Python Vec3 backed by three float slots. Same interface as the NumPy
+    backed Vec3 in Vec3.py, but every operation works on plain floats, which is
+    much cheaper for 3-component math. Selected with RT_VEC3_BACKEND=slots.
+    """
+    __slots__ = ("e0", "e1", "e2")
+    # Keeps NumPy scalars from trying to broadcast over a Vec3, so that
+    # np.float64 * Vec3 falls through to Vec3.__rmul__.
+    __array_ufunc__ = None
+
+    def __init__(self, e0=0.0, e1=0.0, e2=0.0):
+        self.e0 = float(e0)
+        self.e1 = float(e1)
+        self.e2 = float(e2)
+
+    @property
+    def e(self):
+        return np.array([self.e0, self.e1, self.e2], dtype=np.float64)
+
+    @e.setter
+    def e(self, values):
+        self.e0, self.e1, self.e2 = (float(c) for c in values)
+
+    def x(self):
+        return self.e0
+    def y(self):
+        return self.e1
+    def z(self):
+        return self.e2
+    def xyz(self):
+        # Components as a tuple of Python floats
+        return (self.e0, self.e1, self.e2)
+
+    def __neg__(self):
+        return Vec3(-self.e0, -self.e1, -self.e2)
+
+    def __getitem__(self, i):
+        return (self.e0, self.e1, self.e2)[i]
+
+    def __setitem__(self, i, value):
+        if i == 0 or i == -3:
+            self.e0 = float(value)
+        elif i == 1 or i == -2:
+            self.e1 = float(value)
+        elif i == 2 or i == -1:
+            self.e2 = float(value)
+        else:
+            raise IndexError("Vec3 index out of range")
+
+    def __iadd__(self, v):
+        self.e0 += v.e0
+        self.e1 += v.e1
+        self.e2 += v.e2
+        return self
+
+    def __imul__(self, t):
+        self.e0 *= t
+        self.e1 *= t
+        self.e2 *= t
+        return self
+
+    def __itruediv__(self, t):
+        self.e0 /= t
+        self.e1 /= t
+        self.e2 /= t
+        return self
+
+    def __add__(self, v):
+        return Vec3(self.e0 + v.e0, self.e1 + v.e1, self.e2 + v.e2)
+
+    def __sub__(self, v):
+        return Vec3(self.e0 - v.e0, self.e1 - v.e1, self.e2 - v.e2)
+
+    def __mul__(self, t):
+        if isinstance(t, Vec3):
+            return Vec3(self.e0 * t.e0, self.e1 * t.e1, self.e2 * t.e2)
+        else:
+            return Vec3(self.e0 * t, self.e1 * t, self.e2 * t)
+
+    def __rmul__(self, t):
+        return self.__mul__(t)
+
+    def __truediv__(self, t):
+        if t == 0:
+            return Vec3(0, 0, 0)
+        return Vec3(self.e0 / t, self.e1 / t, self.e2 / t)
+
+    def length(self):
+        return math.sqrt(self.e0 * self.e0 + self.e1 * self.e1 + self.e2 * self.e2)
+
+    def length_squared(self):
+        return self.e0 * self.e0 + self.e1 * self.e1 + self.e2 * self.e2
+
+    def near_zero(self):
+        s = 1e-8
+        return abs(self.e0) < s and abs(self.e1) < s and abs(self.e2) < s
+
+    def unit(self):
+        len = self.length()
+        if len == 0:
+            return Vec3(0, 0, 0)
+        return Vec3(self.e0 / len, self.e1 / len, self.e2 / len)
+
+    @staticmethod
+    def dot(u, v):
+        return u.e0 * v.e0 + u.e1 * v.e1 + u.e2 * v.e2
+
+    @staticmethod
+    def cross(u, v):
+        return Vec3(u.e1 * v.e2 - u.e2 * v.e1,
+                    u.e2 * v.e0 - u.e0 * v.e2,
+                    u.e0 * v.e1 - u.e1 * v.e0)
+
+    @staticmethod
+    def unit_vector(v):
+        return v.unit()
+
+    @staticmethod
+    def random_double(min, max):
+        return min + (max - min) * random.random()
+
+    @staticmethod
+    def random():
+        return Vec3(random.random(), random.random(), random.random())
+
+    @staticmethod
+    def random_range(min, max):
+        return Vec3(Vec3.random_double(min, max), Vec3.random_double(min, max), Vec3.random_double(min, max))
+
+    @staticmethod
+    def random_unit_vector():
+        while True:
+            p = Vec3.random_range(-1, 1)
+            lensq = p.length_squared()
+            if 1e-160 < lensq <= 1.0:
+                return p / math.sqrt(lensq)
+
+    @staticmethod
+    def random_in_unit_disk():
+        while True:
+            p = Vec3(Vec3.random_double(-1, 1), Vec3.random_double(-1, 1), 0)
+            if p.length_squared() < 1:
+                return p
+
+    @staticmethod
+    def random_on_hemisphere(normal):
+        on_unit_sphere = Vec3.random_unit_vector()
+        if Vec3.dot(on_unit_sphere, normal) > 0.0:
+            return on_unit_sphere
+        else:
+            return -on_unit_sphere
+
+    @staticmethod
+    def random_cosine_direction():
+        r1 = random.random()
+        r2 = random.random()
+        phi = 2 * math.pi * r1
+        x = math.cos(phi) * math.sqrt(r2)
+        y = math.sin(phi) * math.sqrt(r2)
+        z = math.sqrt(1 - r2)
+        return Vec3(x, y, z)
+
+    @staticmethod
+    def reflect(v, n):
+        return v - 2 * Vec3.dot(v, n) * n
+
+    @staticmethod
+    def refract(uv, n, etai_over_etat):
+        cos_theta = min(Vec3.dot(-uv, n), 1.0)
+        r_out_perp = etai_over_etat * (uv + cos_theta * n)
+        r_out_parallel = -math.sqrt(abs(1.0 - r_out_perp.length_squared())) * n
+        return r_out_perp + r_out_parallel
@@ -0,0 +1,489 @@
+import math
+import numpy as np
+from Vec3 import Point3
+from Sphere import Sphere
+from SphereCloud import SphereCloud
+from QuadSet import QuadSet
+from Quad import Quad
+from HittableList import HittableList
+from BVH import BVHNode
+from FlatBVH import FlatBVH, FlatNodes
+from Hittable import Translate, RotateY, Instance
+from Material import Lambertian, Metal, Dielectric, DiffuseLight, EmptyMaterial
+from Texture import SolidColor
+
+# Wavefront path tracer: instead of following one ray at a time through
+# Camera.ray_color, a whole pass of primary rays (one sample per pixel) is
+# traced together as (N, 3) arrays. Each bounce intersects every live path
+# against the flattened scene through its BVH, shades the hits material by
+# material, and drops the paths that were absorbed or escaped.
+
+def _dot(a, b):
+    return np.einsum('ij,ij->i', a, b)
+
+def _unit(a):
+    length = np.sqrt(_dot(a, a))
+    length[length == 0] = 1.0
+    return a / length[:, None]
+
+def _onb(n):
+    # Vectorized Onb: returns the u, v axes for unit normals n (w = n).
+    a = np.zeros_like(n)
+    flip = np.abs(n[:, 0]) > 0.9
+    a[flip, 1] = 1.0
+    a[~flip, 0] = 1.0
+    v = _unit(np.cross(n, a))
+    u = np.cross(n, v)
+    return u, v
+
+def _random_unit_vectors(n):
+    p = np.random.normal(size=(n, 3))
+    return _unit(p)
+
+def _rotate_y(cos_theta, sin_theta):
+    # Object-to-world rotation used by RotateY.
+    return np.array([[cos_theta, 0.0, sin_theta], [0.0, 1.0, 0.0], [-sin_theta, 0.0, cos_theta]])
+
+class SceneArrays:
+    """
+    Spheres (including SphereCloud members) and quads of a scene flattened into
+    NumPy arrays, with Translate, RotateY and Instance transforms baked into the
+    geometry. BVHNode, FlatBVH and HittableList are only walked for their
+    primitives; the spheres and the quads then get a FlatNodes tree each, and
+    a batch of rays walks those trees together, one level of (ray, node) pairs
+    at a time.
+    """
+    leaf_size = 4
+
+    def __init__(self, world):
+        self.materials = []
+        self._material_ids = {}
+        spheres, quads = [], []
+        self._collect(world, np.eye(3), np.zeros(3), spheres, quads)
+        self.sphere_count = len(spheres)
+        self.quad_count = len(quads)
+        if spheres:
+            center0, center_vec, radius, rot, mat = zip(*spheres)
+            self.sphere_center0 = np.array(center0)
+            self.sphere_center_vec = np.array(center_vec)
+            self.sphere_radius = np.array(radius)
+            self.sphere_rot = np.array(rot)
+            self.sphere_mat = np.array(mat, dtype=np.int64)
+            ends = np.stack([self.sphere_center0, self.sphere_center0 + self.sphere_center_vec])
+            r = self.sphere_radius[:, None]
+            self.sphere_nodes = self._build_nodes(ends.min(axis=0) - r, ends.max(axis=0) + r, [
+                "sphere_center0", "sphere_center_vec", "sphere_radius", "sphere_rot", "sphere_mat"])
+        if quads:
+            q, u, v, mat = zip(*quads)
+            self.quad_q = np.array(q)
+            self.quad_u = np.array(u)
+            self.quad_v = np.array(v)
+            n = np.cross(self.quad_u, self.quad_v)
+            self.quad_area = np.sqrt(_dot(n, n))
+            self.quad_normal = _unit(n)
+            self.quad_d = _dot(self.quad_normal, self.quad_q)
+            n_dot_n = _dot(n, n)
+            n_dot_n[n_dot_n == 0] = np.inf
+            self.quad_w = n / n_dot_n[:, None]
+            self.quad_mat = np.array(mat, dtype=np.int64)
+            corners = np.stack([self.quad_q, self.quad_q + self.quad_u, self.quad_q + self.quad_v,
+                                self.quad_q + self.quad_u + self.quad_v])
+            self.quad_nodes = self._build_nodes(corners.min(axis=0), corners.max(axis=0), [
+                "quad_q", "quad_u", "quad_v", "quad_area", "quad_normal", "quad_d", "quad_w", "quad_mat"])
+
+    def _build_nodes(self, lo, hi, names):
+        # Builds a FlatNodes tree over one kind of primitive and reorders that
+        # kind's arrays so the leaves index them directly.
+        nodes, order = FlatNodes.build(lo, hi, self.leaf_size)
+        for name in names:
+            setattr(self, name, getattr(self, name)[order])
+        return nodes
+
+    def _material_id(self, mat):
+        key = id(mat)
+        if key not in self._material_ids:
+            if mat is not None and type(mat) not in (Lambertian, Metal, Dielectric, DiffuseLight, EmptyMaterial):
+                raise ValueError(f"Wavefront renderer does not support material {type(mat).__name__}.")
+            self._material_ids[key] = len(self.materials)
+            self.materials.append(mat)
+        return self._material_ids[key]
+
+    def _collect(self, obj, rot, offset, spheres, quads):
+        # rot and offset map object space to world space: p_world = rot @ p + offset
+        if isinstance(obj, HittableList):
+            for child in obj.objects:
+                self._collect(child, rot, offset, spheres, quads)
+        elif isinstance(obj, BVHNode):
+            self._collect(obj.left, rot, offset, spheres, quads)
+            if obj.right is not obj.left:
+                self._collect(obj.right, rot, offset, spheres, quads)
+        elif isinstance(obj, FlatBVH):
+            for child in obj.primitives:
+                self._collect(child, rot, offset, spheres, quads)
+        elif isinstance(obj, Translate):
+            self._collect(obj.object, rot, offset + rot @ obj.offset.e, spheres, quads)
+        elif isinstance(obj, RotateY):
+            self._collect(obj.object, rot @ _rotate_y(obj.cos_theta, obj.sin_theta), offset, spheres, quads)
+        elif isinstance(obj, Instance):
+            self._collect(obj.object, rot @ obj.matrix[:3, :3], offset + rot @ obj.matrix[:3, 3], spheres, quads)
+        elif isinstance(obj, Sphere):
+            scale, frame = self._sphere_frame(obj, rot)
+            spheres.append((rot @ obj.center1.e + offset, rot @ obj.center_vec.e, obj.radius * scale,
+                            frame, self._material_id(obj.mat)))
+        elif isinstance(obj, SphereCloud):
+            scale, frame = self._sphere_frame(obj, rot)
+            for center, radius, k in zip(obj.centers, obj.radii, obj.material_index):
+                spheres.append((rot @ center + offset, np.zeros(3), float(radius) * scale,
+                                frame, self._material_id(obj.materials[k])))
+        elif isinstance(obj, QuadSet):
+            for Q, u, v, k in zip(obj.Q, obj.u, obj.v, obj.material_index):
+                quads.append((rot @ Q + offset, rot @ u, rot @ v, self._material_id(obj.materials[k])))
+        elif isinstance(obj, Quad):
+            quads.append((rot @ obj.Q.e + offset, rot @ obj.u.e, rot @ obj.v.e, self._material_id(obj.mat)))
+        else:
+            raise ValueError(f"Wavefront renderer does not support {type(obj).__name__}.")
+
+    @staticmethod
+    def _sphere_frame(obj, rot):
+        # A sphere stays a sphere only under rotation and uniform scale; returns
+        # the scale and the pure rotation used for its texture coordinates.
+        scale = float(np.linalg.norm(rot[:, 0]))
+        if scale == 0 or not np.allclose(rot.T @ rot, scale * scale * np.eye(3)):
+            raise ValueError(f"Wavefront renderer does not support a non-uniformly scaled {type(obj).__name__}.")
+        return scale, rot / scale
+
+    def sphere_roots(self, orig, dirs, times, tmin, tmax, idx):
+        """
+        Returns (N, K) nearest roots inside (tmin, tmax), inf on a miss, for
+        spheres idx: (K,) spheres tested against every ray, or (N, 1) one
+        sphere per ray.
+        """
+        centers = self.sphere_center0[idx] + times[:, None, None] * self.sphere_center_vec[idx]
+        oc = centers - orig[:, None, :]
+        a = _dot(dirs, dirs)[:, None]
+        h = np.sum(dirs[:, None, :] * oc, axis=-1)
+        c = np.sum(oc * oc, axis=-1) - self.sphere_radius[idx] ** 2
+        disc = h * h - a * c
+        sqrtd = np.sqrt(np.maximum(disc, 0.0))
+        a = np.where(a == 0, 1e-8, a)
+        lo = tmin[:, None] if np.ndim(tmin) else tmin
+        hi = tmax[:, None] if np.ndim(tmax) else tmax
+        root = (h - sqrtd) / a
+        ok = (root > lo) & (root < hi)
+        root2 = (h + sqrtd) / a
+        ok2 = ~ok & (root2 > lo) & (root2 < hi)
+        root = np.where(ok, root, np.where(ok2, root2, np.inf))
+        root[disc < 0] = np.inf
+        return root
+
+    def quad_roots(self, orig, dirs, tmin, tmax, idx):
+        # Returns (N, K) hit distances inside [tmin, tmax], inf on a miss, for
+        # quads idx, shaped as in sphere_roots.
+        normal = self.quad_normal[idx]
+        denom = np.sum(dirs[:, None, :] * normal, axis=-1)
+        parallel = np.abs(denom) < 1e-8
+        denom = np.where(parallel, 1.0, denom)
+        t = (self.quad_d[idx] - np.sum(orig[:, None, :] * normal, axis=-1)) / denom
+        lo = tmin[:, None] if np.ndim(tmin) else tmin
+        hi = tmax[:, None] if np.ndim(tmax) else tmax
+        ok = ~parallel & (t >= lo) & (t <= hi)
+        p = orig[:, None, :] + np.where(ok, t, 0.0)[:, :, None] * dirs[:, None, :]
+        pv = p - self.quad_q[idx]
+        w = self.quad_w[idx]
+        alpha = np.sum(w * np.cross(pv, self.quad_v[idx]), axis=-1)
+        beta = np.sum(w * np.cross(self.quad_u[idx], pv), axis=-1)
+        ok &= (alpha >= 0) & (alpha <= 1) & (beta >= 0) & (beta <= 1)
+        return np.where(ok, t, np.inf)
+
+    def intersect(self, orig, dirs, times, tmin, tmax):
+        """
+        Closest hit for each ray. Returns (t, kind, index) where kind is 0 for a
+        miss, 1 for a sphere and 2 for a quad.
+        """
+        n = len(orig)
+        best_t = np.full(n, tmax, dtype=np.float64)
+        kind = np.zeros(n, dtype=np.int8)
+        index = np.zeros(n, dtype=np.int64)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            inv_dirs = 1.0 / dirs
+        if self.sphere_count:
+            self.traverse(self.sphere_nodes, 1, orig, dirs, inv_dirs, times, tmin, best_t, kind, index)
+        if self.quad_count:
+            self.traverse(self.quad_nodes, 2, orig, dirs, inv_dirs, times, tmin, best_t, kind, index)
+        best_t[kind == 0] = np.inf
+        return best_t, kind, index
+
+    def traverse(self, nodes, code, orig, dirs, inv_dirs, times, tmin, best_t, kind, index):
+        # Breadth-first walk of nodes for the whole batch: every (ray, node)
+        # pair whose box the ray enters before its closest hit so far either
+        # tests the leaf's primitives or is replaced by the node's two
+        # children. best_t, kind and index are updated in place.
+        ray = np.arange(len(orig))
+        node = np.zeros(len(orig), dtype=np.int64)
+        child = nodes.node_child.astype(np.int64)
+        first = nodes.node_prim_start.astype(np.int64)
+        count = nodes.node_prim_count.astype(np.int64)
+        while len(ray):
+            o, inv = orig[ray], inv_dirs[ray]
+            with np.errstate(invalid="ignore"):
+                t0 = (nodes.node_min[node] - o) * inv
+                t1 = (nodes.node_max[node] - o) * inv
+            # fmin and fmax skip the NaN of a ray lying in a slab plane.
+            near = np.fmax(np.fmax.reduce(np.fmin(t0, t1), axis=1), tmin)
+            far = np.fmin(np.fmin.reduce(np.fmax(t0, t1), axis=1), best_t[ray])
+            entered = near <= far
+            ray, node = ray[entered], node[entered]
+            leaf = count[node] > 0
+            if leaf.any():
+                leaf_rays, leaf_nodes = ray[leaf], node[leaf]
+                runs = count[leaf_nodes]
+                pair_ray = np.repeat(leaf_rays, runs)
+                offsets = np.arange(len(pair_ray)) - np.repeat(np.cumsum(runs) - runs, runs)
+                prim = np.repeat(first[leaf_nodes], runs) + offsets
+                if code == 1:
+                    roots = self.sphere_roots(orig[pair_ray], dirs[pair_ray], times[pair_ray], tmin,
+                                              best_t[pair_ray], prim[:, None])[:, 0]
+                else:
+                    roots = self.quad_roots(orig[pair_ray], dirs[pair_ray], tmin, best_t[pair_ray],
+                                            prim[:, None])[:, 0]
+                closer = roots < best_t[pair_ray]
+                pair_ray, prim, roots = pair_ray[closer], prim[closer], roots[closer]
+                np.minimum.at(best_t, pair_ray, roots)
+                nearest = roots == best_t[pair_ray]
+                kind[pair_ray[nearest]] = code
+                index[pair_ray[nearest]] = prim[nearest]
+            inner = ~leaf
+            ray = np.repeat(ray[inner], 2)
+            node = np.stack([node[inner] + 1, child[node[inner]]], axis=1).ravel()
+
+class LightArrays:
+    """Vectorized HittableList.pdf_value / random over a list of sphere and quad lights."""
+    def __init__(self, lights):
+        self.scene = SceneArrays(lights)
+        self.count = self.scene.sphere_count + self.scene.quad_count
+
+    def pdf_value(self, orig, dirs):
+        if self.count == 0:
+            return np.zeros(len(orig))
+        s = self.scene
+        zeros = np.zeros(len(orig))
+        total = np.zeros(len(orig))
+        for i in range(s.sphere_count):
+            idx = np.array([i])
+            t = s.sphere_roots(orig, dirs, zeros, 0.001, np.inf, idx)[:, 0]
+            dist_sq = _dot(s.sphere_center0[i] - orig, s.sphere_center0[i] - orig)
+            r2 = s.sphere_radius[i] ** 2
+            valid = np.isfinite(t) & (dist_sq > 0) & (r2 <= dist_sq)
+            cos_theta_max = np.sqrt(np.clip(1 - r2 / np.where(valid, dist_sq, 1.0), 0.0, 1.0))
+            solid_angle = 2 * math.pi * (1 - cos_theta_max)
+            valid &= solid_angle > 0
+            total += np.where(valid, 1.0 / np.where(valid, solid_angle, 1.0), 0.0)
+        for i in range(s.quad_count):
+            idx = np.array([i])
+            t = s.quad_roots(orig, dirs, 0.001, np.inf, idx)[:, 0]
+            hit = np.isfinite(t)
+            length_sq = _dot(dirs, dirs)
+            dist_sq = np.where(hit, t, 0.0) ** 2 * length_sq
+            cosine = np.abs(dirs @ s.quad_normal[i]) / np.sqrt(length_sq)
+            valid = hit & (cosine >= 1e-8)
+            total += np.where(valid, dist_sq / np.where(valid, cosine * s.quad_area[i], 1.0), 0.0)
+        return total / self.count
+
+    def random(self, orig):
+        n = len(orig)
+        if self.count == 0:
+            return np.tile([1.0, 0.0, 0.0], (n, 1))
+        s = self.scene
+        pick = np.random.randint(0, self.count, n)
+        dirs = np.zeros((n, 3))
+        is_sphere = pick < s.sphere_count
+        if is_sphere.any():
+            k = pick[is_sphere]
+            direction = s.sphere_center0[k] - orig[is_sphere]
+            dist_sq = _dot(direction, direction)
+            r2 = s.sphere_radius[k] ** 2
+            r1, rr2 = np.random.random(len(k)), np.random.random(len(k))
+            inside = (dist_sq == 0) | (r2 > dist_sq)
+            z = np.where(inside, 1.0, 1 + rr2 * (np.sqrt(np.clip(1 - r2 / np.where(dist_sq == 0, 1.0, dist_sq), 0, 1)) - 1))
+            phi = 2 * math.pi * r1
+            sz = np.sqrt(np.maximum(0.0, 1 - z * z))
+            w = _unit(direction)
+            u, v = _onb(w)
+            dirs[is_sphere] = (np.cos(phi) * sz)[:, None] * u + (np.sin(phi) * sz)[:, None] * v + z[:, None] * w
+        is_quad = ~is_sphere
+        if is_quad.any():
+            k = pick[is_quad] - s.sphere_count
+            ru, rv = np.random.random(len(k)), np.random.random(len(k))
+            p = s.quad_q[k] + ru[:, None] * s.quad_u[k] + rv[:, None] * s.quad_v[k]
+            dirs[is_quad] = p - orig[is_quad]
+        return dirs
+
+def _texture_values(tex, u, v, p):
+    if isinstance(tex, SolidColor):
+        return np.broadcast_to(tex.albedo.e, p.shape)
+    # Procedural and image textures fall back to the scalar texture per hit.
+    return np.array([tex.value(u[k], v[k], Point3(*p[k])).e for k in range(len(p))]).reshape(p.shape)
+
+def _reflectance(cosine, ref_idx):
+    r0 = ((1 - ref_idx) / (1 + ref_idx)) ** 2
+    return r0 + (1 - r0) * (1 - cosine) ** 5
+
+class WavefrontRenderer:
+    batch_size = 16384
+
+    def __init__(self, cam, world, lights):
+        self.cam = cam
+        self.scene = SceneArrays(world)
+        self.lights = LightArrays(lights)
+        self.background = np.array(cam.background.e, dtype=np.float64)
+
+    def primary_rays(self, s_i=None, s_j=None):
+        # One sample per pixel in scanline order, in stratum (s_i, s_j) if given
+        # and jittered over the whole pixel otherwise.
+        cam = self.cam
+        w, h = cam.image_width, cam.image_height
+        jj, ii = np.mgrid[0:h, 0:w]
+        ii, jj = ii.ravel(), jj.ravel()
+        n = len(ii)
+        if s_i is None:
+            px = np.random.random(n) - 0.5
+            py = np.random.random(n) - 0.5
+        else:
+            px = ((s_i + np.random.random(n)) * cam.recip_sqrt_spp) - 0.5
+            py = ((s_j + np.random.random(n)) * cam.recip_sqrt_spp) - 0.5
+        pixel = (cam.pixel00_loc.e[None, :] + (ii + px)[:, None] * cam.pixel_delta_u.e[None, :]
+                 + (jj + py)[:, None] * cam.pixel_delta_v.e[None, :])
+        if cam.defocus_angle <= 0:
+            orig = np.broadcast_to(cam.center.e, (n, 3)).copy()
+        else:
+            r = np.sqrt(np.random.random(n))
+            theta = 2 * math.pi * np.random.random(n)
+            orig = (cam.center.e[None, :] + (r * np.cos(theta))[:, None] * cam.defocus_disk_u.e[None, :]
+                    + (r * np.sin(theta))[:, None] * cam.defocus_disk_v.e[None, :])
+        return orig, pixel - orig, np.random.random(n)
+
+    def trace(self, orig, dirs, times):
+        """Traces a batch of paths to completion; returns (N, 3) radiance."""
+        n = len(orig)
+        radiance = np.zeros((n, 3))
+        throughput = np.ones((n, 3))
+        alive = np.arange(n)
+        scene = self.scene
+        for bounce in range(self.cam.max_depth):
+            if len(alive) == 0:
+                break
+            t, kind, index = scene.intersect(orig, dirs, times, 0.001, np.inf)
+            missed = kind == 0
+            radiance[alive[missed]] += throughput[missed] * self.background
+            keep = ~missed
+            alive, orig, dirs, times, throughput = alive[keep], orig[keep], dirs[keep], times[keep], throughput[keep]
+            t, kind, index = t[keep], kind[keep], index[keep]
+            if len(alive) == 0:
+                break
+
+            # Surface interaction for every hit.
+            p = orig + t[:, None] * dirs
+            outward = np.zeros_like(p)
+            u = np.zeros(len(p))
+            v = np.zeros(len(p))
+            mat = np.zeros(len(p), dtype=np.int64)
+            sph = kind == 1
+            if sph.any():
+                k = index[sph]
+                centers = scene.sphere_center0[k] + times[sph][:, None] * scene.sphere_center_vec[k]
+                outward[sph] = (p[sph] - centers) / scene.sphere_radius[k][:, None]
+                local = np.einsum('kji,kj->ki', scene.sphere_rot[k], outward[sph])
+                u[sph] = (np.arctan2(-local[:, 2], local[:, 0]) + math.pi) / (2 * math.pi)
+                v[sph] = np.arccos(np.clip(-local[:, 1], -1.0, 1.0)) / math.pi
+                mat[sph] = scene.sphere_mat[k]
+            qd = kind == 2
+            if qd.any():
+                k = index[qd]
+                outward[qd] = scene.quad_normal[k]
+                pv = p[qd] - scene.quad_q[k]
+                u[qd] = _dot(scene.quad_w[k], np.cross(pv, scene.quad_v[k]))
+                v[qd] = _dot(scene.quad_w[k], np.cross(scene.quad_u[k], pv))
+                mat[qd] = scene.quad_mat[k]
+            front = _dot(dirs, outward) < 0
+            normal = np.where(front[:, None], outward, -outward)
+
+            new_dirs = np.zeros_like(dirs)
+            weight = np.zeros_like(throughput)
+            for m_id in np.unique(mat):
+                sel = mat == m_id
+                m = scene.materials[m_id]
+                if isinstance(m, DiffuseLight):
+                    emit = _texture_values(m.tex, u[sel], v[sel], p[sel]) * front[sel][:, None]
+                    radiance[alive[sel]] += throughput[sel] * emit
+                elif isinstance(m, Lambertian):
+                    new_dirs[sel], weight[sel] = self.shade_lambertian(m, p[sel], normal[sel], u[sel], v[sel])
+                elif isinstance(m, Metal):
+                    d = dirs[sel]
+                    nn = normal[sel]
+                    reflected = d - 2 * _dot(d, nn)[:, None] * nn
+                    new_dirs[sel] = _unit(reflected) + m.fuzz * _random_unit_vectors(len(d))
+                    weight[sel] = m.albedo.e
+                elif isinstance(m, Dielectric):
+                    new_dirs[sel] = self.shade_dielectric(m, dirs[sel], normal[sel], front[sel])
+                    weight[sel] = 1.0
+            throughput = throughput * weight
+            survive = np.any(weight != 0, axis=1)
+            if self.cam.rr_min_depth is not None and bounce >= self.cam.rr_min_depth:
+                # Russian roulette, as in Camera.ray_color.
+                chance = np.minimum(throughput.max(axis=1), 0.95)
+                survive &= np.random.random(len(chance)) < chance
+                throughput = throughput / np.where(survive, chance, 1.0)[:, None]
+            alive, orig, dirs, times, throughput = alive[survive], p[survive], new_dirs[survive], times[survive], throughput[survive]
+        return radiance
+
+    def shade_lambertian(self, m, p, normal, u, v):
+        # Mixture of light sampling and cosine sampling, as in Camera.ray_color.
+        n = len(p)
+        att = _texture_values(m.tex, u, v, p)
+        r1, r2 = np.random.random(n), np.random.random(n)
+        phi = 2 * math.pi * r1
+        local = np.stack([np.cos(phi) * np.sqrt(r2), np.sin(phi) * np.sqrt(r2), np.sqrt(1 - r2)], axis=1)
+        bu, bv = _onb(normal)
+        cos_dirs = local[:, :1] * bu + local[:, 1:2] * bv + local[:, 2:] * normal
+        use_light = np.random.random(n) < 0.5
+        dirs = np.where(use_light[:, None], self.lights.random(p), cos_dirs)
+        cosine = _dot(_unit(dirs), normal)
+        cos_pdf = np.maximum(0.0, cosine / math.pi)
+        pdf = 0.5 * self.lights.pdf_value(p, dirs) + 0.5 * cos_pdf
+        scattering_pdf = np.where(cosine < 0, 0.0, cosine / math.pi)
+        ratio = np.where(pdf > 0, scattering_pdf / np.where(pdf > 0, pdf, 1.0), 0.0)
+        return dirs, att * ratio[:, None]
+
+    def shade_dielectric(self, m, dirs, normal, front):
+        ri = np.where(front, 1.0 / m.refraction_index, m.refraction_index)
+        unit_dir = _unit(dirs)
+        cos_theta = np.minimum(_dot(-unit_dir, normal), 1.0)
+        sin_theta = np.sqrt(np.maximum(0.0, 1.0 - cos_theta * cos_theta))
+        reflect = (ri * sin_theta > 1.0) | (_reflectance(cos_theta, ri) > np.random.random(len(dirs)))
+        reflected = unit_dir - 2 * _dot(unit_dir, normal)[:, None] * normal
+        r_out_perp = ri[:, None] * (unit_dir + cos_theta[:, None] * normal)
+        r_out_parallel = -np.sqrt(np.abs(1.0 - _dot(r_out_perp, r_out_perp)))[:, None] * normal
+        return np.where(reflect[:, None], reflected, r_out_perp + r_out_parallel)
+
+    def render(self):
+        """Returns a (height, width, 3) array of averaged linear pixel colors."""
+        cam = self.cam
+        total = np.zeros((cam.image_height * cam.image_width, 3))
+        # Stratified passes for the largest square of samples, jittered ones for the rest.
+        passes = cam.samples_per_pixel
+        strata = cam.sqrt_spp * cam.sqrt_spp
+        for s in range(passes):
+            print(f"Wavefront passes remaining: {passes - s}.")
+            if s < strata:
+                orig, dirs, times = self.primary_rays(s % cam.sqrt_spp, s // cam.sqrt_spp)
+            else:
+                orig, dirs, times = self.primary_rays()
+            for start in range(0, len(orig), self.batch_size):
+                end = start + self.batch_size
+                total[start:end] += self.trace(orig[start:end], dirs[start:end], times[start:end])
+        return (total * cam.pixel_samples_scale).reshape(cam.image_height, cam.image_width, 3)
+
+def render_wavefront(cam, world, lights):
+    if cam.seed is not None:
+        np.random.seed(cam.seed)
+    return WavefrontRenderer(cam, world, lights).render()
@@ -0,0 +1,64 @@
+# BVH build time per primitive for the median, SAH and Morton-code (LBVH)
+# builders on random sphere clouds of growing size, with the SAH cost and the
+# trace time of each resulting tree so build speed can be weighed against
+# tree quality. The median and SAH builders are skipped above 20000 spheres,
+# where they take minutes.
+#     python bench_build.py                 # 1000, 10000 and 100000 spheres
+#     python bench_build.py 200000 --workers 0
+import sys
+import random
+import time
+import argparse
+from Vec3 import Vec3, Point3, Color
+from Sphere import Sphere
+from Material import Lambertian
+from Ray import Ray
+from Interval import Interval
+from Hittable import HitRecord
+from BVH import BVHNode
+
+def sphere_cloud(count):
+    random.seed(20)
+    white = Lambertian(Color(0.73, 0.73, 0.73))
+    # Constant density, so primitives per unit volume stay the same as count grows.
+    side = 100.0 * count ** (1 / 3)
+    return [Sphere(Point3(random.uniform(0, side), random.uniform(0, side), random.uniform(0, side)),
+                   random.uniform(5, 15), white) for _ in range(count)]
+
+def random_rays(objects, count):
+    random.seed(7)
+    rays = []
+    for _ in range(count):
+        origin = random.choice(objects).center1
+        direction = Vec3(random.gauss(0, 1), random.gauss(0, 1), random.gauss(0, 1))
+        rays.append(Ray(origin + direction * 20, direction))
+    return rays
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time the BVH builders.")
+    parser.add_argument("counts", type=int, nargs="*", default=[1000, 10000, 100000])
+    parser.add_argument("--workers", type=int, default=1, help="LBVH worker processes; 0 uses every core")
+    args = parser.parse_args(sys.argv[1:] if argv is None else argv)
+    for count in args.counts:
+        objects = sphere_cloud(count)
+        rays = random_rays(objects, 1000)
+        print(f"{count} spheres")
+        builds = [("median", {}), ("sah", {}), ("lbvh", {})]
+        if args.workers != 1:
+            builds.append(("lbvh", {"workers": args.workers}))
+        for split, options in builds:
+            if split != "lbvh" and count > 20000:
+                continue
+            start = time.perf_counter()
+            bvh = BVHNode(objects, split=split, **options)
+            build = time.perf_counter() - start
+            start = time.perf_counter()
+            for r in rays:
+                bvh.hit(r, Interval(0.001, float('inf')), HitRecord())
+            trace = time.perf_counter() - start
+            name = split if not options else f"{split} x{options['workers']}"
+            print(f"  {name:<10} build {build:7.2f} s  {build / count * 1e6:6.1f} us/primitive   "
+                  f"SAH cost {bvh.sah_cost():7.2f}   trace {trace / len(rays) * 1e3:6.3f} ms/ray")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+# Compares the median-split, SAH and Morton-code (LBVH) BVH builders on the
+# geometry of main14.py (400 ground boxes of random heights plus a 1000-sphere
+# cluster): build time, estimated SAH cost, and measured node visits and
+# primitive tests per ray, plus the trace time of each tree after flattening
+# it into a FlatBVH.
+import random
+import time
+from Vec3 import Vec3, Point3, Color
+from Sphere import Sphere
+from Quad import Quad, box
+from Material import Lambertian
+from Camera import Camera
+from Interval import Interval
+from Hittable import HitRecord
+from BVH import BVHNode
+from FlatBVH import FlatBVH
+
+def build_primitives():
+    random.seed(14)
+    ground = Lambertian(Color(0.48, 0.83, 0.53))
+    white = Lambertian(Color(0.73, 0.73, 0.73))
+    objects = []
+    w = 100.0
+    for i in range(20):
+        for j in range(20):
+            x0 = -1000.0 + i * w
+            z0 = -1000.0 + j * w
+            objects.extend(box(Point3(x0, 0.0, z0), Point3(x0 + w, random.uniform(1, 101), z0 + w), ground).objects)
+    for _ in range(1000):
+        center = Point3(random.uniform(0, 165), random.uniform(0, 165), random.uniform(0, 165))
+        objects.append(Sphere(center + Vec3(-100, 270, 395), 10, white))
+    return objects
+
+def camera_rays(count):
+    cam = Camera()
+    cam.aspect_ratio = 1.0
+    cam.image_width = 200
+    cam.vfov = 40
+    cam.lookfrom = Point3(278, 278, -600)
+    cam.lookat = Point3(278, 278, 0)
+    cam.initialize()
+    random.seed(7)
+    return [cam.get_ray(random.randrange(cam.image_width), random.randrange(cam.image_height)) for _ in range(count)]
+
+class Counter:
+    # Wraps the intersect methods to count node visits and primitive tests
+    def __init__(self):
+        self.nodes = 0
+        self.prims = 0
+        self.originals = {}
+
+    def install(self):
+        for cls, attr in ((BVHNode, "nodes"), (Quad, "prims"), (Sphere, "prims")):
+            original = cls.intersect
+            self.originals[cls] = original
+            def counted(obj, r, ray_t, original=original, attr=attr):
+                setattr(self, attr, getattr(self, attr) + 1)
+                return original(obj, r, ray_t)
+            cls.intersect = counted
+
+    def uninstall(self):
+        for cls, original in self.originals.items():
+            cls.intersect = original
+
+def main():
+    objects = build_primitives()
+    rays = camera_rays(2000)
+    print(f"{len(objects)} primitives, {len(rays)} camera rays")
+    for split in ("median", "sah", "lbvh"):
+        start = time.perf_counter()
+        bvh = BVHNode(objects, split=split)
+        build = time.perf_counter() - start
+        counter = Counter()
+        counter.install()
+        start = time.perf_counter()
+        for r in rays:
+            bvh.hit(r, Interval(0.001, float('inf')), HitRecord())
+        trace = time.perf_counter() - start
+        counter.uninstall()
+        print(f"{split:<6} build {build:6.2f} s   SAH cost {bvh.sah_cost():7.2f}   "
+              f"nodes/ray {counter.nodes / len(rays):6.1f}   prims/ray {counter.prims / len(rays):6.1f}   "
+              f"trace {trace / len(rays) * 1e3:6.2f} ms/ray")
+        flat = FlatBVH(bvh)
+        start = time.perf_counter()
+        for r in rays:
+            flat.hit(r, Interval(0.001, float('inf')), HitRecord())
+        trace = time.perf_counter() - start
+        print(f"{split:<6} flattened to {flat.node_count()} nodes   trace {trace / len(rays) * 1e3:6.2f} ms/ray")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+# Time of the guided a-trous denoiser against the samples it saves, on a small
+# render of the main30.py Cornell box. Each sample count is rendered, then
+# denoised with guides from Camera.render_guides, and both are compared with a
+# high sample reference (mean absolute error). Monte Carlo error falls as
+# 1/sqrt(spp), so a denoised error e matches an undenoised render at about
+# spp * (raw error / e)^2 samples; the render time of the difference is what
+# the denoiser saves.
+#     python bench_denoise.py
+#     python bench_denoise.py --width 32 --spp 16 32 64 --reference-spp 1024
+import sys
+import time
+import argparse
+import numpy as np
+from bench_path import cornell_box
+from Denoise import denoise
+
+def render(spp, width, seed):
+    cam, world, lights = cornell_box()
+    cam.image_width = width
+    cam.samples_per_pixel = spp
+    cam.max_depth = 10
+    cam.seed = seed
+    start = time.perf_counter()
+    image = cam.render_framebuffer(world, lights)
+    return image, time.perf_counter() - start
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure the samples the denoiser saves against its run time.")
+    parser.add_argument("--spp", type=int, nargs="*", default=[4, 8, 16, 32])
+    parser.add_argument("--width", type=int, default=24)
+    parser.add_argument("--reference-spp", type=int, default=256)
+    args = parser.parse_args(sys.argv[1:] if argv is None else argv)
+
+    reference, seconds = render(args.reference_spp, args.width, seed=0)
+    print(f"Cornell box {args.width}px, reference {args.reference_spp} spp in {seconds:.0f} s")
+    cam, world, _ = cornell_box()
+    cam.image_width = args.width
+    start = time.perf_counter()
+    guides = cam.render_guides(world)
+    guide_time = time.perf_counter() - start
+    print(f"  guides ({cam.guide_samples} rays per pixel) in {guide_time:.2f} s")
+
+    for spp in args.spp:
+        image, render_time = render(spp, args.width, seed=1)
+        start = time.perf_counter()
+        filtered = denoise(image, *guides)
+        denoise_time = time.perf_counter() - start
+        raw = float(np.mean(np.abs(image - reference)))
+        error = float(np.mean(np.abs(filtered - reference)))
+        matching = spp * (raw / error) ** 2
+        saved = render_time / spp * (matching - spp)
+        print(f"  {spp:4d} spp  render {render_time:5.1f} s  error {raw:.4f} -> {error:.4f} "
+              f"(denoise {denoise_time:.2f} s)  ~ {matching:6.0f} spp undenoised, "
+              f"{saved:6.1f} s of rendering saved for {guide_time + denoise_time:.2f} s")
+
+if __name__ == "__main__":
+    main()
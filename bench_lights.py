@@ -0,0 +1,97 @@
+# Uniform light selection (HittableList) against power-weighted selection
+# (LightSampler) on a room lit by a grid of ceiling lights where a few bright
+# lights outshine many dim ones. Reports the time of one light pdf evaluation
+# and one light sample, then the error of a small render against a high sample
+# reference at equal sample counts.
+#     python bench_lights.py
+#     python bench_lights.py --grid 16 --spp 4 16
+import sys
+import time
+import random
+import argparse
+import numpy as np
+from Vec3 import Vec3, Point3, Color
+from HittableList import HittableList
+from Quad import Quad
+from Material import Lambertian, DiffuseLight, EmptyMaterial
+from BVH import BVHNode
+from Camera import Camera
+from LightSampler import LightSampler
+
+def light_grid(grid):
+    # A grid x grid ceiling of small lights; one in eight is 50 times brighter.
+    # As in the scene files, the lights list only repeats their shapes.
+    world = HittableList()
+    lights = HittableList()
+    white = Lambertian(Color(.73, .73, .73))
+    world.add(Quad(Point3(0, 0, 0), Vec3(555, 0, 0), Vec3(0, 0, 555), white))
+    world.add(Quad(Point3(0, 0, 555), Vec3(555, 0, 0), Vec3(0, 555, 0), white))
+    dim, bright = DiffuseLight(Color(1, 1, 1)), DiffuseLight(Color(50, 50, 50))
+    empty = EmptyMaterial()
+    cell = 555 / grid
+    for k in range(grid * grid):
+        mat = bright if k % 8 == 3 else dim
+        q = Point3((k % grid + 0.3) * cell, 554, (k // grid + 0.3) * cell)
+        world.add(Quad(q, Vec3(0.4 * cell, 0, 0), Vec3(0, 0, 0.4 * cell), mat))
+        lights.add(Quad(q, Vec3(0.4 * cell, 0, 0), Vec3(0, 0, 0.4 * cell), empty))
+    world = BVHNode(world.objects)
+
+    cam = Camera()
+    cam.aspect_ratio = 1.0
+    cam.max_depth = 4
+    cam.background = Color(0, 0, 0)
+    cam.vfov = 40
+    cam.lookfrom = Point3(278, 278, -800)
+    cam.lookat = Point3(278, 278, 0)
+    cam.vup = Vec3(0, 1, 0)
+    cam.defocus_angle = 0
+    return cam, world, lights
+
+def time_queries(lights, count=2000):
+    random.seed(23)
+    origins = [Point3(random.uniform(0, 555), 0.0, random.uniform(0, 555)) for _ in range(count)]
+    start = time.perf_counter()
+    directions = [lights.random(o) for o in origins]
+    sample = time.perf_counter() - start
+    start = time.perf_counter()
+    for o, d in zip(origins, directions):
+        lights.pdf_value(o, d)
+    return sample / count, (time.perf_counter() - start) / count
+
+def render(selection, spp, width, seed):
+    cam, world, lights = light_grid(render.grid)
+    cam.image_width = width
+    cam.samples_per_pixel = spp
+    cam.seed = seed
+    cam.light_selection = selection
+    start = time.perf_counter()
+    image = cam.render_framebuffer(world, lights)
+    return image, time.perf_counter() - start
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare uniform and power-weighted light selection.")
+    parser.add_argument("--grid", type=int, default=8, help="lights per side of the ceiling grid")
+    parser.add_argument("--spp", type=int, nargs="*", default=[4, 16])
+    parser.add_argument("--width", type=int, default=12)
+    parser.add_argument("--reference-spp", type=int, default=256)
+    args = parser.parse_args(sys.argv[1:] if argv is None else argv)
+    render.grid = args.grid
+
+    _, world, lights = light_grid(args.grid)
+    print(f"{len(lights.objects)} lights")
+    for name, selection in [("uniform", lights), ("power", LightSampler(lights.objects, world=world))]:
+        sample, pdf = time_queries(selection)
+        print(f"  {name:<8} random {sample * 1e6:7.1f} us  pdf_value {pdf * 1e6:7.1f} us")
+
+    start = time.perf_counter()
+    reference, _ = render("power", args.reference_spp, args.width, seed=0)
+    print(f"{args.width}px, reference {args.reference_spp} spp in {time.perf_counter() - start:.0f} s; mean absolute error")
+    for spp in args.spp:
+        results = []
+        for selection in ["uniform", "power"]:
+            image, seconds = render(selection, spp, args.width, seed=1)
+            results.append(f"{selection} {float(np.mean(np.abs(image - reference))):.4f} in {seconds:5.1f} s")
+        print(f"  {spp:4d} spp  " + "  ".join(results))
+
+if __name__ == "__main__":
+    main()
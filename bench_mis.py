@@ -0,0 +1,51 @@
+# Error and render time of the mixture integrator against multiple importance
+# sampling with the power and balance heuristics, on a small render of the
+# main30.py Cornell box. Error is the mean absolute difference from a high
+# sample reference, the average of a "mixture" and an "mis" render of half the
+# samples each, so neither integrator is compared against its own estimator.
+# Halving Monte Carlo noise takes four times the samples, so error^2 x time is
+# the cost of reaching equal noise (lower is better).
+#     python bench_mis.py
+#     python bench_mis.py --spp 16 64 --reference-spp 1024 --width 16
+import sys
+import time
+import argparse
+import numpy as np
+from bench_path import cornell_box
+
+def render(integrator, heuristic, spp, width, seed):
+    cam, world, lights = cornell_box()
+    cam.image_width = width
+    cam.samples_per_pixel = spp
+    cam.max_depth = 10
+    cam.seed = seed
+    cam.integrator = integrator
+    cam.mis_heuristic = heuristic
+    start = time.perf_counter()
+    image = cam.render_framebuffer(world, lights)
+    return image, time.perf_counter() - start, cam.path_stats["rays"]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare the mixture and MIS integrators at equal sample counts.")
+    parser.add_argument("--spp", type=int, nargs="*", default=[4, 16])
+    parser.add_argument("--width", type=int, default=12)
+    parser.add_argument("--reference-spp", type=int, default=256)
+    args = parser.parse_args(sys.argv[1:] if argv is None else argv)
+
+    start = time.perf_counter()
+    half = max(args.reference_spp // 2, 1)
+    mixture, _, _ = render("mixture", "power", half, args.width, seed=0)
+    mis, _, _ = render("mis", "power", half, args.width, seed=2)
+    reference = (mixture + mis) / 2
+    print(f"Cornell box {args.width}px, reference {args.reference_spp} spp in {time.perf_counter() - start:.0f} s")
+    for spp in args.spp:
+        print(f"  {spp} spp")
+        for integrator, heuristic in [("mixture", "power"), ("mis", "power"), ("mis", "balance")]:
+            image, seconds, rays = render(integrator, heuristic, spp, args.width, seed=1)
+            error = float(np.mean(np.abs(image - reference)))
+            name = integrator if integrator == "mixture" else f"mis {heuristic}"
+            print(f"    {name:<12} error {error:.4f}  time {seconds:6.1f} s  rays/sample {rays / (spp * len(image) * len(image[0])):5.1f}"
+                  f"  error^2 x time {error * error * seconds:.5f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+# Shadow-ray cost of the any-hit query Hittable.occluded against a closest-hit
+# query through hit(), on the main30.py Cornell box and on the main14.py scene's
+# boxes and spheres built as individual Quads and Spheres under a BVHNode
+# (bench_bvh.build_primitives), which the counters below can see into.
+# Shadow rays run from the first hit of random camera rays to random points on
+# the ceiling light; the counters are BVH box tests and primitive tests per ray.
+# Run with RT_VEC3_BACKEND=slots to measure the float Vec3 backend.
+import random
+import time
+from Vec3 import Point3, Vec3
+from Ray import Ray
+from Interval import Interval
+from Hittable import HitRecord
+from Aabb import Aabb
+from Sphere import Sphere
+from Quad import Quad
+from BVH import BVHNode
+from bench_bvh import camera_rays, build_primitives
+from bench_path import cornell_box
+
+class Counter:
+    # Wraps Aabb.hit and the primitive queries to count work per shadow ray
+    def __init__(self):
+        self.boxes = 0
+        self.prims = 0
+        self.originals = []
+
+    def wrap(self, cls, name, attr):
+        original = getattr(cls, name)
+        self.originals.append((cls, name, original))
+        def counted(*args, original=original, attr=attr):
+            setattr(self, attr, getattr(self, attr) + 1)
+            return original(*args)
+        setattr(cls, name, counted)
+
+    def install(self):
+        self.wrap(Aabb, "hit", "boxes")
+        for cls in (Sphere, Quad):
+            self.wrap(cls, "intersect", "prims")
+
+    def uninstall(self):
+        for cls, name, original in reversed(self.originals):
+            setattr(cls, name, original)
+
+def shadow_rays(world, rays, light_q, light_u, light_v):
+    # Each shadow ray reaches the light at t = 1.
+    random.seed(3)
+    shadows = []
+    rec = HitRecord()
+    for r in rays:
+        if world.hit(r, Interval(0.001, float('inf')), rec):
+            target = light_q + random.random() * light_u + random.random() * light_v
+            shadows.append(Ray(rec.p, target - rec.p))
+    return shadows
+
+def closest_hit(world, shadows):
+    rec = HitRecord()
+    return [world.hit(r, Interval(0.001, 0.999), rec) for r in shadows]
+
+def any_hit(world, shadows):
+    return [world.occluded(r, 0.999) for r in shadows]
+
+def measure(name, world, shadows):
+    results = {}
+    for query in (closest_hit, any_hit):
+        counter = Counter()
+        counter.install()
+        random.seed(5)
+        blocked = query(world, shadows)
+        counter.uninstall()
+        best = float('inf')
+        for _ in range(3):
+            random.seed(5)
+            start = time.perf_counter()
+            query(world, shadows)
+            best = min(best, time.perf_counter() - start)
+        n = len(shadows)
+        results[query.__name__] = blocked
+        print(f"{name:<8} {query.__name__:<11} boxes/ray {counter.boxes / n:6.1f}   prims/ray {counter.prims / n:6.1f}   "
+              f"{best / n * 1e6:7.1f} us/ray   {sum(blocked) / n:5.1%} occluded")
+    return results
+
+def main():
+    cam, world, _ = cornell_box()
+    cam.initialize()
+    random.seed(7)
+    rays = [cam.get_ray(random.randrange(cam.image_width), random.randrange(cam.image_height)) for _ in range(500)]
+    shadows = shadow_rays(world, rays, Point3(213, 554, 227), Vec3(130, 0, 0), Vec3(0, 0, 105))
+    results = measure("cornell", world, shadows)
+    print(f"cornell  queries agree: {results['closest_hit'] == results['any_hit']}")
+
+    world = BVHNode(build_primitives())
+    shadows = shadow_rays(world, camera_rays(500), Point3(123, 554, 147), Vec3(300, 0, 0), Vec3(0, 0, 265))
+    results = measure("main14", world, shadows)
+    print(f"main14   queries agree: {results['closest_hit'] == results['any_hit']}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+# Rays per second of the iterative Camera.ray_color against the original
+# recursive integrator, on the main30.py Cornell box at low resolution.
+# Run with RT_VEC3_BACKEND=slots to measure the float Vec3 backend.
+import time
+import random
+import functools
+from Vec3 import Vec3, Point3, Color
+from HittableList import HittableList
+from Hittable import HitRecord, RotateY, Translate
+from Interval import Interval
+from Ray import Ray
+from Pdf import CosinePdf, HittablePdf, MixturePdf
+from Sphere import Sphere
+from Camera import Camera
+from Material import ScatterRecord, Lambertian, Dielectric, DiffuseLight, EmptyMaterial
+from Quad import Quad, box
+from BVH import BVHNode
+
+def cornell_box():
+    world = HittableList()
+    red = Lambertian(Color(.65, .05, .05))
+    white = Lambertian(Color(.73, .73, .73))
+    green = Lambertian(Color(.12, .45, .15))
+    light = DiffuseLight(Color(15, 15, 15))
+    world.add(Quad(Point3(555,0,0), Vec3(0,0,555), Vec3(0,555,0), green))
+    world.add(Quad(Point3(0,0,555), Vec3(0,0,-555), Vec3(0,555,0), red))
+    world.add(Quad(Point3(0,555,0), Vec3(555,0,0), Vec3(0,0,555), white))
+    world.add(Quad(Point3(0,0,555), Vec3(555,0,0), Vec3(0,0,-555), white))
+    world.add(Quad(Point3(555,0,555), Vec3(-555,0,0), Vec3(0,555,0), white))
+    world.add(Quad(Point3(213,554,227), Vec3(130,0,0), Vec3(0,0,105), light))
+    box1 = box(Point3(0,0,0), Point3(165,330,165), white)
+    box1 = RotateY(box1, 15)
+    box1 = Translate(box1, Vec3(265,0,295))
+    world.add(box1)
+    world.add(Sphere(Point3(190,90,190), 90, Dielectric(1.5)))
+    world = BVHNode(world.objects, 0, len(world.objects))
+
+    empty_material = EmptyMaterial()
+    lights = HittableList()
+    lights.add(Quad(Point3(343,554,332), Vec3(-130,0,0), Vec3(0,0,-105), empty_material))
+    lights.add(Sphere(Point3(190, 90, 190), 90, empty_material))
+
+    cam = Camera()
+    cam.aspect_ratio = 1.0
+    cam.image_width = 32
+    cam.samples_per_pixel = 16
+    cam.max_depth = 50
+    cam.background = Vec3(0, 0, 0)
+    cam.vfov = 40
+    cam.lookfrom = Point3(278, 278, -800)
+    cam.lookat = Point3(278, 278, 0)
+    cam.vup = Vec3(0, 1, 0)
+    cam.defocus_angle = 0
+    cam.seed = 30
+    return cam, world, lights
+
+def ray_color_recursive(cam, r, depth, world, lights, sampler=None, throughput=None):
+    # The original recursive integrator that Camera.ray_color replaced, kept here
+    # as the baseline it is measured against.
+    # throughput is the path weight so far, used only for Russian roulette.
+    # If we've exceeded the ray bounce limit, no more light is gathered.
+    if depth <= 0:
+        return Color(0.0, 0.0, 0.0)
+    cam.path_stats["rays"] += 1
+    if sampler is not None:
+        sampler.dimension = cam.camera_dimensions + (cam.max_depth - depth) * cam.bounce_dimensions
+    rec = HitRecord()
+    # If the ray hits nothing, return the background color.
+    if not world.hit(r, Interval(0.001, float('inf')), rec):
+        return cam.background
+
+    if rec.mat is None:
+        return Color(0.0, 0.0, 0.0)
+
+    srec = ScatterRecord()
+    color_from_emission = rec.mat.emitted(r, rec, rec.u, rec.v, rec.p)
+
+    if not rec.mat.scatter(r, rec, srec, sampler):
+        return color_from_emission
+
+    if srec.skip_pdf:
+        weight = srec.attenuation
+        scattered = srec.skip_pdf_ray
+    else:
+        light_ptr = HittablePdf(lights, rec.p)
+        pdf_ptr = srec.pdf_ptr if srec.pdf_ptr is not None else CosinePdf(rec.normal)
+        p = MixturePdf(light_ptr, pdf_ptr)
+        scattered = Ray(rec.p, p.generate(sampler), r.time())
+        pdf_value = p.value(scattered.direction())
+        scattering_pdf = rec.mat.scattering_pdf(r, rec, scattered)
+        weight = (srec.attenuation * scattering_pdf) / pdf_value
+
+    if cam.rr_min_depth is not None:
+        throughput = weight if throughput is None else throughput * weight
+        if cam.max_depth - depth >= cam.rr_min_depth:
+            # Russian roulette: continue with probability equal to the path's
+            # brightest throughput channel and divide survivors by it, which keeps
+            # the estimate unbiased while ending paths that carry little light.
+            survive = min(max(throughput.x(), throughput.y(), throughput.z()), 0.95)
+            if sampler is not None:
+                sampler.dimension = cam.camera_dimensions + (cam.max_depth - depth + 1) * cam.bounce_dimensions - 1
+            if (random.random() if sampler is None else sampler.get_1d()) >= survive:
+                return color_from_emission
+            weight = weight / survive
+            throughput = throughput / survive
+    sample_color = ray_color_recursive(cam, scattered, depth - 1, world, lights, sampler, throughput)
+    return color_from_emission + weight * sample_color
+
+def measure(integrator):
+    cam, world, lights = cornell_box()
+    if integrator == "recursive":
+        cam.ray_color = functools.partial(ray_color_recursive, cam)
+    start = time.perf_counter()
+    image = cam.render_framebuffer(world, lights)
+    elapsed = time.perf_counter() - start
+    rays = cam.path_stats["rays"]
+    return rays / elapsed, rays / cam.path_stats["paths"], image.mean()
+
+def main():
+    results = {}
+    for integrator in ("recursive", "iterative"):
+        results[integrator] = measure(integrator)
+    for integrator, (rate, length, mean) in results.items():
+        print(f"{integrator:<9} {rate:9.0f} rays/s   {length:5.2f} rays/path   image mean {mean:.4f}")
+    print(f"speedup {results['iterative'][0] / results['recursive'][0]:.2f}x")
+
+if __name__ == "__main__":
+    main()
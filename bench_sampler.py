@@ -0,0 +1,91 @@
+# Error at equal sample counts for each sampler. First on integrands with a
+# known value, shaped like a pixel's work (an edge, a smooth falloff, and a 4D
+# pixel x light product), estimated independently for 512 pixels (RMSE); then
+# on a small render of the main30.py Cornell box against a high sample
+# reference (mean absolute error). "grid" is the default jittered grid.
+#     python bench_sampler.py                       # integrands only
+#     python bench_sampler.py --render              # also the Cornell box
+#     python bench_sampler.py --render --reference-spp 1024
+import sys
+import math
+import time
+import random
+import argparse
+import numpy as np
+from Sampler import sampler_types
+from bench_path import cornell_box
+
+def edge(sampler):
+    x, y = sampler.get_pixel_2d()
+    return 1.0 if y < 0.3 + 0.45 * x else 0.0
+
+def smooth(sampler):
+    x, y = sampler.get_pixel_2d()
+    return math.exp(-4 * ((x - 0.4) ** 2 + (y - 0.6) ** 2))
+
+def pixel_light(sampler):
+    # A quarter-disk occluder over the pixel times a linearly fading light.
+    x, y = sampler.get_pixel_2d()
+    u, v = sampler.get_2d()
+    return (1.0 if x * x + y * y > 0.5 else 0.0) * (u + v)
+
+integrands = {
+    "edge": (edge, 0.3 + 0.45 / 2),
+    "smooth": (smooth, (math.sqrt(math.pi) / 4 * (math.erf(1.2) + math.erf(0.8))) *
+                       (math.sqrt(math.pi) / 4 * (math.erf(0.8) + math.erf(1.2)))),
+    "pixel x light": (pixel_light, (1 - math.pi / 8) * 1.0),
+}
+
+def integrand_rmse(name, f, exact, spp, pixels=512):
+    random.seed(21)
+    sampler = sampler_types[name](spp, seed=21)
+    errors = []
+    for p in range(pixels):
+        total = 0.0
+        for index in range(spp):
+            sampler.start_pixel_sample(p, 0, index)
+            total += f(sampler)
+        errors.append(total / spp - exact)
+    return math.sqrt(sum(e * e for e in errors) / pixels)
+
+def render(sampler, spp, width):
+    cam, world, lights = cornell_box()
+    cam.image_width = width
+    cam.samples_per_pixel = spp
+    cam.sampler = sampler
+    cam.max_depth = 10
+    return cam.render_framebuffer(world, lights)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare sampler error at equal sample counts.")
+    parser.add_argument("--spp", type=int, nargs="*", default=[4, 10, 16, 64])
+    parser.add_argument("--render", action="store_true", help="also render the Cornell box")
+    parser.add_argument("--width", type=int, default=12)
+    parser.add_argument("--reference-spp", type=int, default=256)
+    args = parser.parse_args(sys.argv[1:] if argv is None else argv)
+
+    for integrand, (f, exact) in integrands.items():
+        print(f"{integrand}: RMSE over 512 pixels")
+        for spp in args.spp:
+            rmse = {name: integrand_rmse(name, f, exact, spp) for name in sampler_types}
+            print(f"  {spp:4d} spp  " + "  ".join(
+                f"{name} {value:.5f} ({rmse['independent'] / value:4.1f}x)" for name, value in rmse.items()))
+
+    if args.render:
+        start = time.perf_counter()
+        reference = render("sobol", args.reference_spp, args.width)
+        print(f"Cornell box {args.width}px, reference {args.reference_spp} spp in {time.perf_counter() - start:.0f} s; "
+              f"mean absolute error")
+        for spp in args.spp:
+            if spp >= args.reference_spp // 4:
+                continue
+            rmse = {}
+            for name in [None] + list(sampler_types):
+                image = render(name, spp, args.width)
+                # Mean absolute error: the glass sphere's caustic fireflies dominate an RMSE this small.
+                rmse[name or "grid"] = float(np.mean(np.abs(image - reference)))
+            print(f"  {spp:4d} spp  " + "  ".join(
+                f"{name} {value:.4f} ({rmse['independent'] / value:4.1f}x)" for name, value in rmse.items()))
+
+if __name__ == "__main__":
+    main()
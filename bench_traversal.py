@@ -0,0 +1,98 @@
+# BVH traversal cost per ray on the main14.py scene's boxes and spheres, built
+# as individual Quads and Spheres under a BVHNode (bench_bvh.build_primitives;
+# main14 itself now uses QuadSet and SphereCloud): closest-hit time per camera
+# ray and the cost of a single ray/box slab test, for Aabb.hit using the
+# inverse direction cached on Ray against the previous slab test, which divided
+# by each direction component at every node.
+# Run with RT_VEC3_BACKEND=slots to measure the float Vec3 backend.
+import random
+import time
+from Interval import Interval
+from Hittable import HitRecord
+from Aabb import Aabb
+from BVH import BVHNode
+from bench_bvh import camera_rays, build_primitives
+
+def reference_slab_hit(self, r, ray_t):
+    # Aabb.hit as it was before rays cached their inverse direction.
+    ray_orig = r.origin()
+    ray_dir = r.direction()
+    tmin = ray_t.min
+    tmax = ray_t.max
+    for axis in range(3):
+        ax = self.axis_interval(axis)
+        adinv = 1.0 / ray_dir[axis] if ray_dir[axis] != 0 else float('inf')
+        t0 = (ax.min - ray_orig[axis]) * adinv
+        t1 = (ax.max - ray_orig[axis]) * adinv
+        if t0 < t1:
+            tmin = max(t0, tmin)
+            tmax = min(t1, tmax)
+        else:
+            tmin = max(t1, tmin)
+            tmax = min(t0, tmax)
+        if tmax <= tmin:
+            return False
+    return True
+
+def node_boxes(obj, boxes):
+    if isinstance(obj, BVHNode):
+        boxes.append(obj.bounding_box())
+        node_boxes(obj.left, boxes)
+        if obj.right is not obj.left:
+            node_boxes(obj.right, boxes)
+    elif hasattr(obj, "objects"):
+        for child in obj.objects:
+            node_boxes(child, boxes)
+    return boxes
+
+def best_of(runs, fn):
+    best = float('inf')
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def trace(world, rays):
+    # ConstantMedium samples random distances, so every run reseeds.
+    random.seed(1)
+    interval = Interval(0.001, float('inf'))
+    for r in rays:
+        world.hit(r, interval, HitRecord())
+
+def slab_tests(boxes, rays):
+    interval = Interval(0.001, float('inf'))
+    for r in rays:
+        for box in boxes:
+            box.hit(r, interval)
+
+def main():
+    world = BVHNode(build_primitives())
+    rays = camera_rays(1000)
+    boxes = node_boxes(world, [])
+    cached = Aabb.hit
+    visits = [0]
+
+    def counted(self, r, ray_t):
+        visits[0] += 1
+        return cached(self, r, ray_t)
+
+    Aabb.hit = counted
+    trace(world, rays)
+    Aabb.hit = cached
+    print(f"main14 scene: {len(boxes)} BVH nodes, {visits[0] / len(rays):.1f} box tests per camera ray")
+
+    results = {}
+    for name, slab in (("per-node division", reference_slab_hit), ("cached inverse", cached)):
+        Aabb.hit = slab
+        per_ray = best_of(3, lambda: trace(world, rays)) / len(rays)
+        per_test = best_of(3, lambda: slab_tests(boxes, rays[:100])) / max(len(boxes) * 100, 1)
+        results[name] = (per_ray, per_test)
+        print(f"{name:<18} closest hit {per_ray * 1e6:8.1f} us/ray   slab test {per_test * 1e9:7.0f} ns")
+    Aabb.hit = cached
+    old, new = results["per-node division"], results["cached inverse"]
+    if new[1] > 0:
+        print(f"speedup: closest hit {old[0] / new[0]:.2f}x, slab test {old[1] / new[1]:.2f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+# Micro-benchmark of the two Vec3 backends on the vector math that
+# Sphere.hit and Quad.hit perform for every candidate hit.
+import math
+import timeit
+from Vec3 import NumpyVec3
+from Vec3Slots import Vec3 as SlotsVec3
+
+def sphere_hit_ops(V):
+    center1 = V(190, 90, 190)
+    center_vec = V(0, 0, 0)
+    origin = V(278, 278, -800)
+    direction = V(-0.1, -0.2, 1.0)
+    radius = 90.0
+    time = 0.5
+
+    def run():
+        center = center1 + time * center_vec
+        oc = center - origin
+        a = direction.length_squared()
+        h = V.dot(direction, oc)
+        c = oc.length_squared() - radius * radius
+        discriminant = h * h - a * c
+        root = (h - math.sqrt(abs(discriminant))) / a
+        p = origin + (root * direction)
+        outward_normal = (p - center) / radius
+        front_face = V.dot(direction, outward_normal) < 0
+        normal = outward_normal if front_face else -outward_normal
+        return math.acos(-normal.y()), math.atan2(-normal.z(), normal.x())
+    return run
+
+def quad_hit_ops(V):
+    Q = V(213, 554, 227)
+    u = V(130, 0, 0)
+    v = V(0, 0, 105)
+    n = V.cross(u, v)
+    normal = n.unit()
+    D = V.dot(normal, Q)
+    w = n / V.dot(n, n)
+    origin = V(278, 278, -800)
+    direction = V(0.0, 0.3, 1.0)
+
+    def run():
+        denom = V.dot(normal, direction)
+        t = (D - V.dot(normal, origin)) / denom
+        intersection = origin + (t * direction)
+        planar_hitpt_vector = intersection - Q
+        alpha = V.dot(w, V.cross(planar_hitpt_vector, v))
+        beta = V.dot(w, V.cross(u, planar_hitpt_vector))
+        front_face = V.dot(direction, normal) < 0
+        return alpha, beta, front_face
+    return run
+
+def main():
+    number = 20000
+    for name, ops in (("Sphere.hit", sphere_hit_ops), ("Quad.hit", quad_hit_ops)):
+        results = {}
+        for backend, V in (("numpy", NumpyVec3), ("slots", SlotsVec3)):
+            best = min(timeit.repeat(ops(V), number=number, repeat=5))
+            results[backend] = best / number * 1e6
+        speedup = results["numpy"] / results["slots"]
+        print(f"{name:<11} numpy {results['numpy']:7.2f} us   slots {results['slots']:7.2f} us   speedup {speedup:5.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,4 @@
+import numpy as np
 from Interval import Interval
 import math
 
@@ -7,6 +8,10 @@ def linear_to_gamma(linear_component):
     else:
         return 0
 
+def luminance(rgb):
+    # Rec. 709 luminance of the last axis of an RGB array.
+    return 0.2126 * rgb[..., 0] + 0.7152 * rgb[..., 1] + 0.0722 * rgb[..., 2]
+
 def write_color(file, pixelColor):
     r = pixelColor.x()
     g = pixelColor.y()
@@ -33,4 +38,11 @@ def write_color(file, pixelColor):
 
     # Write out the pixel color components to ppm file.
     txt = f"{rbyte} {gbyte} {bbyte}\n"
-    file.write(txt)
\ No newline at end of file
+    file.write(txt)
+
+def framebuffer_to_bytes(framebuffer):
+    # Whole-image version of write_color: NaNs to zero, gamma 2, clamp, and
+    # scale to bytes in one pass over a (height, width, 3) float array.
+    linear = np.nan_to_num(np.asarray(framebuffer, dtype=np.float64), nan=0.0)
+    gamma = np.sqrt(np.maximum(linear, 0.0))
+    return (256 * np.clip(gamma, 0.000, 0.999)).astype(np.uint8)
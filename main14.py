@@ -3,17 +3,19 @@ import math
 import random
 from Vec3 import Vec3, Point3, Color
 from HittableList import HittableList
-from Hittable import RotateY, Translate
+from Hittable import Instance
 from Sphere import Sphere
+from SphereCloud import SphereCloud
 from Camera import Camera
 from Material import Lambertian, Metal, Dielectric
 from Texture import CheckerTexture
 from Quad import Quad
-from BVH import BVHNode
 import datetime
+from SceneCache import cached_scene
 from Texture import ImageTexture
 from Material import DiffuseLight
 from Quad import box
+from QuadSet import QuadSet
 from ConstantMedium import ConstantMedium
 from Texture import ImageTexture, NoiseTexture
 
@@ -22,10 +24,10 @@ filename = "finalScene.ppm"
 def random_color():
     return Color(random.random(), random.random(), random.random())
 
-def main():
+def build_scene():
 
-    # Grid of boxes with random heights (ground)
-    boxes1 = HittableList()
+    # Grid of boxes with random heights (ground), all 2400 sides in one QuadSet
+    ground_sides = []
     ground = Lambertian(Color(0.48, 0.83, 0.53))
     boxes_per_side = 20
     w = 100.0
@@ -37,12 +39,11 @@ def main():
             x1 = x0 + w
             y1 = random.uniform(1, 101)
             z1 = z0 + w
-            boxes1.add(box(Point3(x0, y0, z0), Point3(x1, y1, z1), ground))
+            ground_sides += box(Point3(x0, y0, z0), Point3(x1, y1, z1), ground).objects
 
     world = HittableList()
 
-    # Add BVH of ground boxes
-    world.add(BVHNode(boxes1.objects))
+    world.add(QuadSet.from_quads(ground_sides))
 
     # Light
     light = DiffuseLight(Color(7, 7, 7))
@@ -79,23 +80,22 @@ def main():
     world.add(Sphere(Point3(220, 280, 300), 80, Lambertian(pertext)))
 
     # Cluster of small spheres
-    boxes2 = HittableList()
     white = Lambertian(Color(0.73, 0.73, 0.73))
     ns = 1000
-    for j in range(ns):
-        center = Point3(random.uniform(0, 165), random.uniform(0, 165), random.uniform(0, 165))
-        boxes2.add(Sphere(center, 10, white))
-    cluster = BVHNode(boxes2.objects)
-    cluster = RotateY(cluster, 15)
-    cluster = Translate(cluster, Vec3(-100, 270, 395))
-    world.add(cluster)
+    centers = [(random.uniform(0, 165), random.uniform(0, 165), random.uniform(0, 165)) for j in range(ns)]
+    cluster = SphereCloud(centers, 10, white)
+    world.add(Instance(cluster).rotate_y(15).translate(Vec3(-100, 270, 395)))
 
    # Light Sources
     #empty_material = EmptyMaterial()
     lights = HittableList()
     #lights.add(Quad(Point3(343,554,332), Vec3(-130,0,0), Vec3(0,0,-105), empty_material))
     #lights.add(Sphere(Point3(190, 90, 190), 90, empty_material))
+    return world, lights
 
+def main():
+    # The scene is built once per seed and loaded from the scene cache afterwards.
+    world, lights = cached_scene(build_scene, seed=14)
 
     cam = Camera()
     cam.aspect_ratio = 1.0
@@ -0,0 +1,101 @@
+import os
+import sys
+import math
+import random
+from Vec3 import Vec3, Point3, Color
+from HittableList import HittableList
+from Hittable import RotateY, Translate
+from Sphere import Sphere
+from Camera import Camera
+from Material import Lambertian, Metal, Dielectric, EmptyMaterial
+from Texture import CheckerTexture
+from Quad import Quad
+from BVH import BVHNode
+import datetime
+from Texture import ImageTexture
+from Material import DiffuseLight
+from Quad import box
+from ConstantMedium import ConstantMedium
+from Texture import ImageTexture, NoiseTexture
+from TriangleMesh import TriangleMesh
+
+filename = "cornell_box_with_mesh.ppm"
+
+def random_color():
+    return Color(random.random(), random.random(), random.random())
+
+def main():
+    if len(sys.argv) < 2:
+        print("usage: python main31.py <mesh.obj> [scale]")
+        return
+    obj_file = sys.argv[1]
+    scale = float(sys.argv[2]) if len(sys.argv) > 2 else 1.0
+
+    # Cornell box scene
+    world = HittableList()
+    red = Lambertian(Color(.65, .05, .05))
+    white = Lambertian(Color(.73, .73, .73))
+    green = Lambertian(Color(.12, .45, .15))
+    light = DiffuseLight(Color(15, 15, 15))
+    
+    # Cornell box sides
+    world.add(Quad(Point3(555,0,0), Vec3(0,0,555), Vec3(0,555,0), green))
+    world.add(Quad(Point3(0,0,555), Vec3(0,0,-555), Vec3(0,555,0), red))
+    world.add(Quad(Point3(0,555,0), Vec3(555,0,0), Vec3(0,0,555), white))
+    world.add(Quad(Point3(0,0,555), Vec3(555,0,0), Vec3(0,0,-555), white))
+    world.add(Quad(Point3(555,0,555), Vec3(-555,0,0), Vec3(0,555,0), white))
+    
+    # Light
+    world.add(Quad(Point3(213,554,227), Vec3(130,0,0), Vec3(0,0,105), light))
+    
+    # Box 1 (white)
+    box1 = box(Point3(0,0,0), Point3(165,330,165), white)
+    box1 = RotateY(box1, 15)
+    box1 = Translate(box1, Vec3(265,0,295))
+    world.add(box1)
+
+    # Triangle mesh, scaled and centered on the floor in front of the box
+    mesh = TriangleMesh.from_obj(obj_file, Lambertian(Color(.75, .6, .2)))
+    lo, hi = mesh.vertices.min(axis=0), mesh.vertices.max(axis=0)
+    offset = Vec3(190 - scale * (lo[0] + hi[0]) / 2, -scale * lo[1], 190 - scale * (lo[2] + hi[2]) / 2)
+    mesh = TriangleMesh(mesh.vertices * scale, mesh.faces, mesh.mat, mesh.normals)
+    world.add(Translate(mesh, offset))
+    print(f"Loaded {mesh.triangle_count()} triangles from {obj_file}.")
+
+    # Use BVH for acceleration
+    world = BVHNode(world.objects, 0, len(world.objects))
+
+    # Light Sources
+    empty_material = EmptyMaterial()
+    lights = HittableList()
+    lights.add(Quad(Point3(343,554,332), Vec3(-130,0,0), Vec3(0,0,-105), empty_material))
+
+    cam = Camera()
+    cam.aspect_ratio = 1.0
+    cam.image_width = 600
+    cam.samples_per_pixel = 100
+    cam.max_depth = 50
+    cam.background = Vec3(0, 0, 0)
+    cam.vfov = 40
+    cam.lookfrom = Point3(278, 278, -800)
+    cam.lookat = Point3(278, 278, 0)
+    cam.vup = Vec3(0, 1, 0)
+    cam.defocus_angle = 0
+
+    starttime = datetime.datetime.now()
+    print("Started rendering at: ", starttime)
+    f = open_new_image_file()
+    cam.render(f, world, lights)
+    f.close()
+    endtime = datetime.datetime.now()
+    print("Finished rendering at: ", endtime)
+    print("The render took: ", endtime - starttime)
+    print("Done.\n")
+
+def open_new_image_file():
+    if os.path.exists(filename):
+        os.remove(filename)
+    return open(filename, "a")
+
+if __name__ == "__main__":
+    main()
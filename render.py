@@ -0,0 +1,55 @@
+import sys
+import argparse
+import datetime
+from SceneLoader import SceneLoader
+
+# Renders a scene description file:
+#     python render.py scenes/cornell_box.json
+#     python render.py scenes/cornell_box.json --width 200 --spp 16 -o preview.png
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Render a JSON or TOML scene file.")
+    parser.add_argument("scene", help="scene description (.json or .toml)")
+    parser.add_argument("-o", "--output", help="output image; overrides the scene's output")
+    parser.add_argument("--format", choices=["p3", "p6", "png", "pfm", "npy"],
+                        help="output format; inferred from the output name by default")
+    parser.add_argument("--width", type=int, help="image width in pixels")
+    parser.add_argument("--spp", type=int, help="samples per pixel")
+    parser.add_argument("--time-budget", type=float, metavar="SECONDS",
+                        help="render progressive passes for this long instead of a fixed --spp")
+    parser.add_argument("--depth", type=int, help="maximum ray bounces")
+    parser.add_argument("--seed", type=int, help="random seed, for repeatable renders")
+    parser.add_argument("--sampler", choices=["independent", "sobol", "halton", "pmj"],
+                        help="low-discrepancy sampler; by default samples are jittered in a grid")
+    parser.add_argument("--integrator", choices=["mixture", "mis"],
+                        help="mixture picks light or BSDF sampling 50/50; mis takes one of each")
+    parser.add_argument("--light-selection", choices=["uniform", "power"],
+                        help="pick lights equally, or by emitted power x area")
+    parser.add_argument("--denoise", action="store_true", default=None,
+                        help="filter the image with the albedo, normal and depth guided denoiser")
+    parser.add_argument("--workers", type=int, help="worker processes; 0 uses every core")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    loader = SceneLoader.from_file(args.scene)
+    world, lights, cam = loader.build()
+    overrides = {"image_width": args.width, "samples_per_pixel": args.spp, "max_depth": args.depth,
+                 "seed": args.seed, "workers": args.workers, "output_format": args.format,
+                 "sampler": args.sampler, "integrator": args.integrator,
+                 "light_selection": args.light_selection, "time_budget": args.time_budget,
+                 "denoise": args.denoise}
+    for key, value in overrides.items():
+        if value is not None:
+            setattr(cam, key, value)
+    output = args.output or loader.description.get("output", "image.ppm")
+
+    starttime = datetime.datetime.now()
+    print("Started rendering at: ", starttime)
+    cam.render(output, world, lights)
+    endtime = datetime.datetime.now()
+    print("Finished rendering at: ", endtime)
+    print("The render took: ", endtime - starttime)
+
+if __name__ == "__main__":
+    main()
@@ -2,6 +2,7 @@ import os
 from Vec3 import Vec3, Point3, Color
 from HittableList import HittableList
 from Sphere import Sphere
+from SphereCloud import SphereCloud
 from Camera import Camera
 from Material import Lambertian, Metal, Dielectric
 import math
@@ -16,12 +17,15 @@ world = HittableList()
 
 #mat = Metal(Color(0.1, 0.1, 0.83), 1)
 
+centers = []
+mats = []
 for i in range(3644):
     x=teapot[i*3]
     y=teapot[i*3+1]
     z=teapot[i*3+2]
-    mat = Metal(Color(0.25, 0.25, (z/3.15) + 0.5), 1)
-    world.add(Sphere(Point3(x,y,z), 0.075, mat))
+    mats.append(Metal(Color(0.25, 0.25, (z/3.15) + 0.5), 1))
+    centers.append((x,y,z))
+world.add(SphereCloud(centers, 0.075, mats, range(len(mats))))
 
 mat2 = Dielectric(1.5)
 world.add(Sphere(Point3(0,2,0), 0.5, mat2))